@@ -6,13 +6,17 @@ from typing import Literal, Optional
 from pydantic import BaseModel, Field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+from app.shared.context import install_request_id_filter
+
 
 class DatabaseConfig(BaseModel):
     url: str = Field(default="sqlite:///./data/sentiments.db")
-    pool_size: int = Field(default=10, ge=1, le=50)
-    max_overflow: int = Field(default=20, ge=0, le=100)
+    pool_size: int = Field(default=20, ge=1, le=50)
+    max_overflow: int = Field(default=10, ge=0, le=100)
     pool_timeout: int = Field(default=30, ge=5, le=300)
     pool_recycle: int = Field(default=3600, ge=300, le=86400)
+    query_cache_size: int = Field(default=1200, ge=0, le=100000)
+    daily_counts_refresh_interval: int = Field(default=300, ge=0, le=86400)
     echo: bool = Field(default=False)
 
     @field_validator("url")
@@ -51,7 +55,10 @@ class MLConfig(BaseModel):
     min_text_length: int = Field(default=1, ge=1, le=100)
     confidence_threshold: float = Field(default=0.5, ge=0.0, le=1.0)
     batch_size: int = Field(default=32, ge=1, le=128)
+    dynamic_batching: bool = Field(default=True)
+    batch_max_latency_ms: int = Field(default=10, ge=0, le=1000)
     device: Literal["auto", "cpu", "cuda"] = Field(default="auto")
+    use_torch_compile: bool = Field(default=False)
 
     @field_validator("model_cache_dir")
     @classmethod
@@ -73,6 +80,7 @@ class ServerConfig(BaseModel):
     port: int = Field(default=8000, ge=1024, le=65535)
     workers: int = Field(default=1, ge=1, le=16)
     reload: bool = Field(default=False)
+    loop: Literal["auto", "asyncio", "uvloop"] = Field(default="auto")
 
 
 class Settings(BaseSettings):
@@ -134,8 +142,10 @@ class Settings(BaseSettings):
             raise ValueError(f"Nível de log inválido: {v}")
         logging.basicConfig(
             level=getattr(logging, level),
-            format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+            format="%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s"
         )
+        # O formato usa %(request_id)s: o filtro fornece o valor padrão
+        install_request_id_filter()
         return level
 
     @property
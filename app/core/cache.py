@@ -1,10 +1,10 @@
 import asyncio
 import hashlib
-import json
 import logging
 from functools import lru_cache
-from typing import Any, Dict, Optional, Union
+from typing import Any, Dict, List, Optional, Union
 
+import orjson
 import redis.asyncio as redis
 from redis.asyncio import ConnectionPool
 from redis.backoff import ExponentialBackoff
@@ -17,6 +17,12 @@ from app.core.exceptions import CacheError
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# Payloads maiores que isso são desserializados em thread para não bloquear o loop
+OFFLOAD_THRESHOLD_BYTES = 64 * 1024
+
+# Mantém compatibilidade com json da stdlib (chaves int) e aceita floats numpy do modelo
+SERIALIZE_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
 
 class CacheMetrics:
     """Métricas básicas de cache em memória."""
@@ -79,16 +85,22 @@ class CacheService:
         key_hash = hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]
         return settings.get_cache_key(f"hash:{key_hash}")
     
-    def _serialize_value(self, value: Any) -> str:
-        """Serializa valor para JSON com suporte a datetime."""
+    async def _deserialize_large(self, value: Union[str, bytes]) -> Any:
+        """Deserializa fora do event loop quando o payload é grande."""
+        if len(value) > OFFLOAD_THRESHOLD_BYTES:
+            return await asyncio.to_thread(self._deserialize_value, value)
+        return self._deserialize_value(value)
+    
+    def _serialize_value(self, value: Any) -> bytes:
+        """Serializa valor para JSON (orjson) com suporte a datetime."""
         def datetime_handler(obj):
-            """Handler para serializar datetime."""
+            """Handler para tipos com isoformat não suportados nativamente."""
             if hasattr(obj, 'isoformat'):
                 return obj.isoformat()
             raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
         
         try:
-            return json.dumps(value, ensure_ascii=False, separators=(',', ':'), default=datetime_handler)
+            return orjson.dumps(value, default=datetime_handler, option=SERIALIZE_OPTIONS)
         except (TypeError, ValueError) as e:
             logger.error(f"Erro ao serializar: {e}")
             raise CacheError(
@@ -96,11 +108,11 @@ class CacheService:
                 details={"value_type": type(value).__name__}
             ) from e
     
-    def _deserialize_value(self, value: str) -> Any:
+    def _deserialize_value(self, value: Union[str, bytes]) -> Any:
         """Deserializa valor do JSON."""
         try:
-            return json.loads(value)
-        except (TypeError, ValueError, json.JSONDecodeError) as e:
+            return orjson.loads(value)
+        except (TypeError, ValueError) as e:
             logger.error(f"Erro ao deserializar: {e}")
             raise CacheError(
                 message=f"Falha na deserialização: {str(e)}",
@@ -144,7 +156,7 @@ class CacheService:
             if cached_value is not None:
                 self.metrics.hit()
                 logger.debug(f"Cache hit (Redis): {key}")
-                return self._deserialize_value(cached_value)
+                return await self._deserialize_large(cached_value)
             else:
                 self.metrics.miss()
                 logger.debug(f"Cache miss (Redis): {key}")
@@ -177,13 +189,7 @@ class CacheService:
             
             self._fallback_store[cache_key] = value
             logger.debug(f"Cache set (fallback): {key}")
-            
-            # Limitar tamanho do cache em memória
-            if len(self._fallback_store) > 1000:
-                keys_to_remove = list(self._fallback_store.keys())[:100]
-                for old_key in keys_to_remove:
-                    del self._fallback_store[old_key]
-                logger.warning("Cache fallback limitado a 1000 itens")
+            self._trim_fallback_store()
             
             return True
         
@@ -213,6 +219,100 @@ class CacheService:
             logger.warning(f"Usando fallback devido a erro Redis: {key}")
             return True
     
+    async def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        """Obtém múltiplos valores em um único round-trip (MGET)."""
+        if not keys:
+            return []
+        
+        cache_keys = [self._generate_cache_key(key) for key in keys]
+        
+        # Modo fallback
+        if self.fallback_mode or not self.redis_client:
+            self.metrics.fallback()
+            values = [self._fallback_store.get(cache_key) for cache_key in cache_keys]
+            for value in values:
+                if value is not None:
+                    self.metrics.hit()
+                else:
+                    self.metrics.miss()
+            return values
+        
+        # Modo Redis
+        try:
+            cached_values = await self.redis_client.mget(cache_keys)
+        except Exception as e:
+            self.metrics.error()
+            logger.error(f"Erro ao buscar lote no cache: {e}")
+            return [self._fallback_store.get(cache_key) for cache_key in cache_keys]
+        
+        values = []
+        for cached_value in cached_values:
+            if cached_value is None:
+                self.metrics.miss()
+                values.append(None)
+                continue
+            
+            try:
+                values.append(self._deserialize_value(cached_value))
+                self.metrics.hit()
+            except CacheError:
+                self.metrics.error()
+                values.append(None)
+        
+        logger.debug(f"Cache mget (Redis): {len(keys)} chaves")
+        return values
+    
+    async def set_many(self, items: Dict[str, Any], ttl: Optional[int] = None) -> bool:
+        """Define múltiplos valores em um único round-trip (pipeline de SETEX)."""
+        if not items:
+            return True
+        
+        if ttl is None:
+            ttl = settings.cache.default_ttl
+        
+        entries = {
+            self._generate_cache_key(key): value for key, value in items.items()
+        }
+        
+        # Modo fallback
+        if self.fallback_mode or not self.redis_client:
+            self.metrics.fallback()
+            self._fallback_store.update(entries)
+            for _ in entries:
+                self.metrics.set_operation()
+            self._trim_fallback_store()
+            return True
+        
+        # Modo Redis
+        try:
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                for cache_key, value in entries.items():
+                    pipe.setex(cache_key, ttl, self._serialize_value(value))
+                await pipe.execute()
+            
+            for _ in entries:
+                self.metrics.set_operation()
+            logger.debug(f"Cache set_many (Redis): {len(entries)} chaves (TTL: {ttl}s)")
+            return True
+            
+        except Exception as e:
+            self.metrics.error()
+            logger.error(f"Erro ao definir lote no cache: {e}")
+            return False
+        
+        finally:
+            # Manter fallback em memória sincronizado, como em set()
+            self._fallback_store.update(entries)
+            self._trim_fallback_store()
+    
+    def _trim_fallback_store(self) -> None:
+        """Limita tamanho do cache em memória."""
+        if len(self._fallback_store) > 1000:
+            keys_to_remove = list(self._fallback_store.keys())[:100]
+            for old_key in keys_to_remove:
+                del self._fallback_store[old_key]
+            logger.warning("Cache fallback limitado a 1000 itens")
+    
     async def delete(self, key: str) -> bool:
         """Remove valor do cache."""
         cache_key = self._generate_cache_key(key)
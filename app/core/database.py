@@ -3,7 +3,9 @@ from contextlib import contextmanager
 from functools import lru_cache
 from typing import Any, Dict, Generator
 
+import orjson
 from sqlalchemy import Engine, MetaData, create_engine, event, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.exc import DatabaseError, DisconnectionError, OperationalError, SQLAlchemyError
 from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
 from sqlalchemy.pool import StaticPool
@@ -34,6 +36,14 @@ class Base(DeclarativeBase):
         return f"<{class_name}(id={primary_key})>"
 
 
+def _json_serializer(value: Any) -> str:
+    """Serializa colunas JSON com orjson (numpy e chaves não-str suportados)."""
+    return orjson.dumps(
+        value,
+        option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    ).decode()
+
+
 def create_database_engine() -> Engine:
     """Cria e configura engine do banco com otimizações."""
     try:
@@ -42,6 +52,10 @@ def create_database_engine() -> Engine:
         engine_kwargs: Dict[str, Any] = {
             "echo": settings.database.echo,
             "future": True,
+            "query_cache_size": settings.database.query_cache_size,
+            # Colunas JSON (all_scores) serializadas/lidas com orjson
+            "json_serializer": _json_serializer,
+            "json_deserializer": orjson.loads,
         }
         
         if database_url.startswith("sqlite"):
@@ -65,6 +79,13 @@ def create_database_engine() -> Engine:
                 "pool_recycle": settings.database.pool_recycle,
                 "pool_pre_ping": True,
             })
+            
+            # Inserções em lote (bulk_create) agrupadas em páginas no psycopg2
+            if make_url(database_url).get_driver_name() == "psycopg2":
+                engine_kwargs.update({
+                    "executemany_mode": "values_plus_batch",
+                    "executemany_batch_page_size": 500,
+                })
         
         engine = create_engine(database_url, **engine_kwargs)
         
@@ -182,6 +203,10 @@ def init_database() -> None:
         logger.info("Inicializando banco de dados...")
         
         Base.metadata.create_all(bind=engine)
+        
+        # Import local: os modelos dependem deste módulo
+        from app.sentiment.migrations import upgrade_sentiment_schema
+        upgrade_sentiment_schema(engine)
         logger.info("Banco inicializado com sucesso")
         
         # Testar conectividade
@@ -195,6 +220,15 @@ def init_database() -> None:
         ) from e
 
 
+def refresh_daily_counts_view() -> None:
+    """Atualiza a materialized view de contagens diárias (apenas PostgreSQL)."""
+    # Import local: o repositório depende deste módulo
+    from app.sentiment.repository import SentimentRepository
+    
+    with get_db_transaction() as session:
+        SentimentRepository(session).refresh_daily_counts()
+
+
 def get_database_info() -> Dict[str, Any]:
     """Retorna informações sobre configuração do banco."""
     engine = get_engine()
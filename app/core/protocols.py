@@ -35,6 +35,19 @@ class CacheProtocol(Protocol):
         ...
 
 
+@runtime_checkable
+class BatchCacheProtocol(CacheProtocol, Protocol):
+    """Cache com operações em lote (um round-trip por lote)."""
+    
+    async def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        """Obtém múltiplos valores."""
+        ...
+    
+    async def set_many(self, items: Dict[str, Any], ttl: Optional[int] = None) -> bool:
+        """Define múltiplos valores."""
+        ...
+
+
 @runtime_checkable
 class AnalyzerProtocol(Protocol):
     """Interface para analisadores de sentimento."""
@@ -28,8 +28,8 @@ def get_db_session(config: Settings = Depends(get_config)) -> Generator[Session,
         session_factory = get_session_factory()
         session = session_factory()
         
+        # Conexão já validada no checkout do pool (pool_pre_ping)
         logger.debug("Sessão de banco de dados criada")
-        session.execute(text("SELECT 1")).scalar()  # FIXED: Added text() wrapper
         
         yield session
         
@@ -110,7 +110,6 @@ async def get_async_db_session(config: Settings = Depends(get_config)) -> AsyncG
         session = session_factory()
         
         logger.debug("Sessão assíncrona criada")
-        session.execute(text("SELECT 1")).scalar()  # FIXED: Added text() wrapper
         
         yield session
         
@@ -13,6 +13,7 @@ from sqlalchemy.exc import SQLAlchemyError
 
 from app.core.exceptions import DatabaseError, RecordNotFoundError
 from app.sentiment.models import SentimentAnalysis
+from app.sentiment.repository import invalidate_snapshot
 
 logger = logging.getLogger(__name__)
 
@@ -26,7 +27,9 @@ class HistoryRepository:
     def get_by_id(self, id: str) -> Optional[SentimentAnalysis]:
         """Busca análise por ID."""
         try:
-            return self.db.query(SentimentAnalysis).filter(
+            return self.db.query(SentimentAnalysis).options(
+                *SentimentAnalysis.load_full_options()
+            ).filter(
                 SentimentAnalysis.id == id
             ).first()
         except SQLAlchemyError as e:
@@ -46,6 +49,7 @@ class HistoryRepository:
             analysis = self.get_by_id_or_raise(id)
             self.db.delete(analysis)
             self.db.commit()
+            invalidate_snapshot(id)
             logger.debug(f"Análise removida: {id}")
             return True
         except SQLAlchemyError as e:
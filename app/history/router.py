@@ -1,8 +1,11 @@
+import logging
 import time
+from collections import deque
 from typing import Annotated
 
+import orjson
 from fastapi import (
-    APIRouter, BackgroundTasks, Depends, HTTPException, Path, Query, Request, status
+    APIRouter, Depends, HTTPException, Path, Query, Request, status
 )
 from sqlalchemy.orm import Session
 
@@ -38,32 +41,30 @@ def get_service(
     return get_history_service(cache)
 
 
-async def log_query_stats(
+# Ring buffer de analytics, descarregado em lote por flush_query_stats
+_query_stats_queue: deque = deque(maxlen=10000)
+analytics_logger = logging.getLogger("history_analytics")
+
+
+def log_query_stats(
     endpoint: str,
     success: bool,
     query_time: float,
     total_results: int = 0,
     cached: bool = False
 ) -> None:
-    """Background task para logging de estatísticas de consultas."""
-    import logging
-    
-    logger = logging.getLogger("history_analytics")
-    
-    try:
-        stats = {
-            "endpoint": endpoint,
-            "success": success,
-            "query_time_ms": query_time,
-            "total_results": total_results,
-            "cached": cached,
-            "timestamp": time.time()
-        }
-        
-        logger.info(f"Query Analytics: {stats}")
-        
-    except Exception as e:
-        logger.error(f"Erro no logging de analytics: {e}")
+    """Registra estatísticas da consulta no buffer (sem formatação nem I/O)."""
+    _query_stats_queue.append(
+        (endpoint, success, query_time, total_results, cached, time.time())
+    )
+
+
+def flush_query_stats() -> int:
+    """Emite as estatísticas acumuladas em uma única linha JSON."""
+    batch = [_query_stats_queue.popleft() for _ in range(len(_query_stats_queue))]
+    if batch:
+        analytics_logger.info(orjson.dumps(batch).decode())
+    return len(batch)
 
 
 async def handle_history_error(error: Exception, request_id: str) -> HTTPException:
@@ -119,7 +120,6 @@ async def handle_history_error(error: Exception, request_id: str) -> HTTPExcepti
 )
 @rate_limit(requests_per_minute=60, requests_per_hour=500)
 async def get_history(
-    background_tasks: BackgroundTasks,
     http_request: Request,
     db: Session = Depends(get_db_session),
     service: HistoryService = Depends(get_service),
@@ -264,10 +264,9 @@ async def get_history(
             use_cache=True
         )
         
-        # Background analytics
+        # Analytics
         query_time = (time.time() - start_time) * 1000
-        background_tasks.add_task(
-            log_query_stats,
+        log_query_stats(
             endpoint="get_history",
             success=True,
             query_time=query_time,
@@ -278,10 +277,9 @@ async def get_history(
         return result
         
     except Exception as error:
-        # Background analytics para erro
+        # Analytics de erro
         query_time = (time.time() - start_time) * 1000
-        background_tasks.add_task(
-            log_query_stats,
+        log_query_stats(
             endpoint="get_history",
             success=False,
             query_time=query_time
@@ -307,7 +305,6 @@ async def get_analysis_by_id(
             pattern=r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$"
         )
     ],
-    background_tasks: BackgroundTasks,
     http_request: Request,
     db: Session = Depends(get_db_session),
     service: HistoryService = Depends(get_service)
@@ -331,10 +328,9 @@ async def get_analysis_by_id(
             use_cache=True
         )
         
-        # Background analytics
+        # Analytics
         query_time = (time.time() - start_time) * 1000
-        background_tasks.add_task(
-            log_query_stats,
+        log_query_stats(
             endpoint="get_analysis_detail",
             success=True,
             query_time=query_time,
@@ -345,8 +341,7 @@ async def get_analysis_by_id(
         
     except Exception as error:
         query_time = (time.time() - start_time) * 1000
-        background_tasks.add_task(
-            log_query_stats,
+        log_query_stats(
             endpoint="get_analysis_detail",
             success=False,
             query_time=query_time
@@ -365,7 +360,6 @@ async def get_analysis_by_id(
 )
 @rate_limit(requests_per_minute=20, requests_per_hour=200)  # Limite menor para analytics
 async def get_analytics(
-    background_tasks: BackgroundTasks,
     http_request: Request,
     db: Session = Depends(get_db_session),
     service: HistoryService = Depends(get_service),
@@ -403,10 +397,9 @@ async def get_analytics(
             use_cache=True
         )
         
-        # Background analytics
+        # Analytics
         query_time = (time.time() - start_time) * 1000
-        background_tasks.add_task(
-            log_query_stats,
+        log_query_stats(
             endpoint="get_analytics",
             success=True,
             query_time=query_time,
@@ -417,8 +410,7 @@ async def get_analytics(
         
     except Exception as error:
         query_time = (time.time() - start_time) * 1000
-        background_tasks.add_task(
-            log_query_stats,
+        log_query_stats(
             endpoint="get_analytics",
             success=False,
             query_time=query_time
@@ -437,7 +429,6 @@ async def get_analytics(
 )
 @rate_limit(requests_per_minute=15, requests_per_hour=150)  # Limite ainda menor para stats
 async def get_stats(
-    background_tasks: BackgroundTasks,
     http_request: Request,
     db: Session = Depends(get_db_session),
     service: HistoryService = Depends(get_service),
@@ -483,10 +474,9 @@ async def get_stats(
             use_cache=True
         )
         
-        # Background analytics
+        # Analytics
         query_time = (time.time() - start_time) * 1000
-        background_tasks.add_task(
-            log_query_stats,
+        log_query_stats(
             endpoint="get_stats",
             success=True,
             query_time=query_time,
@@ -497,8 +487,7 @@ async def get_stats(
         
     except Exception as error:
         query_time = (time.time() - start_time) * 1000
-        background_tasks.add_task(
-            log_query_stats,
+        log_query_stats(
             endpoint="get_stats",
             success=False,
             query_time=query_time
@@ -518,7 +507,6 @@ async def get_stats(
 @rate_limit(requests_per_minute=30, requests_per_hour=300)
 async def delete_analysis(
     analysis_id: str,
-    background_tasks: BackgroundTasks,
     http_request: Request,
     db: Session = Depends(get_db_session),
     service: HistoryService = Depends(get_service)
@@ -540,10 +528,9 @@ async def delete_analysis(
             analysis_id=analysis_id
         )
         
-        # Background analytics
+        # Analytics
         query_time = (time.time() - start_time) * 1000
-        background_tasks.add_task(
-            log_query_stats,
+        log_query_stats(
             endpoint="delete_analysis",
             success=True,
             query_time=query_time,
@@ -554,8 +541,7 @@ async def delete_analysis(
         
     except Exception as error:
         query_time = (time.time() - start_time) * 1000
-        background_tasks.add_task(
-            log_query_stats,
+        log_query_stats(
             endpoint="delete_analysis",
             success=False,
             query_time=query_time
@@ -630,7 +616,6 @@ async def history_health_check(
     dependencies=[Depends(rate_limit(requests_per_minute=5))]
 )
 async def clear_history_cache(
-    background_tasks: BackgroundTasks,
     service: HistoryService = Depends(get_service)
 ) -> dict:
     """
@@ -643,8 +628,7 @@ async def clear_history_cache(
         # Limpar todo o cache (implementação simplificada)
         success = await service.cache_service.clear_all()
         
-        background_tasks.add_task(
-            log_query_stats,
+        log_query_stats(
             endpoint="clear_cache",
             success=success,
             query_time=0
@@ -18,6 +18,7 @@ from app.history.schemas import (
     TrendData
 )
 from app.sentiment.models import SentimentAnalysis
+from app.sentiment.repository import invalidate_snapshot
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -160,7 +161,9 @@ class HistoryService:
                     return AnalysisDetail(**cached_result)
             
             # Buscar no banco
-            record = db.query(SentimentAnalysis).filter(
+            record = db.query(SentimentAnalysis).options(
+                *SentimentAnalysis.load_full_options()
+            ).filter(
                 SentimentAnalysis.id == analysis_id
             ).first()
             
@@ -233,11 +236,10 @@ class HistoryService:
             # Data limite
             start_date = datetime.utcnow() - timedelta(days=days)
             
-            # 1. Distribuição de sentimentos (agregação otimizada)
-            sentiment_dist = self._get_sentiment_distribution(db, start_date)
-            
-            # 2. Distribuição de idiomas (top 10)
-            language_dist = self._get_language_distribution(db, start_date, limit=10)
+            # 1-2. Distribuição de sentimentos e de idiomas (top 10) em uma query
+            sentiment_dist, language_dist = self._get_distributions(
+                db, start_date, language_limit=10
+            )
             
             # 3. Volume diário (últimos 30 dias)
             daily_volume = self._get_daily_volume(db, start_date)
@@ -312,7 +314,7 @@ class HistoryService:
             general_stats = self._get_general_stats(db, start_date)
             
             # 2. Top idiomas
-            top_languages = self._get_language_distribution(db, start_date, limit=5)
+            _, top_languages = self._get_distributions(db, start_date, language_limit=5)
             
             # 3. Tendência de sentimentos
             sentiment_trend = self._get_sentiment_trend(
@@ -382,6 +384,7 @@ class HistoryService:
             db.commit()
             
             # Invalidar caches relacionados
+            invalidate_snapshot(analysis_id)
             await self._invalidate_related_caches(analysis_id)
             
             logger.info(f"Análise {analysis_id} removida com sucesso")
@@ -406,7 +409,10 @@ class HistoryService:
     
     def _build_base_query(self, db: Session, filters: HistoryFilter) -> Select:
         """Constrói query base com filtros otimizada para índices."""
-        query = db.query(SentimentAnalysis)
+        # Itens do histórico exibem preview do texto e scores
+        query = db.query(SentimentAnalysis).options(
+            *SentimentAnalysis.load_full_options()
+        )
         
         # Aplicar filtros na ordem de seletividade (mais seletivos primeiro)
         conditions = []
@@ -489,77 +495,69 @@ class HistoryService:
             confidence=record.confidence,
             language=record.language,
             text_preview=text_preview,
-            text_length=len(record.text),
+            text_length=record.get_text_length(),
             created_at=record.created_at,
             all_scores=record.all_scores or []
         )
     
-    def _get_sentiment_distribution(
-        self, 
-        db: Session, 
-        start_date: datetime
-    ) -> SentimentDistribution:
-        """Agregação otimizada de distribuição de sentimentos."""
+    def _get_distributions(
+        self,
+        db: Session,
+        start_date: datetime,
+        language_limit: int = 10
+    ) -> Tuple[SentimentDistribution, List[LanguageDistribution]]:
+        """
+        Distribuições de sentimento e idioma em uma única agregação.
+        
+        Agrupa por (sentiment, language), coberto por idx_sentiment_lang_date;
+        o resultado tem no máximo sentimentos x idiomas linhas e os dois
+        histogramas (e o total) são derivados em Python.
+        """
         result = db.query(
             SentimentAnalysis.sentiment,
+            SentimentAnalysis.language,
             func.count(SentimentAnalysis.id).label('count')
         ).filter(
             SentimentAnalysis.created_at >= start_date
         ).group_by(
-            SentimentAnalysis.sentiment
+            SentimentAnalysis.sentiment,
+            SentimentAnalysis.language
         ).all()
         
         # Inicializar contadores
-        counts = {"positive": 0, "negative": 0, "neutral": 0}
+        sentiment_counts = {"positive": 0, "negative": 0, "neutral": 0}
+        language_counts: Dict[str, int] = {}
         
-        # Preencher com resultados
-        for sentiment, count in result:
-            counts[sentiment] = count
+        for sentiment, language, count in result:
+            sentiment_counts[sentiment] = sentiment_counts.get(sentiment, 0) + count
+            language_counts[language] = language_counts.get(language, 0) + count
         
-        total = sum(counts.values())
+        total = sum(sentiment_counts.values())
         
-        return SentimentDistribution(
-            positive=counts["positive"],
-            negative=counts["negative"],
-            neutral=counts["neutral"],
+        sentiment_dist = SentimentDistribution(
+            positive=sentiment_counts["positive"],
+            negative=sentiment_counts["negative"],
+            neutral=sentiment_counts["neutral"],
             total=total
         )
-    
-    def _get_language_distribution(
-        self,
-        db: Session,
-        start_date: datetime,
-        limit: int = 10
-    ) -> List[LanguageDistribution]:
-        """Agregação otimizada de distribuição de idiomas."""
-        # Total para calcular percentuais
-        total = db.query(func.count(SentimentAnalysis.id)).filter(
-            SentimentAnalysis.created_at >= start_date
-        ).scalar() or 0
         
         if total == 0:
-            return []
+            return sentiment_dist, []
         
-        # Agregação por idioma
-        result = db.query(
-            SentimentAnalysis.language,
-            func.count(SentimentAnalysis.id).label('count')
-        ).filter(
-            SentimentAnalysis.created_at >= start_date
-        ).group_by(
-            SentimentAnalysis.language
-        ).order_by(
-            desc(func.count(SentimentAnalysis.id))
-        ).limit(limit).all()
+        top_languages = sorted(
+            language_counts.items(), key=lambda item: item[1], reverse=True
+        )[:language_limit]
         
-        return [
+        language_dist = [
             LanguageDistribution(
                 language=language,
                 count=count,
                 percentage=round((count / total) * 100, 2)
             )
-            for language, count in result
+            for language, count in top_languages
         ]
+        
+        return sentiment_dist, language_dist
     
     def _get_daily_volume(
         self,
@@ -7,22 +7,59 @@ from fastapi.responses import JSONResponse
 
 from app.config import get_settings
 from app.core.cache import check_cache_health, get_cache_service
-from app.core.database import check_database_health, init_database
+from app.core.database import (
+    check_database_health, get_engine, init_database, refresh_daily_counts_view
+)
 from app.core.exceptions import (
     CacheError, DatabaseError, InvalidTextError, MLError, 
     ModelNotAvailableError, RateLimitError, get_exception_handlers
 )
-from app.sentiment.analyzer import get_sentiment_analyzer
-from app.sentiment.router import router as sentiment_router
-from app.history.router import router as history_router
+from app.sentiment.analyzer import get_sentiment_analyzer, run_inference
+from app.sentiment.batcher import start_dynamic_batcher, stop_dynamic_batcher
+from app.sentiment.router import (
+    flush_analysis_stats, router as sentiment_router
+)
+from app.history.router import flush_query_stats, router as history_router
 from app.auth.router import router as auth_router  # NEW: Auth router
+from app.shared.context import get_request_id
 from app.shared.middleware import setup_middleware
-from app.shared.rate_limiter import check_rate_limiter_health
+from app.shared.rate_limiter import (
+    check_rate_limiter_health, enable_redis_rate_limiter
+)
 
 # Configurações
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
+# Intervalo de flush dos buffers de analytics (segundos)
+ANALYTICS_FLUSH_INTERVAL = 1.0
+
+
+def flush_analytics() -> None:
+    """Descarrega os buffers de analytics dos routers."""
+    flush_analysis_stats()
+    flush_query_stats()
+
+
+async def flush_analytics_periodically(interval: float) -> None:
+    """Descarrega periodicamente os buffers de analytics."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            flush_analytics()
+        except Exception as e:
+            logger.error(f"Erro no logging de analytics: {e}")
+
+
+async def refresh_daily_counts_periodically(interval: int) -> None:
+    """Atualiza periodicamente a materialized view de contagens diárias."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(refresh_daily_counts_view)
+        except Exception as e:
+            logger.error(f"Erro ao atualizar contagens diárias: {e}")
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -43,6 +80,10 @@ async def lifespan(app: FastAPI):
         
         if cache_available:
             logger.info("Cache Redis conectado")
+            
+            # Rate limiting compartilhado entre workers
+            if cache_service.redis_client:
+                await enable_redis_rate_limiter(cache_service.redis_client)
         else:
             logger.warning("Cache Redis indisponível - usando fallback")
         
@@ -53,6 +94,18 @@ async def lifespan(app: FastAPI):
         model_info = analyzer.get_model_info()
         logger.info(f"Modelo configurado: {model_info['model_name']} (lazy loading)")
         
+        # Com torch.compile, a compilação acontece no startup e não na primeira requisição
+        if settings.ml.use_torch_compile:
+            try:
+                await run_inference(analyzer.warm_up)
+                logger.info("Modelo carregado e compilado no startup")
+            except Exception as e:
+                logger.error(f"Falha no warm-up do modelo: {e}")
+        
+        # Micro-batching de requisições individuais de /analyze
+        if settings.ml.dynamic_batching:
+            start_dynamic_batcher()
+        
         # 4. Verificar health dos componentes
         logger.info("Verificando saúde dos componentes...")
         
@@ -69,10 +122,32 @@ async def lifespan(app: FastAPI):
         if settings.is_production:
             logger.info("Configurações de produção aplicadas")
         
+        # 6. Refresh periódico das contagens diárias (PostgreSQL)
+        refresh_task = None
+        refresh_interval = settings.database.daily_counts_refresh_interval
+        if get_engine().dialect.name == "postgresql" and refresh_interval > 0:
+            refresh_task = asyncio.create_task(
+                refresh_daily_counts_periodically(refresh_interval)
+            )
+            logger.info(f"Refresh de contagens diárias a cada {refresh_interval}s")
+        
+        # 7. Flush em lote das estatísticas de analytics
+        analytics_task = asyncio.create_task(
+            flush_analytics_periodically(ANALYTICS_FLUSH_INTERVAL)
+        )
+        
         logger.info("✅ MoodAPI iniciado com sucesso!")
         
         yield
         
+        if refresh_task:
+            refresh_task.cancel()
+        
+        analytics_task.cancel()
+        flush_analytics()
+        
+        await stop_dynamic_batcher()
+        
     except Exception as e:
         logger.error(f"Erro durante inicialização: {e}")
         raise
@@ -456,6 +531,7 @@ if __name__ == "__main__":
         port=settings.server.port,
         reload=settings.server.reload and settings.debug,
         workers=1,  # Single worker para desenvolvimento
+        loop=settings.server.loop,  # "auto" usa uvloop quando instalado
         log_level=settings.log_level.lower(),
         access_log=settings.debug
     )
@@ -477,7 +553,7 @@ async def invalid_text_handler(request: Request, exc: InvalidTextError):
             "error": "INVALID_TEXT",
             "message": str(exc),
             "details": getattr(exc, "details", {}),
-            "request_id": getattr(request.state, "request_id", "unknown")
+            "request_id": get_request_id()
         }
     )
 
@@ -490,7 +566,7 @@ async def rate_limit_handler(request: Request, exc: RateLimitError):
         content={
             "error": "RATE_LIMIT_EXCEEDED",
             "message": str(exc),
-            "request_id": getattr(request.state, "request_id", "unknown")
+            "request_id": get_request_id()
         },
         headers={
             "Retry-After": "60",
@@ -513,6 +589,6 @@ async def cache_error_handler(request: Request, exc: CacheError):
         status_code=status.HTTP_200_OK,  # Cache error não falha request
         content={
             "warning": "Cache temporarily unavailable, using fallback",
-            "request_id": getattr(request.state, "request_id", "unknown")
+            "request_id": get_request_id()
         }
     )
\ No newline at end of file
@@ -1,11 +1,13 @@
+import asyncio
 import logging
+import sys
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 import torch
 from langdetect import DetectorFactory, LangDetectException, detect
-from transformers import pipeline
 
 from app.config import get_settings
 from app.core.exceptions import (
@@ -22,22 +24,75 @@ settings = get_settings()
 # Configurar langdetect para resultados consistentes
 DetectorFactory.seed = 0
 
+# Mapear labels do modelo para formato padrão (valores são literais internados,
+# compartilhados por todos os all_scores)
+LABEL_MAPPING: Dict[str, str] = {
+    "POSITIVE": "positive",
+    "NEGATIVE": "negative",
+    "NEUTRAL": "neutral",
+    "LABEL_0": "negative",  # cardiffnlp format
+    "LABEL_1": "neutral",   # cardiffnlp format
+    "LABEL_2": "positive",  # cardiffnlp format
+}
+
+
+@lru_cache(maxsize=4096)
+def _detect_language_cached(detection_text: str) -> str:
+    """Detecção de idioma memoizada (determinística com DetectorFactory.seed fixo).
+    
+    O código é internado: textos distintos do mesmo idioma compartilham o str.
+    """
+    return sys.intern(detect(detection_text))
+
 
 class SentimentAnalyzerMeta(type):
-    """Metaclass thread-safe para implementar singleton pattern."""
+    """Metaclass thread-safe para implementar singleton pattern.
     
-    _instances: Dict[type, Any] = {}
+    Inicialização one-shot: apenas a primeira thread constrói a instância;
+    as demais aguardam o Event sem disputar o lock durante a construção.
+    """
+    
+    # Estrutura: {cls: (instância ou None enquanto pendente, event)}
+    _instances: Dict[type, Tuple[Optional[Any], threading.Event]] = {}
     _lock: threading.Lock = threading.Lock()
     
     def __call__(cls, *args, **kwargs):
-        if cls not in cls._instances:
+        entry = cls._instances.get(cls)
+        if entry is not None and entry[0] is not None:
+            return entry[0]
+        
+        owner = False
+        if entry is None:
+            # Lock apenas para registrar a entrada pendente
             with cls._lock:
-                # Double-check locking pattern
-                if cls not in cls._instances:
-                    instance = super().__call__(*args, **kwargs)
-                    cls._instances[cls] = instance
-                    logger.info(f"Instância singleton criada: {cls.__name__}")
-        return cls._instances[cls]
+                entry = cls._instances.get(cls)
+                if entry is None:
+                    entry = (None, threading.Event())
+                    cls._instances[cls] = entry
+                    owner = True
+        
+        event = entry[1]
+        
+        if not owner:
+            event.wait()
+            entry = cls._instances.get(cls)
+            if entry is None or entry[0] is None:
+                # Inicializador falhou - tentar novamente
+                return cls.__call__(*args, **kwargs)
+            return entry[0]
+        
+        try:
+            instance = super().__call__(*args, **kwargs)
+        except BaseException:
+            with cls._lock:
+                cls._instances.pop(cls, None)
+            event.set()
+            raise
+        
+        cls._instances[cls] = (instance, event)
+        event.set()
+        logger.info(f"Instância singleton criada: {cls.__name__}")
+        return instance
 
 
 class SentimentAnalyzer(metaclass=SentimentAnalyzerMeta):
@@ -75,6 +130,10 @@ class SentimentAnalyzer(metaclass=SentimentAnalyzerMeta):
             return
             
         try:
+            # Import tardio: transformers leva segundos para importar e só é
+            # necessário quando o modelo é de fato carregado
+            from transformers import pipeline
+            
             logger.info(f"Carregando modelo: {settings.ml.model_name}")
             
             # Detectar dispositivo
@@ -110,10 +169,13 @@ class SentimentAnalyzer(metaclass=SentimentAnalyzerMeta):
                 self._pipeline = pipeline(**pipeline_kwargs)
                 logger.info("Pipeline criado com parâmetro 'return_all_scores' (Transformers <4.35)")
             
+            if settings.ml.use_torch_compile:
+                self._compile_model()
+            
             self._model_loaded = True
             logger.info("Modelo carregado com sucesso")
             
-            # Teste rápido para verificar funcionamento
+            # Teste rápido para verificar funcionamento (e warm-up da compilação)
             self._test_model()
             
         except Exception as e:
@@ -124,6 +186,24 @@ class SentimentAnalyzer(metaclass=SentimentAnalyzerMeta):
                 details={"error": str(e), "device": str(self._device)}
             ) from e
     
+    def _compile_model(self) -> None:
+        """Compila o modelo do pipeline com torch.compile (mantém eager em caso de falha)."""
+        if not hasattr(torch, "compile"):
+            logger.warning("torch.compile indisponível nesta versão do PyTorch")
+            return
+        
+        try:
+            self._pipeline.model = torch.compile(
+                self._pipeline.model, mode="reduce-overhead", fullgraph=False
+            )
+            logger.info("Modelo compilado com torch.compile")
+        except Exception as e:
+            logger.warning(f"torch.compile falhou ({e}), usando modelo eager")
+    
+    def warm_up(self) -> None:
+        """Carrega o modelo antecipadamente, pagando o custo de compilação no startup."""
+        self._ensure_model_loaded()
+    
     def _get_device(self) -> int:
         """Determina dispositivo otimizado para inferência."""
         device_config = settings.ml.device.lower()
@@ -177,12 +257,12 @@ class SentimentAnalyzer(metaclass=SentimentAnalyzerMeta):
                 logger.debug("Texto muito curto para detecção, usando fallback 'en'")
                 return "en"
             
-            detected_lang = detect(detection_text)
-            logger.debug(f"Idioma detectado: {detected_lang}")
+            detected_lang = _detect_language_cached(detection_text)
+            logger.debug("Idioma detectado: %s", detected_lang)
             return detected_lang
             
         except LangDetectException as e:
-            logger.debug(f"Erro na detecção de idioma: {e}, usando fallback 'en'")
+            logger.debug("Erro na detecção de idioma: %s, usando fallback 'en'", e)
             return "en"
         except Exception as e:
             logger.warning(f"Erro inesperado na detecção de idioma: {e}, usando fallback 'en'")
@@ -190,26 +270,37 @@ class SentimentAnalyzer(metaclass=SentimentAnalyzerMeta):
     
     def _normalize_text(self, text: str) -> str:
         """Normaliza texto para análise."""
-        if not text or not text.strip():
+        # Limpar e normalizar (um único strip; textos já vindos do serviço
+        # chegam sem espaços nas bordas e strip devolve o próprio objeto)
+        normalized = text.strip() if text else ""
+        if not normalized:
             raise InvalidTextError(
                 reason="Texto vazio ou apenas espaços",
                 text_sample=text
             )
         
-        # Limpar e normalizar
-        normalized = text.strip()
+        text_length = len(normalized)
+        ml_config = settings.ml  # chamado por item no lote: um único acesso
+        
+        # Caminho rápido: texto já limpo e dentro dos limites
+        if ml_config.min_text_length <= text_length <= ml_config.max_text_length:
+            return normalized
         
         # Verificar limites
-        if len(normalized) < settings.ml.min_text_length:
+        if text_length < ml_config.min_text_length:
             raise InvalidTextError(
-                reason=f"Texto muito curto (mínimo: {settings.ml.min_text_length} caracteres)",
+                reason=f"Texto muito curto (mínimo: {ml_config.min_text_length} caracteres)",
                 text_sample=normalized,
-                details={"text_length": len(normalized)}
+                details={"text_length": text_length}
             )
         
-        if len(normalized) > settings.ml.max_text_length:
-            logger.debug(f"Texto truncado de {len(normalized)} para {settings.ml.max_text_length} caracteres")
-            normalized = normalized[:settings.ml.max_text_length]
+        max_length = ml_config.max_text_length
+        if text_length > max_length:
+            logger.debug(
+                "Texto truncado de %d para %d caracteres",
+                text_length, max_length
+            )
+            normalized = normalized[:max_length]
         
         return normalized
     
@@ -248,9 +339,13 @@ class SentimentAnalyzer(metaclass=SentimentAnalyzerMeta):
                 
         except Exception as e:
             logger.error(f"Erro ao normalizar formato: {e}")
+            details = {"raw_results_type": str(type(raw_results))}
+            # Amostra do resultado bruto só é montada quando DEBUG está ativo
+            if logger.isEnabledFor(logging.DEBUG):
+                details["raw_results_sample"] = str(raw_results)[:200]
             raise ModelInferenceError(
                 message=f"Erro ao processar formato do modelo: {str(e)}",
-                details={"raw_results_type": str(type(raw_results)), "raw_results_sample": str(raw_results)[:200]}
+                details=details
             ) from e
     
     def _normalize_sentiment_result(self, raw_results: Union[List[Dict], List[List[Dict]]]) -> Dict[str, Any]:
@@ -259,30 +354,21 @@ class SentimentAnalyzer(metaclass=SentimentAnalyzerMeta):
             # FIXED: Primeiro, normalizar o formato
             flattened_results = self._flatten_results(raw_results)
             
-            # Mapear labels do modelo para formato padrão
-            label_mapping = {
-                "POSITIVE": "positive",
-                "NEGATIVE": "negative", 
-                "NEUTRAL": "neutral",
-                "LABEL_0": "negative",  # cardiffnlp format
-                "LABEL_1": "neutral",   # cardiffnlp format
-                "LABEL_2": "positive",  # cardiffnlp format
-            }
-            
             # Processar scores
             normalized_scores = []
             for result in flattened_results:
                 if not isinstance(result, dict):
-                    logger.warning(f"Item inválido ignorado: {result}")
+                    logger.warning("Item inválido ignorado: %s", result)
                     continue
                     
                 label = result.get("label", "").upper()
                 score = float(result.get("score", 0.0))
                 
-                normalized_label = label_mapping.get(label, "neutral")
+                normalized_label = LABEL_MAPPING.get(label, "neutral")
                 normalized_scores.append({
                     "label": normalized_label,
-                    "score": score
+                    # Mesma precisão da confiança e do cache (SCORE_SCALE)
+                    "score": round(score, 4)
                 })
             
             if not normalized_scores:
@@ -301,9 +387,12 @@ class SentimentAnalyzer(metaclass=SentimentAnalyzerMeta):
             raise
         except Exception as e:
             logger.error(f"Erro ao normalizar resultado: {e}")
+            details = {}
+            if logger.isEnabledFor(logging.DEBUG):
+                details["raw_results"] = str(raw_results)[:200]
             raise ModelInferenceError(
                 message=f"Erro ao processar resultado do modelo: {str(e)}",
-                details={"raw_results": str(raw_results)[:200]}
+                details=details
             ) from e
     
     def analyze(self, text: str) -> Dict[str, Any]:
@@ -352,7 +441,10 @@ class SentimentAnalyzer(metaclass=SentimentAnalyzerMeta):
                 "all_scores": sentiment_result["all_scores"]
             }
             
-            logger.debug(f"Análise concluída: {final_result['sentiment']} ({final_result['confidence']})")
+            logger.debug(
+                "Análise concluída: %s (%s)",
+                final_result["sentiment"], final_result["confidence"]
+            )
             return final_result
             
         except (InvalidTextError, ModelInferenceError, ModelNotAvailableError):
@@ -391,7 +483,7 @@ class SentimentAnalyzer(metaclass=SentimentAnalyzerMeta):
         results = []
         batch_size = settings.ml.batch_size
         
-        logger.debug(f"Processando {len(texts)} textos com batch nativo (size={batch_size})")
+        logger.debug("Processando %d textos com batch nativo (size=%d)", len(texts), batch_size)
         
         try:
             # Pré-processar todos os textos
@@ -446,7 +538,7 @@ class SentimentAnalyzer(metaclass=SentimentAnalyzerMeta):
                 # Todos os textos eram inválidos
                 results = [self._create_error_result("Texto inválido") for _ in texts]
             
-            logger.debug(f"Batch processing concluído: {len(results)} resultados")
+            logger.debug("Batch processing concluído: %d resultados", len(results))
             return results
             
         except Exception as e:
@@ -483,6 +575,17 @@ class SentimentAnalyzer(metaclass=SentimentAnalyzerMeta):
         }
 
 
+# Pool dedicado à inferência: o pipeline já é serializado por _lock, e isolá-lo
+# mantém o pool padrão (asyncio.to_thread) livre para banco e cache
+_inference_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ml-inference")
+
+
+async def run_inference(func: Callable[..., Any], *args: Any) -> Any:
+    """Executa uma chamada do analisador no pool de inferência."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_inference_executor, func, *args)
+
+
 @lru_cache()
 def get_sentiment_analyzer() -> SentimentAnalyzer:
     """Factory singleton para obter instância do analisador."""
@@ -0,0 +1,144 @@
+"""
+Micro-batching dinâmico de inferências.
+
+Agrupa requisições individuais que chegam dentro de uma janela curta em uma
+única chamada de `analyze_batch`, amortizando o custo do forward pass.
+"""
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config import get_settings
+from app.sentiment.analyzer import run_inference
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class DynamicBatcher:
+    """Fila assíncrona que agrupa textos em lotes por tamanho ou latência."""
+    
+    def __init__(self, max_batch_size: int, max_latency_ms: int):
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+    
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+    
+    def start(self) -> None:
+        """Inicia o loop de processamento no event loop atual."""
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._batch_loop())
+        logger.info(
+            f"DynamicBatcher iniciado (max_batch_size={self.max_batch_size}, "
+            f"max_latency_ms={self.max_latency * 1000:.0f})"
+        )
+    
+    async def stop(self) -> None:
+        """Interrompe o loop e falha requisições pendentes."""
+        if not self._task:
+            return
+        
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        
+        while not self._queue.empty():
+            _, _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("DynamicBatcher encerrado"))
+        
+        self._task = None
+        logger.info("DynamicBatcher encerrado")
+    
+    async def submit(self, analyzer: Any, text: str) -> Dict[str, Any]:
+        """
+        Enfileira texto e aguarda o resultado do lote.
+        
+        Args:
+            analyzer: Analisador que executará o lote (deve ter analyze_batch)
+            text: Texto normalizado
+        
+        Returns:
+            Resultado individual de analyze_batch
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((analyzer, text, future))
+        return await future
+    
+    async def _collect(self) -> List[Tuple[Any, str, asyncio.Future]]:
+        """Aguarda o primeiro item e agrega os que chegarem dentro da janela."""
+        items = [await self._queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.max_latency
+        
+        while len(items) < self.max_batch_size:
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                break
+            try:
+                items.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        
+        return items
+    
+    async def _batch_loop(self) -> None:
+        while True:
+            items = await self._collect()
+            
+            # Agrupar por analisador (na prática, sempre o singleton)
+            groups: Dict[int, List[Tuple[Any, str, asyncio.Future]]] = {}
+            for item in items:
+                groups.setdefault(id(item[0]), []).append(item)
+            
+            for group in groups.values():
+                analyzer = group[0][0]
+                texts = [text for _, text, _ in group]
+                
+                try:
+                    results = await run_inference(analyzer.analyze_batch, texts)
+                except Exception as e:
+                    for _, _, future in group:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                
+                logger.debug("Lote dinâmico processado: %d textos", len(texts))
+                for (_, _, future), result in zip(group, results):
+                    if not future.done():
+                        future.set_result(result)
+
+
+_batcher: Optional[DynamicBatcher] = None
+
+
+def start_dynamic_batcher() -> DynamicBatcher:
+    """Cria (se necessário) e inicia o batcher no event loop atual."""
+    global _batcher
+    if _batcher is None:
+        _batcher = DynamicBatcher(
+            max_batch_size=settings.ml.batch_size,
+            max_latency_ms=settings.ml.batch_max_latency_ms
+        )
+    _batcher.start()
+    return _batcher
+
+
+async def stop_dynamic_batcher() -> None:
+    """Encerra o batcher, se ativo."""
+    if _batcher is not None:
+        await _batcher.stop()
+
+
+def get_dynamic_batcher() -> Optional[DynamicBatcher]:
+    """Retorna o batcher ativo ou None (análise direta, sem agrupamento)."""
+    if _batcher is not None and _batcher.running:
+        return _batcher
+    return None
@@ -0,0 +1,303 @@
+"""
+Atualização idempotente do schema de sentiment_analyses, sentiment_feedback
+e da view diária.
+
+create_all não altera tabelas já existentes: bancos criados por versões
+anteriores são ajustados aqui, chamado por init_database após create_all.
+"""
+import logging
+from typing import Any, Dict, Optional
+
+from sqlalchemy import (
+    Engine, MetaData, Table, and_, bindparam, inspect, or_, select, text, update
+)
+from sqlalchemy.schema import AddConstraint, CreateColumn, CreateTable
+from sqlalchemy.types import Integer
+
+from app.sentiment.models import (
+    DAILY_COUNTS_VIEW, DAILY_COUNTS_VIEW_DDL, Sentiment, SentimentAnalysis,
+    SentimentFeedback, compute_text_hash, scores_to_vector
+)
+
+logger = logging.getLogger(__name__)
+
+TABLE_NAME = SentimentAnalysis.__tablename__
+FEEDBACK_TABLE_NAME = SentimentFeedback.__tablename__
+
+# Colunas de sentiment_feedback copiadas da análise (ver create_for_analysis)
+FEEDBACK_COPIED_COLUMNS = {"model_confidence": "confidence", "model_language": "language"}
+
+# Índices antigos de sentiment_feedback, substituídos por idx_feedback_cover
+LEGACY_FEEDBACK_INDEXES = ("idx_analysis_id", "idx_is_correct")
+
+# Rótulos gravados como string na coluna sentiment por versões anteriores
+LEGACY_SENTIMENT_LABELS = tuple(member.name.lower() for member in Sentiment)
+
+# Linhas por transação ao preencher text_hash/all_scores_arr de linhas antigas
+BACKFILL_BATCH_SIZE = 1000
+
+
+def _legacy_sentiment_case(fallback: str) -> str:
+    """CASE SQL que converte o rótulo legado no código inteiro do sentimento."""
+    whens = " ".join(
+        f"WHEN '{member.name.lower()}' THEN {member.value}" for member in Sentiment
+    )
+    return f"CASE sentiment {whens} ELSE {fallback} END"
+
+
+def upgrade_sentiment_schema(engine: Engine) -> None:
+    """Atualiza a tabela de análises para o schema atual (idempotente)."""
+    inspector = inspect(engine)
+    if not inspector.has_table(TABLE_NAME):
+        return
+    
+    columns = {column["name"]: column for column in inspector.get_columns(TABLE_NAME)}
+    _migrate_legacy_sentiments(engine, columns["sentiment"])
+    
+    # SQLite não adiciona coluna gerada STORED via ALTER TABLE: recria a tabela
+    if engine.dialect.name == "sqlite" and "text_length" not in columns:
+        _rebuild_sqlite_table(
+            engine, SentimentAnalysis.__table__, columns,
+            {"sentiment": "CAST(sentiment AS INTEGER)"}
+        )
+    else:
+        _add_missing_columns(engine, columns)
+    
+    table = SentimentAnalysis.__table__
+    with engine.begin() as connection:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+    
+    _backfill_derived_columns(engine)
+    _upgrade_feedback_table(engine)
+    _upgrade_daily_counts_view(engine)
+
+
+def _migrate_legacy_sentiments(engine: Engine, sentiment_column: Dict[str, Any]) -> None:
+    """Converte sentimentos gravados como rótulo (string) para o código SmallInteger."""
+    with engine.begin() as connection:
+        if engine.dialect.name == "postgresql":
+            if isinstance(sentiment_column["type"], Integer):
+                return
+            
+            logger.info("Convertendo coluna sentiment para SMALLINT")
+            connection.execute(text(
+                f"ALTER TABLE {TABLE_NAME} ALTER COLUMN sentiment TYPE SMALLINT "
+                f"USING {_legacy_sentiment_case('CAST(sentiment AS SMALLINT)')}"
+            ))
+            return
+        
+        # SQLite não altera tipo de coluna: converte os valores no lugar
+        labels = ", ".join(f"'{label}'" for label in LEGACY_SENTIMENT_LABELS)
+        result = connection.execute(text(
+            f"UPDATE {TABLE_NAME} SET sentiment = {_legacy_sentiment_case('sentiment')} "
+            f"WHERE sentiment IN ({labels})"
+        ))
+        if result.rowcount:
+            logger.info(f"{result.rowcount} sentimentos legados convertidos para código")
+
+
+def _add_missing_columns(engine: Engine, columns: Dict[str, Any]) -> None:
+    """Adiciona via ALTER TABLE as colunas do modelo ausentes na tabela."""
+    missing = [
+        column for column in SentimentAnalysis.__table__.columns
+        if column.name not in columns
+    ]
+    if not missing:
+        return
+    
+    with engine.begin() as connection:
+        for column in missing:
+            logger.info(f"Adicionando coluna {column.name} em {TABLE_NAME}")
+            column_ddl = CreateColumn(column).compile(dialect=engine.dialect)
+            connection.execute(text(f"ALTER TABLE {TABLE_NAME} ADD COLUMN {column_ddl}"))
+
+
+def _rebuild_sqlite_table(
+    engine: Engine,
+    table: Table,
+    columns: Dict[str, Any],
+    sources: Optional[Dict[str, str]] = None
+) -> None:
+    """
+    Recria a tabela no schema atual copiando as linhas existentes (SQLite).
+    
+    Segue o procedimento documentado do SQLite para alterações de schema:
+    cria a tabela nova, copia, remove a antiga e renomeia, numa transação
+    com foreign keys desligadas. `sources` mapeia colunas para a expressão
+    SQL usada na cópia (conversões ou valores de colunas novas).
+    """
+    sources = sources or {}
+    staging_name = f"{table.name}_upgrade"
+    
+    # Tabelas referenciadas por FK precisam estar no mesmo MetaData do DDL
+    metadata = MetaData()
+    for foreign_key in table.foreign_keys:
+        foreign_key.column.table.to_metadata(metadata)
+    staging = table.to_metadata(metadata, name=staging_name)
+    
+    copied = [
+        column.name for column in table.columns
+        if column.computed is None and (column.name in columns or column.name in sources)
+    ]
+    selected = [sources.get(name, name) for name in copied]
+    
+    logger.info(f"Recriando {table.name} no schema atual")
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        foreign_keys = cursor.execute("PRAGMA foreign_keys").fetchone()[0]
+        cursor.execute("PRAGMA foreign_keys=OFF")
+        try:
+            cursor.execute("BEGIN")
+            cursor.execute(str(CreateTable(staging).compile(dialect=engine.dialect)))
+            cursor.execute(
+                f"INSERT INTO {staging_name} ({', '.join(copied)}) "
+                f"SELECT {', '.join(selected)} FROM {table.name}"
+            )
+            cursor.execute(f"DROP TABLE {table.name}")
+            cursor.execute(f"ALTER TABLE {staging_name} RENAME TO {table.name}")
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+        finally:
+            cursor.execute(f"PRAGMA foreign_keys={foreign_keys}")
+            cursor.close()
+    finally:
+        connection.close()
+
+
+def _backfill_derived_columns(engine: Engine) -> None:
+    """Preenche text_hash e all_scores_arr de linhas gravadas antes das colunas."""
+    table = SentimentAnalysis.__table__
+    pending = or_(
+        table.c.text_hash.is_(None),
+        and_(table.c.all_scores_arr.is_(None), table.c.all_scores.is_not(None)),
+    )
+    update_stmt = (
+        update(table)
+        .where(table.c.id == bindparam("row_id"))
+        .values(text_hash=bindparam("row_text_hash"), all_scores_arr=bindparam("row_scores_arr"))
+    )
+    
+    # Keyset por id: linhas sem scores continuam "pendentes" e não repetem
+    last_id = ""
+    backfilled = 0
+    while True:
+        with engine.begin() as connection:
+            rows = connection.execute(
+                select(table.c.id, table.c.text, table.c.all_scores)
+                .where(pending, table.c.id > last_id)
+                .order_by(table.c.id)
+                .limit(BACKFILL_BATCH_SIZE)
+            ).all()
+            if not rows:
+                break
+            
+            connection.execute(update_stmt, [
+                {
+                    "row_id": row.id,
+                    "row_text_hash": compute_text_hash(row.text),
+                    "row_scores_arr": scores_to_vector(row.all_scores),
+                }
+                for row in rows
+            ])
+        
+        last_id = rows[-1].id
+        backfilled += len(rows)
+    
+    if backfilled:
+        logger.info(f"{backfilled} análises antigas com text_hash/all_scores_arr preenchidos")
+
+
+def _upgrade_feedback_table(engine: Engine) -> None:
+    """
+    Leva sentiment_feedback ao schema atual.
+    
+    Adiciona e preenche as colunas copiadas da análise, a FK para
+    sentiment_analyses (ON DELETE CASCADE) e troca os índices antigos pelo
+    índice de cobertura.
+    """
+    inspector = inspect(engine)
+    if not inspector.has_table(FEEDBACK_TABLE_NAME):
+        return
+    
+    columns = {column["name"]: column for column in inspector.get_columns(FEEDBACK_TABLE_NAME)}
+    missing = [name for name in FEEDBACK_COPIED_COLUMNS if name not in columns]
+    has_foreign_key = any(
+        foreign_key["referred_table"] == TABLE_NAME
+        for foreign_key in inspector.get_foreign_keys(FEEDBACK_TABLE_NAME)
+    )
+    
+    # Feedback de análise já removida não tem de onde copiar os valores e
+    # violaria a FK (o cascade o teria removido junto com a análise)
+    if missing or not has_foreign_key:
+        with engine.begin() as connection:
+            result = connection.execute(text(
+                f"DELETE FROM {FEEDBACK_TABLE_NAME} WHERE NOT EXISTS ("
+                f"SELECT 1 FROM {TABLE_NAME} WHERE {TABLE_NAME}.id = {FEEDBACK_TABLE_NAME}.analysis_id)"
+            ))
+            if result.rowcount:
+                logger.info(f"{result.rowcount} feedbacks sem análise removidos")
+    
+    sources = {
+        name: (
+            f"(SELECT {source} FROM {TABLE_NAME} "
+            f"WHERE {TABLE_NAME}.id = {FEEDBACK_TABLE_NAME}.analysis_id)"
+        )
+        for name, source in FEEDBACK_COPIED_COLUMNS.items()
+        if name in missing
+    }
+    table = SentimentFeedback.__table__
+    
+    # SQLite não adiciona FK nem coluna NOT NULL sem default: recria a tabela
+    if engine.dialect.name == "sqlite":
+        if missing or not has_foreign_key:
+            _rebuild_sqlite_table(engine, table, columns, sources)
+    else:
+        # Adiciona anulável, preenche a partir da análise e só então aplica NOT NULL
+        with engine.begin() as connection:
+            for name, source in sources.items():
+                logger.info(f"Adicionando coluna {name} em {FEEDBACK_TABLE_NAME}")
+                column_type = table.c[name].type.compile(dialect=engine.dialect)
+                connection.execute(text(
+                    f"ALTER TABLE {FEEDBACK_TABLE_NAME} ADD COLUMN {name} {column_type}"
+                ))
+                connection.execute(text(f"UPDATE {FEEDBACK_TABLE_NAME} SET {name} = {source}"))
+                connection.execute(text(
+                    f"ALTER TABLE {FEEDBACK_TABLE_NAME} ALTER COLUMN {name} SET NOT NULL"
+                ))
+            
+            if not has_foreign_key:
+                logger.info(f"Adicionando FK de {FEEDBACK_TABLE_NAME} para {TABLE_NAME}")
+                for constraint in table.foreign_key_constraints:
+                    connection.execute(AddConstraint(constraint))
+    
+    indexes = {index["name"] for index in inspect(engine).get_indexes(FEEDBACK_TABLE_NAME)}
+    with engine.begin() as connection:
+        for name in LEGACY_FEEDBACK_INDEXES:
+            if name in indexes:
+                logger.info(f"Removendo índice {name} de {FEEDBACK_TABLE_NAME}")
+                connection.execute(text(f"DROP INDEX {name}"))
+        
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+
+def _upgrade_daily_counts_view(engine: Engine) -> None:
+    """Recria a materialized view diária criada sem a coluna language (PostgreSQL)."""
+    if engine.dialect.name != "postgresql":
+        return
+    
+    inspector = inspect(engine)
+    if DAILY_COUNTS_VIEW in inspector.get_materialized_view_names():
+        columns = {column["name"] for column in inspector.get_columns(DAILY_COUNTS_VIEW)}
+        if "language" in columns:
+            return
+    
+    logger.info(f"Recriando {DAILY_COUNTS_VIEW} com a coluna language")
+    with engine.begin() as connection:
+        connection.execute(text(f"DROP MATERIALIZED VIEW IF EXISTS {DAILY_COUNTS_VIEW}"))
+        for ddl in DAILY_COUNTS_VIEW_DDL:
+            connection.execute(ddl)
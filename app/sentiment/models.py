@@ -1,17 +1,156 @@
+import hashlib
 import logging
+import os
+import sys
+import time
 import uuid
 from datetime import datetime
+from enum import IntEnum
+from functools import cached_property
 from typing import Any, Dict, List, Optional
 
-from sqlalchemy import JSON, Float, Index, String, Text, text
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import (
+    DDL, JSON, Computed, DateTime, Float, ForeignKey, Index, Integer, SmallInteger,
+    String, Text, case, column, event, table, text
+)
+from sqlalchemy.types import TypeDecorator
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Mapped, mapped_column, undefer
 from sqlalchemy.sql import func
 
 from app.core.database import Base
+from app.sentiment.types import AnalysisScoresSoA
 
 logger = logging.getLogger(__name__)
 
 
+def generate_uuid7() -> str:
+    """
+    Gera UUIDv7 (RFC 9562): 48 bits de timestamp em ms seguidos de bits aleatórios.
+    
+    IDs ordenados no tempo fazem inserções caírem no fim da B-tree da PK.
+    """
+    timestamp_ms = time.time_ns() // 1_000_000
+    rand = int.from_bytes(os.urandom(10), "big")
+    
+    value = (timestamp_ms & 0xFFFF_FFFF_FFFF) << 80
+    value |= 0x7 << 76                              # versão 7
+    value |= ((rand >> 62) & 0xFFF) << 64           # rand_a (12 bits)
+    value |= 0b10 << 62                             # variante RFC
+    value |= rand & 0x3FFF_FFFF_FFFF_FFFF           # rand_b (62 bits)
+    
+    return str(uuid.UUID(int=value))
+
+
+def compute_text_hash(text: str) -> str:
+    """Gera hash determinístico do texto para deduplicação de análises."""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class Sentiment(IntEnum):
+    """Códigos inteiros dos sentimentos armazenados no banco."""
+    
+    NEGATIVE = 0
+    NEUTRAL = 1
+    POSITIVE = 2
+
+
+class SentimentType(TypeDecorator):
+    """Armazena o sentimento como SmallInteger, expondo o rótulo em string."""
+    
+    impl = SmallInteger
+    cache_ok = True
+    
+    def process_bind_param(self, value, dialect):
+        if value is None or isinstance(value, int):
+            return value
+        try:
+            return Sentiment[value.upper()].value
+        except KeyError:
+            raise ValueError(f"Sentimento inválido: {value}") from None
+    
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        try:
+            return _SENTIMENT_LABEL_BY_CODE[value]
+        except KeyError:
+            pass
+        
+        # Linhas legadas: rótulo em string ou código lido de coluna TEXT (SQLite)
+        label = _LEGACY_SENTIMENT_LABELS.get(value)
+        if label is None:
+            raise ValueError(f"Código de sentimento inválido: {value}")
+        return label
+
+
+# Rótulos internados por código: todas as linhas carregadas compartilham o
+# mesmo objeto str em vez de criar um novo por linha
+_SENTIMENT_LABEL_BY_CODE: Dict[int, str] = {
+    member.value: sys.intern(member.name.lower()) for member in Sentiment
+}
+
+_LEGACY_SENTIMENT_LABELS: Dict[str, str] = {
+    **{label: label for label in _SENTIMENT_LABEL_BY_CODE.values()},
+    **{str(code): label for code, label in _SENTIMENT_LABEL_BY_CODE.items()},
+}
+
+
+class InternedString(TypeDecorator):
+    """String cujos valores lidos do banco são internados (baixa cardinalidade)."""
+    
+    impl = String
+    cache_ok = True
+    
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return sys.intern(value)
+
+
+def sentiment_label(column_expr):
+    """Expressão SQL que converte o código do sentimento no rótulo em string."""
+    return case(
+        {member.value: member.name.lower() for member in Sentiment},
+        value=column_expr
+    )
+
+
+# Ordem canônica dos rótulos no vetor de scores (all_scores_arr)
+SCORE_LABELS = tuple(member.name.lower() for member in Sentiment)
+
+
+def scores_to_vector(all_scores: Optional[List[Dict[str, Any]]]) -> Optional[List[float]]:
+    """Converte lista de scores {label, score} em vetor na ordem de SCORE_LABELS."""
+    if not all_scores:
+        return None
+    
+    by_label = {score.get("label"): score.get("score", 0.0) for score in all_scores}
+    return [float(by_label.get(label, 0.0)) for label in SCORE_LABELS]
+
+
+def scores_to_soa(all_scores: Optional[List[Dict[str, Any]]]) -> AnalysisScoresSoA:
+    """Converte lista de scores {label, score} em colunas paralelas (labels, scores)."""
+    all_scores = all_scores or []
+    return {
+        "labels": [score.get("label") for score in all_scores],
+        "scores": [score.get("score", 0.0) for score in all_scores],
+    }
+
+
+def scores_from_soa(scores_soa: AnalysisScoresSoA) -> List[Dict[str, Any]]:
+    """Reconstrói a lista de scores {label, score} a partir das colunas paralelas."""
+    return [
+        {"label": label, "score": score}
+        for label, score in zip(scores_soa["labels"], scores_soa["scores"])
+    ]
+
+
+def _default_text_hash(context) -> str:
+    """Default de coluna: deriva text_hash do texto inserido."""
+    return compute_text_hash(context.get_current_parameters()["text"])
+
+
 class SentimentAnalysis(Base):
     """Modelo para armazenar análises de sentimento."""
     
@@ -21,20 +160,36 @@ class SentimentAnalysis(Base):
     id: Mapped[str] = mapped_column(
         String(36), 
         primary_key=True, 
-        default=lambda: str(uuid.uuid4()),
+        default=generate_uuid7,
         comment="Identificador único da análise"
     )
     
+    # Colunas pesadas carregadas sob demanda (ver load_full_options)
     text: Mapped[str] = mapped_column(
         Text,
         nullable=False,
+        deferred=True,
         comment="Texto original analisado"
     )
     
+    # Coluna gerada: listas obtêm o tamanho sem transferir o texto
+    text_length: Mapped[int] = mapped_column(
+        Integer,
+        Computed("length(text)", persisted=True),
+        comment="Tamanho do texto em caracteres"
+    )
+    
+    text_hash: Mapped[Optional[str]] = mapped_column(
+        String(64),
+        nullable=True,
+        default=_default_text_hash,
+        comment="Hash BLAKE2b do texto para deduplicação"
+    )
+    
     sentiment: Mapped[str] = mapped_column(
-        String(20),
+        SentimentType(),
         nullable=False,
-        comment="Sentimento identificado: positive, negative, neutral"
+        comment="Sentimento identificado (0=negative, 1=neutral, 2=positive)"
     )
     
     confidence: Mapped[float] = mapped_column(
@@ -44,7 +199,7 @@ class SentimentAnalysis(Base):
     )
     
     language: Mapped[str] = mapped_column(
-        String(5),
+        InternedString(5),
         nullable=False,
         comment="Código ISO do idioma detectado"
     )
@@ -52,9 +207,17 @@ class SentimentAnalysis(Base):
     all_scores: Mapped[Optional[List[Dict[str, Any]]]] = mapped_column(
         JSON,
         nullable=True,
+        deferred=True,
         comment="Scores detalhados de todos os sentimentos"
     )
     
+    # Vetor compacto (ordem de SCORE_LABELS): array nativo no PostgreSQL
+    all_scores_arr: Mapped[Optional[List[float]]] = mapped_column(
+        JSON().with_variant(ARRAY(Float, dimensions=1), "postgresql"),
+        nullable=True,
+        comment="Scores em vetor de tamanho fixo para analytics"
+    )
+    
     # Metadados temporais
     created_at: Mapped[datetime] = mapped_column(
         nullable=False,
@@ -70,21 +233,21 @@ class SentimentAnalysis(Base):
     
     # Configuração de índices para otimização de consultas
     __table_args__ = (
-        # Índice composto para consultas por sentimento e data
-        Index("idx_sentiment_created", "sentiment", "created_at"),
-        
         # Índice para consultas por idioma
         Index("idx_language", "language"),
         
         # Índice para consultas por confiança (analytics)
         Index("idx_confidence", "confidence"),
         
-        # Índice composto para filtros complexos
+        # Índice composto para filtros complexos (cobre também sentimento + data)
         Index("idx_sentiment_lang_date", "sentiment", "language", "created_at"),
         
-        # Índice para busca por período
+        # Índice para busca por período (base de todas as agregações analíticas)
         Index("idx_created_at", "created_at"),
         
+        # Índice para deduplicação por hash do texto
+        Index("idx_text_hash", "text_hash"),
+        
         # Configurações de tabela
         {
             "comment": "Armazena resultados de análises de sentimento",
@@ -133,7 +296,7 @@ class SentimentAnalysis(Base):
                 if self.text and len(self.text) > 100 
                 else self.text
             )
-            result["text_length"] = len(self.text) if self.text else 0
+            result["text_length"] = self.get_text_length()
         
         return result
     
@@ -150,9 +313,25 @@ class SentimentAnalysis(Base):
             "confidence": self.confidence,
             "language": self.language,
             "created_at": self.created_at.isoformat() if self.created_at else None,
-            "text_length": len(self.text) if self.text else 0,
+            "text_length": self.get_text_length(),
         }
     
+    def get_text_length(self) -> int:
+        """Tamanho do texto, via coluna gerada quando já persistido."""
+        if self.text_length is not None:
+            return self.text_length
+        return len(self.text) if self.text else 0
+    
+    @classmethod
+    def load_full_options(cls) -> tuple:
+        """
+        Opções de carregamento para consultas que precisam das colunas adiadas.
+        
+        Returns:
+            Tupla de opções para `query.options(...)` incluindo text e all_scores
+        """
+        return (undefer(cls.text), undefer(cls.all_scores))
+    
     @classmethod
     def create_from_analysis(
         cls,
@@ -177,10 +356,12 @@ class SentimentAnalysis(Base):
         """
         return cls(
             text=text,
+            text_hash=compute_text_hash(text),
             sentiment=sentiment,
             confidence=confidence,
             language=language,
-            all_scores=all_scores or []
+            all_scores=all_scores or [],
+            all_scores_arr=scores_to_vector(all_scores)
         )
     
     @property
@@ -193,13 +374,19 @@ class SentimentAnalysis(Base):
         """Verifica se há tendência neutra (confidence < 0.6)."""
         return self.confidence < 0.6
     
+    @cached_property
+    def _sorted_scores(self) -> List[Dict[str, Any]]:
+        """Scores ordenados por valor decrescente (calculado uma única vez)."""
+        return sorted(
+            self.all_scores or [],
+            key=lambda x: x.get("score", 0.0),
+            reverse=True
+        )
+    
     @property
     def dominant_score(self) -> Optional[Dict[str, Any]]:
         """Retorna o score dominante da análise."""
-        if not self.all_scores:
-            return None
-        
-        return max(self.all_scores, key=lambda x: x.get("score", 0.0))
+        return self._sorted_scores[0] if self._sorted_scores else None
     
     def get_secondary_sentiments(self) -> List[Dict[str, Any]]:
         """
@@ -208,17 +395,7 @@ class SentimentAnalysis(Base):
         Returns:
             Lista de sentimentos secundários (excluindo o dominante)
         """
-        if not self.all_scores or len(self.all_scores) <= 1:
-            return []
-        
-        # Ordenar por score decrescente e remover o primeiro (dominante)
-        sorted_scores = sorted(
-            self.all_scores, 
-            key=lambda x: x.get("score", 0.0), 
-            reverse=True
-        )
-        
-        return sorted_scores[1:]
+        return self._sorted_scores[1:]
     
     def is_mixed_sentiment(self, threshold: float = 0.3) -> bool:
         """
@@ -230,15 +407,16 @@ class SentimentAnalysis(Base):
         Returns:
             True se há sentimento misto
         """
-        if not self.all_scores or len(self.all_scores) < 2:
-            return False
+        significant = 0
+        for score in self._sorted_scores:
+            # Ordenados: o primeiro abaixo do limite encerra a busca
+            if score.get("score", 0.0) < threshold:
+                return False
+            significant += 1
+            if significant >= 2:
+                return True
         
-        significant_scores = [
-            score for score in self.all_scores 
-            if score.get("score", 0.0) >= threshold
-        ]
-        
-        return len(significant_scores) >= 2
+        return False
     
     def get_analysis_quality(self) -> str:
         """
@@ -342,12 +520,13 @@ class SentimentFeedback(Base):
     id: Mapped[str] = mapped_column(
         String(36),
         primary_key=True,
-        default=lambda: str(uuid.uuid4()),
+        default=generate_uuid7,
         comment="Identificador único do feedback"
     )
     
     analysis_id: Mapped[str] = mapped_column(
         String(36),
+        ForeignKey("sentiment_analyses.id", ondelete="CASCADE"),
         nullable=False,
         comment="ID da análise original"
     )
@@ -364,6 +543,19 @@ class SentimentFeedback(Base):
         comment="Sentimento original do modelo"
     )
     
+    # Copiados da análise (imutável) para relatórios de acurácia sem JOIN
+    model_confidence: Mapped[float] = mapped_column(
+        Float(),
+        nullable=False,
+        comment="Confiança original do modelo"
+    )
+    
+    model_language: Mapped[str] = mapped_column(
+        String(5),
+        nullable=False,
+        comment="Idioma detectado na análise original"
+    )
+    
     is_correct: Mapped[bool] = mapped_column(
         nullable=False,
         comment="Se o modelo acertou segundo o usuário"
@@ -383,8 +575,11 @@ class SentimentFeedback(Base):
     
     # Índices para analytics de feedback
     __table_args__ = (
-        Index("idx_analysis_id", "analysis_id"),
-        Index("idx_is_correct", "is_correct"),
+        # Índice de cobertura para acurácia ao longo do tempo por análise
+        Index(
+            "idx_feedback_cover", "analysis_id", "is_correct", "created_at",
+            postgresql_include=["model_sentiment", "user_sentiment"]
+        ),
         Index("idx_feedback_created", "created_at"),
         {
             "comment": "Armazena feedback de usuários sobre análises",
@@ -398,6 +593,71 @@ class SentimentFeedback(Base):
             f"correct={self.is_correct}"
             f")>"
         )
+    
+    @classmethod
+    def create_for_analysis(
+        cls,
+        analysis: SentimentAnalysis,
+        user_sentiment: str,
+        feedback_notes: Optional[str] = None
+    ) -> "SentimentFeedback":
+        """
+        Factory method para criar feedback a partir da análise avaliada.
+        
+        Args:
+            analysis: Análise original (entidade ou snapshot de get_by_id)
+            user_sentiment: Sentimento indicado pelo usuário
+            feedback_notes: Notas adicionais opcionais
+            
+        Returns:
+            Nova instância de SentimentFeedback com dados da análise copiados
+        """
+        return cls(
+            analysis_id=analysis.id,
+            user_sentiment=user_sentiment,
+            model_sentiment=analysis.sentiment,
+            model_confidence=analysis.confidence,
+            model_language=analysis.language,
+            is_correct=user_sentiment == analysis.sentiment,
+            feedback_notes=feedback_notes
+        )
+
+
+logger.info("Modelos de sentimento carregados")
+
+
+# Materialized view (PostgreSQL) com contagens diárias por sentimento e
+# idioma, usada pelas agregações analíticas no lugar da tabela base
+DAILY_COUNTS_VIEW = "mv_sentiment_daily_counts"
+
+sentiment_daily_counts = table(
+    DAILY_COUNTS_VIEW,
+    column("day", DateTime),
+    column("sentiment", SentimentType()),
+    column("language", String),
+    column("cnt", Integer),
+    column("sum_conf", Float),
+)
+
+# Criação da view e do índice único exigido pelo REFRESH CONCURRENTLY
+DAILY_COUNTS_VIEW_DDL = (
+    DDL(
+        f"CREATE MATERIALIZED VIEW IF NOT EXISTS {DAILY_COUNTS_VIEW} AS "
+        "SELECT date_trunc('day', created_at) AS day, sentiment, language, "
+        "count(*) AS cnt, sum(confidence) AS sum_conf "
+        "FROM sentiment_analyses GROUP BY 1, 2, 3"
+    ),
+    DDL(
+        f"CREATE UNIQUE INDEX IF NOT EXISTS uq_{DAILY_COUNTS_VIEW}_day_sentiment_language "
+        f"ON {DAILY_COUNTS_VIEW} (day, sentiment, language)"
+    ),
+)
 
+for ddl in DAILY_COUNTS_VIEW_DDL:
+    event.listen(Base.metadata, "after_create", ddl.execute_if(dialect="postgresql"))
 
-logger.info("Modelos de sentimento carregados")
\ No newline at end of file
+event.listen(
+    Base.metadata,
+    "before_drop",
+    DDL(f"DROP MATERIALIZED VIEW IF EXISTS {DAILY_COUNTS_VIEW}").execute_if(dialect="postgresql")
+)
\ No newline at end of file
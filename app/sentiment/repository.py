@@ -4,29 +4,291 @@ Repository para operações de banco de dados do módulo de sentimentos.
 Separa a lógica de persistência dos serviços de negócio.
 """
 import logging
-from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional, Tuple
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
-from sqlalchemy import and_, desc, func
+import numpy as np
+from sqlalchemy import (
+    Integer, Text, and_, bindparam, case, cast, desc, func, insert, or_, select, text
+)
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 
 from app.core.exceptions import DatabaseError, RecordNotFoundError
-from app.sentiment.models import SentimentAnalysis
+from app.sentiment.models import (
+    DAILY_COUNTS_VIEW, SCORE_LABELS, SentimentAnalysis, SentimentFeedback,
+    compute_text_hash, generate_uuid7, scores_to_vector, sentiment_daily_counts,
+    sentiment_label
+)
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass(frozen=True)
+class AnalysisSnapshot:
+    """Cópia imutável e desacoplada da sessão de uma SentimentAnalysis."""
+    
+    id: str
+    text: str
+    text_length: Optional[int]
+    text_hash: Optional[str]
+    sentiment: str
+    confidence: float
+    language: str
+    all_scores: Tuple[Dict[str, Any], ...]
+    all_scores_arr: Optional[Tuple[float, ...]]
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+    
+    # Mesmas conversões do modelo (apenas leem atributos)
+    to_dict = SentimentAnalysis.to_dict
+    to_summary = SentimentAnalysis.to_summary
+    get_text_length = SentimentAnalysis.get_text_length
+    
+    @classmethod
+    def from_row(cls, row: Any) -> "AnalysisSnapshot":
+        values = dict(row._mapping)
+        values["all_scores"] = tuple(values["all_scores"] or ())
+        if values["all_scores_arr"] is not None:
+            values["all_scores_arr"] = tuple(values["all_scores_arr"])
+        return cls(**values)
+
+
+# Cache LRU por processo de get_by_id (análises não mudam após criadas)
+_SNAPSHOT_CACHE_SIZE = 10000
+_snapshot_cache: "OrderedDict[str, AnalysisSnapshot]" = OrderedDict()
+_snapshot_lock = threading.Lock()
+
+
+def invalidate_snapshot(id: str) -> None:
+    """Remove análise do cache de get_by_id (chamar ao remover/alterar)."""
+    with _snapshot_lock:
+        _snapshot_cache.pop(id, None)
+
+
+# INSERT Core pré-construído: sem mapper/identity map no caminho de ingestão
+_INSERT_STMT = insert(SentimentAnalysis.__table__)
+
+# Statements pré-construídos com bindparams: o cache de SQL compilado do
+# SQLAlchemy reutiliza a mesma compilação em todas as chamadas
+# (get_by_id lê todas as colunas via Core: snapshots sem instância ORM)
+_GET_SNAPSHOT_STMT = select(SentimentAnalysis.__table__).where(
+    SentimentAnalysis.id == bindparam("id")
+)
+
+_FIND_BY_TEXT_HASH_STMT = select(SentimentAnalysis).where(
+    SentimentAnalysis.text_hash == bindparam("text_hash")
+).order_by(desc(SentimentAnalysis.created_at)).limit(1)
+
+_GET_RECENT_STMT = select(SentimentAnalysis).order_by(
+    desc(SentimentAnalysis.created_at)
+).limit(bindparam("limit"))
+
+_COUNT_BY_SENTIMENT_STMT = select(
+    SentimentAnalysis.sentiment,
+    func.count(SentimentAnalysis.id).label('count')
+).group_by(SentimentAnalysis.sentiment)
+
+_COUNT_BY_SENTIMENT_SINCE_STMT = select(
+    SentimentAnalysis.sentiment,
+    func.count(SentimentAnalysis.id).label('count')
+).where(
+    SentimentAnalysis.created_at >= bindparam("start_date")
+).group_by(SentimentAnalysis.sentiment)
+
+_COUNT_BY_SENTIMENT_LANGUAGE_STMT = select(
+    SentimentAnalysis.sentiment,
+    SentimentAnalysis.language,
+    func.count(SentimentAnalysis.id).label('count')
+).group_by(SentimentAnalysis.sentiment, SentimentAnalysis.language)
+
+# Limite "agora - N dias" calculado no servidor: o statement é idêntico para
+# qualquer requisição e não depende do relógio da aplicação
+_DAYS = bindparam("days", type_=Integer)
+
+_DAYS_AGO_BY_DIALECT = {
+    "postgresql": func.now() - func.make_interval(0, 0, 0, _DAYS),
+    "mysql": func.date_sub(func.now(), text("INTERVAL :days DAY")),
+    "sqlite": func.datetime("now", func.printf("-%d days", _DAYS)),
+}
+
+
+def _build_statistics_stmt(cutoff):
+    return select(
+        func.count(SentimentAnalysis.id).label('total'),
+        func.avg(SentimentAnalysis.confidence).label('avg_confidence')
+    ).where(SentimentAnalysis.created_at >= cutoff)
+
+
+_STATISTICS_STMTS = {
+    dialect: _build_statistics_stmt(cutoff)
+    for dialect, cutoff in _DAYS_AGO_BY_DIALECT.items()
+}
+
+
+def _build_daily_analytics_stmt(cutoff):
+    day = func.date(SentimentAnalysis.created_at)
+    return select(
+        day.label('date'),
+        SentimentAnalysis.sentiment,
+        func.count(SentimentAnalysis.id).label('count'),
+        func.avg(SentimentAnalysis.confidence).label('avg_confidence')
+    ).where(
+        SentimentAnalysis.created_at >= cutoff
+    ).group_by(
+        day, SentimentAnalysis.sentiment
+    ).order_by(day.desc())
+
+
+_DAILY_ANALYTICS_STMTS = {
+    dialect: _build_daily_analytics_stmt(cutoff)
+    for dialect, cutoff in _DAYS_AGO_BY_DIALECT.items()
+}
+
+# Contagem e soma de confiança por sentimento numa única varredura
+# (alimenta contagens e estatísticas do dashboard)
+_DASHBOARD_ALL_STMT = select(
+    SentimentAnalysis.sentiment,
+    func.count(SentimentAnalysis.id).label('count'),
+    func.sum(SentimentAnalysis.confidence).label('sum_conf')
+).group_by(SentimentAnalysis.sentiment)
+
+_DASHBOARD_STMTS = {
+    dialect: _DASHBOARD_ALL_STMT.where(SentimentAnalysis.created_at >= cutoff)
+    for dialect, cutoff in _DAYS_AGO_BY_DIALECT.items()
+}
+
+# Agregações equivalentes sobre a materialized view diária (PostgreSQL):
+# granularidade de dia, atualizada a cada refresh
+_DAILY_START = func.date_trunc("day", bindparam("start_date"))
+_VIEW_DAYS_AGO = func.date_trunc("day", _DAYS_AGO_BY_DIALECT["postgresql"])
+
+_VIEW_COUNT_BY_SENTIMENT_STMT = select(
+    sentiment_daily_counts.c.sentiment,
+    func.sum(sentiment_daily_counts.c.cnt).label('count')
+).group_by(sentiment_daily_counts.c.sentiment)
+
+_VIEW_COUNT_BY_SENTIMENT_SINCE_STMT = _VIEW_COUNT_BY_SENTIMENT_STMT.where(
+    sentiment_daily_counts.c.day >= _DAILY_START
+)
+
+_VIEW_STATISTICS_STMT = select(
+    func.sum(sentiment_daily_counts.c.cnt).label('total'),
+    (
+        func.sum(sentiment_daily_counts.c.sum_conf)
+        / func.nullif(func.sum(sentiment_daily_counts.c.cnt), 0)
+    ).label('avg_confidence')
+).where(sentiment_daily_counts.c.day >= _VIEW_DAYS_AGO)
+
+_VIEW_DASHBOARD_ALL_STMT = select(
+    sentiment_daily_counts.c.sentiment,
+    func.sum(sentiment_daily_counts.c.cnt).label('count'),
+    func.sum(sentiment_daily_counts.c.sum_conf).label('sum_conf')
+).group_by(sentiment_daily_counts.c.sentiment)
+
+_VIEW_DASHBOARD_STMT = _VIEW_DASHBOARD_ALL_STMT.where(
+    sentiment_daily_counts.c.day >= _VIEW_DAYS_AGO
+)
+
+_VIEW_COUNT_BY_SENTIMENT_LANGUAGE_STMT = select(
+    sentiment_daily_counts.c.sentiment,
+    sentiment_daily_counts.c.language,
+    func.sum(sentiment_daily_counts.c.cnt).label('count')
+).group_by(sentiment_daily_counts.c.sentiment, sentiment_daily_counts.c.language)
+
+# Ordenações suportadas, pré-construídas (id como desempate estável)
+_SORT_COLUMNS = {
+    "created_at": SentimentAnalysis.created_at,
+    "confidence": SentimentAnalysis.confidence,
+    "sentiment": SentimentAnalysis.sentiment
+}
+
+_SORT_EXPRS = {
+    **{
+        (name, "desc"): (desc(col), desc(SentimentAnalysis.id))
+        for name, col in _SORT_COLUMNS.items()
+    },
+    **{
+        (name, "asc"): (col, SentimentAnalysis.id)
+        for name, col in _SORT_COLUMNS.items()
+    },
+}
+
+
+def _sort_key(sort_by: str, sort_order: str) -> Tuple[str, str]:
+    """Normaliza ordenação: coluna desconhecida usa created_at; ordem != desc é asc."""
+    return (
+        sort_by if sort_by in _SORT_COLUMNS else "created_at",
+        "desc" if sort_order == "desc" else "asc"
+    )
+
+# Colunas do resumo (equivalente a to_summary) para projeções sem ORM
+_SUMMARY_COLUMNS = (
+    SentimentAnalysis.id,
+    SentimentAnalysis.sentiment,
+    SentimentAnalysis.confidence,
+    SentimentAnalysis.language,
+    SentimentAnalysis.created_at,
+    SentimentAnalysis.text_length,
+)
+
+
+# ORDER BY dentro de agregações também no SQLite (json_group_array, 3.44+)
+@compiles(aggregate_order_by, "sqlite")
+def _compile_sqlite_aggregate_order_by(element, compiler, **kw):
+    return (
+        f"{compiler.process(element.target, **kw)} "
+        f"ORDER BY {compiler.process(element.order_by, **kw)}"
+    )
+
+
+def _sqlite_isoformat(column_expr):
+    """Converte DATETIME do SQLite para o formato de datetime.isoformat()."""
+    iso = func.replace(column_expr, " ", "T")
+    # isoformat() omite a fração quando os microssegundos são zero
+    return case(
+        (func.substr(column_expr, 20) == ".000000", func.substr(iso, 1, 19)),
+        else_=iso
+    )
+
+
 class SentimentRepository:
     """Repository para operações de SentimentAnalysis."""
     
     def __init__(self, db: Session):
         self.db = db
     
+    @property
+    def _use_daily_counts(self) -> bool:
+        """Se as agregações devem usar a materialized view diária."""
+        return self.db.get_bind().dialect.name == "postgresql"
+    
+    def refresh_daily_counts(self) -> None:
+        """Atualiza a materialized view de contagens diárias (PostgreSQL)."""
+        if not self._use_daily_counts:
+            return
+        
+        try:
+            self.db.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {DAILY_COUNTS_VIEW}"))
+            self.db.commit()
+            logger.debug("Materialized view de contagens diárias atualizada")
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            logger.error(f"Erro ao atualizar contagens diárias: {e}")
+            raise DatabaseError(f"Falha ao atualizar contagens: {e}") from e
+    
     def create(self, analysis: SentimentAnalysis) -> SentimentAnalysis:
         """
         Cria nova análise no banco.
         
+        Defaults do servidor (created_at) voltam no próprio INSERT via
+        RETURNING, dispensando refresh.
+        
         Args:
             analysis: Entidade SentimentAnalysis
             
@@ -36,7 +298,6 @@ class SentimentRepository:
         try:
             self.db.add(analysis)
             self.db.commit()
-            self.db.refresh(analysis)
             logger.debug(f"Análise criada: {analysis.id}")
             return analysis
         except SQLAlchemyError as e:
@@ -44,25 +305,96 @@ class SentimentRepository:
             logger.error(f"Erro ao criar análise: {e}")
             raise DatabaseError(f"Falha ao salvar análise: {e}") from e
     
-    def get_by_id(self, id: str) -> Optional[SentimentAnalysis]:
+    def create_feedback(self, feedback: SentimentFeedback) -> SentimentFeedback:
+        """
+        Registra feedback sobre uma análise.
+        
+        Args:
+            feedback: Entidade criada por SentimentFeedback.create_for_analysis
+            
+        Returns:
+            Feedback persistido
+        """
+        try:
+            self.db.add(feedback)
+            self.db.commit()
+            logger.debug(f"Feedback criado para análise: {feedback.analysis_id}")
+            return feedback
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            logger.error(f"Erro ao criar feedback: {e}")
+            raise DatabaseError(f"Falha ao salvar feedback: {e}") from e
+    
+    def bulk_create(self, items: List[Dict[str, Any]]) -> List[str]:
         """
-        Busca análise por ID.
+        Insere múltiplas análises em lote via INSERT Core (executemany).
+        
+        Não passa pelo ORM (sem instâncias nem identity map); IDs e hashes
+        são gerados no cliente, dispensando RETURNING.
+        
+        Args:
+            items: Dicts com text, sentiment, confidence, language e all_scores
+            
+        Returns:
+            Lista de IDs gerados, na ordem de entrada
+        """
+        if not items:
+            return []
+        
+        mappings = []
+        for item in items:
+            mapping = dict(item)
+            mapping.setdefault("id", generate_uuid7())
+            mapping.setdefault("text_hash", compute_text_hash(mapping["text"]))
+            mapping.setdefault("all_scores", [])
+            mapping.setdefault("all_scores_arr", scores_to_vector(mapping["all_scores"]))
+            mappings.append(mapping)
+        
+        try:
+            self.db.execute(_INSERT_STMT, mappings)
+            self.db.commit()
+            logger.debug(f"Lote de {len(mappings)} análises criado")
+            return [mapping["id"] for mapping in mappings]
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            logger.error(f"Erro ao criar lote de análises: {e}")
+            raise DatabaseError(f"Falha ao salvar lote de análises: {e}") from e
+    
+    def get_by_id(self, id: str) -> Optional[AnalysisSnapshot]:
+        """
+        Busca análise por ID com cache LRU em memória.
         
         Args:
             id: ID da análise
             
         Returns:
-            SentimentAnalysis ou None
+            AnalysisSnapshot somente leitura ou None
         """
+        with _snapshot_lock:
+            snapshot = _snapshot_cache.get(id)
+            if snapshot is not None:
+                _snapshot_cache.move_to_end(id)
+                return snapshot
+        
         try:
-            return self.db.query(SentimentAnalysis).filter(
-                SentimentAnalysis.id == id
-            ).first()
+            row = self.db.execute(_GET_SNAPSHOT_STMT, {"id": id}).one_or_none()
         except SQLAlchemyError as e:
             logger.error(f"Erro ao buscar análise {id}: {e}")
             raise DatabaseError(f"Falha ao buscar análise: {e}") from e
+        
+        if row is None:
+            return None
+        
+        snapshot = AnalysisSnapshot.from_row(row)
+        with _snapshot_lock:
+            _snapshot_cache[id] = snapshot
+            _snapshot_cache.move_to_end(id)
+            if len(_snapshot_cache) > _SNAPSHOT_CACHE_SIZE:
+                _snapshot_cache.popitem(last=False)
+        
+        return snapshot
     
-    def get_by_id_or_raise(self, id: str) -> SentimentAnalysis:
+    def get_by_id_or_raise(self, id: str) -> AnalysisSnapshot:
         """
         Busca análise por ID ou levanta exceção.
         
@@ -70,7 +402,7 @@ class SentimentRepository:
             id: ID da análise
             
         Returns:
-            SentimentAnalysis
+            AnalysisSnapshot
             
         Raises:
             RecordNotFoundError: Se não encontrar
@@ -91,9 +423,15 @@ class SentimentRepository:
             True se removido
         """
         try:
-            analysis = self.get_by_id_or_raise(id)
+            # Instância ORM (não o snapshot do cache) para o delete da sessão
+            analysis = self.db.get(SentimentAnalysis, id)
+            if analysis is None:
+                invalidate_snapshot(id)
+                raise RecordNotFoundError(resource="Análise", record_id=id)
+            
             self.db.delete(analysis)
             self.db.commit()
+            invalidate_snapshot(id)
             logger.debug(f"Análise removida: {id}")
             return True
         except SQLAlchemyError as e:
@@ -106,14 +444,18 @@ class SentimentRepository:
         Busca análise por hash do texto (para evitar duplicatas).
         
         Args:
-            text_hash: Hash SHA256 do texto
+            text_hash: Hash BLAKE2b do texto (ver compute_text_hash)
             
         Returns:
             SentimentAnalysis ou None
         """
-        # Nota: Requer campo text_hash no modelo para funcionar
-        # Por ora, busca por texto exato (limitado)
-        return None
+        try:
+            return self.db.execute(
+                _FIND_BY_TEXT_HASH_STMT, {"text_hash": text_hash}
+            ).scalar_one_or_none()
+        except SQLAlchemyError as e:
+            logger.error(f"Erro ao buscar análise por hash {text_hash}: {e}")
+            raise DatabaseError(f"Falha ao buscar análise: {e}") from e
     
     def get_paginated(
         self,
@@ -135,87 +477,362 @@ class SentimentRepository:
             Tupla (lista de análises, total)
         """
         try:
-            query = self.db.query(SentimentAnalysis)
+            query = self._filtered_query(
+                sentiment, language, min_confidence, max_confidence,
+                start_date, end_date
+            )
             
-            # Aplicar filtros
-            conditions = []
+            # Total
+            total = query.count()
             
-            if sentiment:
-                conditions.append(SentimentAnalysis.sentiment == sentiment)
+            # Ordenação
+            sort_by, sort_order = _sort_key(sort_by, sort_order)
+            query = query.order_by(*_SORT_EXPRS[(sort_by, sort_order)])
             
-            if language:
-                conditions.append(SentimentAnalysis.language == language)
+            # Paginação
+            offset = (page - 1) * limit
+            results = query.offset(offset).limit(limit).all()
             
-            if min_confidence is not None:
-                conditions.append(SentimentAnalysis.confidence >= min_confidence)
+            return results, total
             
-            if max_confidence is not None:
-                conditions.append(SentimentAnalysis.confidence <= max_confidence)
+        except SQLAlchemyError as e:
+            logger.error(f"Erro na consulta paginada: {e}")
+            raise DatabaseError(f"Falha na consulta: {e}") from e
+    
+    def get_paginated_keyset(
+        self,
+        limit: int = 50,
+        sentiment: Optional[str] = None,
+        language: Optional[str] = None,
+        min_confidence: Optional[float] = None,
+        max_confidence: Optional[float] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        sort_by: str = "created_at",
+        sort_order: str = "desc",
+        cursor: Optional[Tuple[Any, str]] = None,
+        include_total: bool = False,
+        max_count: int = 10000
+    ) -> Tuple[List[SentimentAnalysis], Optional[int], Optional[Tuple[Any, str]]]:
+        """
+        Busca paginada com filtros usando keyset pagination.
+        
+        Com `cursor` (valor da coluna de ordenação, id) a consulta faz seek
+        direto no índice em vez de OFFSET, sem custo crescente com a página.
+        
+        Args:
+            cursor: Cursor retornado pela página anterior (None na primeira)
+            include_total: Se deve contar o total (limitado a `max_count`)
+            max_count: Janela máxima para a contagem aproximada
+        
+        Returns:
+            Tupla (lista de análises, total ou None, cursor da próxima página ou None)
+        """
+        try:
+            query = self._filtered_query(
+                sentiment, language, min_confidence, max_confidence,
+                start_date, end_date
+            )
             
-            if start_date:
-                conditions.append(SentimentAnalysis.created_at >= start_date)
+            # Total (opcional, limitado a uma janela)
+            total = None
+            if include_total:
+                window = query.with_entities(SentimentAnalysis.id).limit(max_count).subquery()
+                total = self.db.query(func.count()).select_from(window).scalar() or 0
             
-            if end_date:
-                conditions.append(SentimentAnalysis.created_at <= end_date)
+            # Ordenação (id como desempate estável para o cursor)
+            sort_by, sort_order = _sort_key(sort_by, sort_order)
+            column = _SORT_COLUMNS[sort_by]
+            query = query.order_by(*_SORT_EXPRS[(sort_by, sort_order)])
             
-            if conditions:
-                query = query.filter(and_(*conditions))
+            if cursor is not None:
+                cursor_value, cursor_id = cursor
+                if sort_order == "desc":
+                    query = query.filter(or_(
+                        column < cursor_value,
+                        and_(column == cursor_value, SentimentAnalysis.id < cursor_id)
+                    ))
+                else:
+                    query = query.filter(or_(
+                        column > cursor_value,
+                        and_(column == cursor_value, SentimentAnalysis.id > cursor_id)
+                    ))
             
-            # Total
-            total = query.count()
+            # limit + 1 para detectar próxima página sem COUNT
+            results = query.limit(limit + 1).all()
             
-            # Ordenação
-            column_map = {
-                "created_at": SentimentAnalysis.created_at,
-                "confidence": SentimentAnalysis.confidence,
-                "sentiment": SentimentAnalysis.sentiment
-            }
-            column = column_map.get(sort_by, SentimentAnalysis.created_at)
+            next_cursor = None
+            if len(results) > limit:
+                results = results[:limit]
+                last = results[-1]
+                next_cursor = (getattr(last, column.key), last.id)
             
-            if sort_order == "desc":
-                query = query.order_by(desc(column))
-            else:
-                query = query.order_by(column)
+            return results, total, next_cursor
             
-            # Paginação
-            offset = (page - 1) * limit
-            results = query.offset(offset).limit(limit).all()
+        except SQLAlchemyError as e:
+            logger.error(f"Erro na consulta paginada: {e}")
+            raise DatabaseError(f"Falha na consulta: {e}") from e
+    
+    def get_paginated_summaries(
+        self,
+        page: int = 1,
+        limit: int = 50,
+        sentiment: Optional[str] = None,
+        language: Optional[str] = None,
+        min_confidence: Optional[float] = None,
+        max_confidence: Optional[float] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        sort_by: str = "created_at",
+        sort_order: str = "desc"
+    ) -> List[Dict[str, Any]]:
+        """
+        Busca paginada retornando resumos (formato de `to_summary`).
+        
+        Seleciona apenas as colunas do resumo via Core, sem instanciar
+        entidades ORM nem carregar colunas adiadas; o tamanho do texto é
+        calculado no banco.
+        
+        Returns:
+            Lista de dicts com id, sentiment, confidence, language,
+            created_at e text_length
+        """
+        try:
+            stmt = select(*_SUMMARY_COLUMNS)
             
-            return results, total
+            conditions = self._build_conditions(
+                sentiment, language, min_confidence, max_confidence,
+                start_date, end_date
+            )
+            if conditions:
+                stmt = stmt.where(and_(*conditions))
+            
+            stmt = stmt.order_by(*_SORT_EXPRS[_sort_key(sort_by, sort_order)])
+            
+            stmt = stmt.offset((page - 1) * limit).limit(limit)
+            
+            summaries = []
+            for row in self.db.execute(stmt):
+                summary = dict(row._mapping)
+                created_at = summary["created_at"]
+                summary["created_at"] = created_at.isoformat() if created_at else None
+                summary["text_length"] = summary["text_length"] or 0
+                summaries.append(summary)
+            
+            return summaries
             
         except SQLAlchemyError as e:
-            logger.error(f"Erro na consulta paginada: {e}")
+            logger.error(f"Erro na consulta paginada de resumos: {e}")
             raise DatabaseError(f"Falha na consulta: {e}") from e
     
+    def _filtered_query(
+        self,
+        sentiment: Optional[str],
+        language: Optional[str],
+        min_confidence: Optional[float],
+        max_confidence: Optional[float],
+        start_date: Optional[datetime],
+        end_date: Optional[datetime]
+    ):
+        """Query de análises com os filtros de listagem aplicados."""
+        query = self.db.query(SentimentAnalysis)
+        conditions = self._build_conditions(
+            sentiment, language, min_confidence, max_confidence,
+            start_date, end_date
+        )
+        if conditions:
+            query = query.filter(and_(*conditions))
+        return query
+    
+    @staticmethod
+    def _build_conditions(
+        sentiment: Optional[str],
+        language: Optional[str],
+        min_confidence: Optional[float],
+        max_confidence: Optional[float],
+        start_date: Optional[datetime],
+        end_date: Optional[datetime]
+    ) -> List[Any]:
+        """Monta condições de filtro comuns às consultas paginadas."""
+        conditions = []
+        
+        if sentiment:
+            conditions.append(SentimentAnalysis.sentiment == sentiment)
+        
+        if language:
+            conditions.append(SentimentAnalysis.language == language)
+        
+        if min_confidence is not None:
+            conditions.append(SentimentAnalysis.confidence >= min_confidence)
+        
+        if max_confidence is not None:
+            conditions.append(SentimentAnalysis.confidence <= max_confidence)
+        
+        if start_date:
+            conditions.append(SentimentAnalysis.created_at >= start_date)
+        
+        if end_date:
+            conditions.append(SentimentAnalysis.created_at <= end_date)
+        
+        return conditions
+    
     def get_recent(self, limit: int = 10) -> List[SentimentAnalysis]:
         """Retorna análises mais recentes."""
         try:
-            return self.db.query(SentimentAnalysis).order_by(
-                desc(SentimentAnalysis.created_at)
-            ).limit(limit).all()
+            return list(self.db.execute(_GET_RECENT_STMT, {"limit": limit}).scalars())
         except SQLAlchemyError as e:
             logger.error(f"Erro ao buscar recentes: {e}")
             raise DatabaseError(f"Falha ao buscar: {e}") from e
     
+    def get_recent_as_json(self, limit: int = 10) -> str:
+        """
+        Retorna resumos das análises mais recentes já serializados em JSON.
+        
+        A serialização é feita pelo próprio banco (json_agg/json_build_object
+        no PostgreSQL, json_group_array/json_object no SQLite), permitindo
+        repassar a string diretamente na resposta HTTP.
+        
+        Returns:
+            Array JSON com resumos no formato de `to_summary`
+        """
+        try:
+            recent = select(*_SUMMARY_COLUMNS).order_by(
+                desc(SentimentAnalysis.created_at)
+            ).limit(limit).subquery()
+            
+            bind = self.db.get_bind()
+            dialect = bind.dialect.name
+            if dialect == "postgresql":
+                build_object, aggregate = func.json_build_object, func.json_agg
+            elif dialect == "mysql":
+                build_object, aggregate = func.json_object, func.json_arrayagg
+            else:
+                build_object, aggregate = func.json_object, func.json_group_array
+            
+            def value_of(col):
+                # Sentimento é armazenado como código inteiro (ver SentimentType)
+                if col.key == "sentiment":
+                    return sentiment_label(col)
+                if col.key == "created_at" and dialect == "sqlite":
+                    return _sqlite_isoformat(col)
+                return col
+            
+            row_object = build_object(*(
+                part for col in recent.c for part in (col.key, value_of(col))
+            ))
+            
+            # Ordem explícita na agregação; SQLite anterior a 3.44 não aceita
+            # ORDER BY em agregações e mantém a ordem da subquery
+            newest_first = desc(recent.c.created_at)
+            if dialect == "postgresql" or (
+                dialect == "sqlite" and bind.dialect.server_version_info >= (3, 44)
+            ):
+                rows_json = aggregate(aggregate_order_by(row_object, newest_first))
+            else:
+                rows_json = aggregate(row_object)
+            
+            # json_agg retorna tipo json (lista no driver): força texto
+            if dialect == "postgresql":
+                rows_json = cast(rows_json, Text)
+            
+            result = self.db.execute(select(rows_json)).scalar()
+            
+            return result or "[]"
+            
+        except SQLAlchemyError as e:
+            logger.error(f"Erro ao buscar recentes em JSON: {e}")
+            raise DatabaseError(f"Falha ao buscar: {e}") from e
+    
+    def compute_quality_batch(
+        self,
+        ids: List[str],
+        threshold: float = 0.3
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Calcula score dominante e sentimento misto para um lote de análises.
+        
+        Busca apenas id e o vetor de scores e faz o cálculo vetorizado em uma
+        matriz (N análises x rótulos de SCORE_LABELS), no lugar de loops por
+        instância. Registros antigos sem vetor são convertidos a partir de
+        all_scores.
+        
+        Args:
+            ids: IDs das análises
+            threshold: Limite mínimo para considerar score significativo
+            
+        Returns:
+            Dict id -> {"dominant": rótulo dominante ou None, "is_mixed": bool}
+        """
+        if not ids:
+            return {}
+        
+        try:
+            vectors = dict(self.db.execute(
+                select(SentimentAnalysis.id, SentimentAnalysis.all_scores_arr).where(
+                    SentimentAnalysis.id.in_(ids)
+                )
+            ).all())
+            
+            legacy_ids = [id for id, vector in vectors.items() if vector is None]
+            if legacy_ids:
+                for id, scores in self.db.execute(
+                    select(SentimentAnalysis.id, SentimentAnalysis.all_scores).where(
+                        SentimentAnalysis.id.in_(legacy_ids)
+                    )
+                ):
+                    vectors[id] = scores_to_vector(scores)
+        except SQLAlchemyError as e:
+            logger.error(f"Erro ao buscar scores do lote: {e}")
+            raise DatabaseError(f"Falha ao buscar scores: {e}") from e
+        
+        if not vectors:
+            return {}
+        
+        empty = [0.0] * len(SCORE_LABELS)
+        arr = np.array(
+            [vector or empty for vector in vectors.values()], dtype=np.float32
+        )
+        
+        has_scores = arr.any(axis=1)
+        dominant = arr.argmax(axis=1)
+        mixed = (arr >= threshold).sum(axis=1) >= 2
+        
+        return {
+            id: {
+                "dominant": SCORE_LABELS[dominant[i]] if has_scores[i] else None,
+                "is_mixed": bool(mixed[i]),
+            }
+            for i, id in enumerate(vectors)
+        }
+    
     def count_by_sentiment(
         self,
         start_date: Optional[datetime] = None
     ) -> Dict[str, int]:
-        """Conta análises por sentimento."""
+        """
+        Conta análises por sentimento.
+        
+        No PostgreSQL agrega a materialized view diária (start_date
+        arredondado para o início do dia).
+        """
         try:
-            query = self.db.query(
-                SentimentAnalysis.sentiment,
-                func.count(SentimentAnalysis.id).label('count')
-            )
+            if self._use_daily_counts:
+                by_date_stmt, all_stmt = (
+                    _VIEW_COUNT_BY_SENTIMENT_SINCE_STMT, _VIEW_COUNT_BY_SENTIMENT_STMT
+                )
+            else:
+                by_date_stmt, all_stmt = (
+                    _COUNT_BY_SENTIMENT_SINCE_STMT, _COUNT_BY_SENTIMENT_STMT
+                )
             
             if start_date:
-                query = query.filter(SentimentAnalysis.created_at >= start_date)
-            
-            result = query.group_by(SentimentAnalysis.sentiment).all()
+                result = self.db.execute(by_date_stmt, {"start_date": start_date}).all()
+            else:
+                result = self.db.execute(all_stmt).all()
             
             counts = {"positive": 0, "negative": 0, "neutral": 0}
             for sentiment, count in result:
-                counts[sentiment] = count
+                counts[sentiment] = int(count)
             
             return counts
             
@@ -223,23 +840,58 @@ class SentimentRepository:
             logger.error(f"Erro ao contar por sentimento: {e}")
             raise DatabaseError(f"Falha na contagem: {e}") from e
     
+    def count_by_sentiment_and_language(self) -> Dict[str, Any]:
+        """
+        Total e distribuições por sentimento e idioma numa única varredura.
+        
+        No PostgreSQL agrega a materialized view diária.
+        
+        Returns:
+            Dict com "total", "sentiments" e "languages" (contagens)
+        """
+        try:
+            stmt = (
+                _VIEW_COUNT_BY_SENTIMENT_LANGUAGE_STMT if self._use_daily_counts
+                else _COUNT_BY_SENTIMENT_LANGUAGE_STMT
+            )
+            rows = self.db.execute(stmt).all()
+            
+            sentiments = {"positive": 0, "negative": 0, "neutral": 0}
+            languages: Dict[str, int] = {}
+            total = 0
+            for sentiment, language, count in rows:
+                count = int(count)
+                sentiments[sentiment] = sentiments.get(sentiment, 0) + count
+                languages[language] = languages.get(language, 0) + count
+                total += count
+            
+            return {"total": total, "sentiments": sentiments, "languages": languages}
+            
+        except SQLAlchemyError as e:
+            logger.error(f"Erro ao contar por sentimento e idioma: {e}")
+            raise DatabaseError(f"Falha na contagem: {e}") from e
+    
     def get_statistics(
         self,
         days: int = 30
     ) -> Dict[str, Any]:
-        """Retorna estatísticas agregadas."""
+        """
+        Retorna estatísticas agregadas.
+        
+        O limite da janela (agora - N dias) é calculado no banco. No
+        PostgreSQL agrega a materialized view diária.
+        """
         try:
-            start_date = datetime.utcnow() - timedelta(days=days)
+            if self._use_daily_counts:
+                stmt = _VIEW_STATISTICS_STMT
+            else:
+                dialect = self.db.get_bind().dialect.name
+                stmt = _STATISTICS_STMTS.get(dialect, _STATISTICS_STMTS["sqlite"])
             
-            result = self.db.query(
-                func.count(SentimentAnalysis.id).label('total'),
-                func.avg(SentimentAnalysis.confidence).label('avg_confidence')
-            ).filter(
-                SentimentAnalysis.created_at >= start_date
-            ).first()
+            result = self.db.execute(stmt, {"days": days}).one()
             
             return {
-                "total": result.total or 0,
+                "total": int(result.total or 0),
                 "avg_confidence": round(float(result.avg_confidence or 0), 4),
                 "period_days": days
             }
@@ -247,6 +899,96 @@ class SentimentRepository:
         except SQLAlchemyError as e:
             logger.error(f"Erro ao buscar estatísticas: {e}")
             raise DatabaseError(f"Falha nas estatísticas: {e}") from e
+    
+    def get_dashboard_bundle(
+        self,
+        days: Optional[int] = 30
+    ) -> Dict[str, Any]:
+        """
+        Contagens por sentimento e estatísticas gerais numa única consulta.
+        
+        Equivale a `count_by_sentiment` + `get_statistics` com uma varredura
+        e um round-trip. No PostgreSQL agrega a materialized view diária.
+        
+        Args:
+            days: Janela em dias (None para todo o histórico)
+            
+        Returns:
+            Dict com "counts" (por sentimento) e "statistics"
+            (total, avg_confidence, period_days)
+        """
+        try:
+            if days is None:
+                stmt = _VIEW_DASHBOARD_ALL_STMT if self._use_daily_counts else _DASHBOARD_ALL_STMT
+            elif self._use_daily_counts:
+                stmt = _VIEW_DASHBOARD_STMT
+            else:
+                dialect = self.db.get_bind().dialect.name
+                stmt = _DASHBOARD_STMTS.get(dialect, _DASHBOARD_STMTS["sqlite"])
+            
+            params = {"days": days} if days is not None else {}
+            rows = self.db.execute(stmt, params).all()
+            
+            counts = {"positive": 0, "negative": 0, "neutral": 0}
+            total = 0
+            sum_conf = 0.0
+            for sentiment, count, sentiment_sum_conf in rows:
+                counts[sentiment] = int(count)
+                total += int(count)
+                sum_conf += float(sentiment_sum_conf or 0)
+            
+            return {
+                "counts": counts,
+                "statistics": {
+                    "total": total,
+                    "avg_confidence": round(sum_conf / total, 4) if total else 0.0,
+                    "period_days": days
+                }
+            }
+            
+        except SQLAlchemyError as e:
+            logger.error(f"Erro ao buscar dados do dashboard: {e}")
+            raise DatabaseError(f"Falha nas estatísticas: {e}") from e
+    
+    def iter_daily_analytics(
+        self,
+        days: int = 30,
+        chunk_size: int = 1000
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Analytics diárias (data, sentimento) em blocos via cursor no servidor.
+        
+        O resultado é consumido em partições de `chunk_size` linhas, mantendo a
+        memória proporcional ao bloco e não ao período inteiro.
+        
+        Args:
+            days: Número de dias para análise
+            chunk_size: Linhas por partição
+            
+        Yields:
+            Listas de dicts com date, sentiment, count e avg_confidence
+        """
+        dialect = self.db.get_bind().dialect.name
+        stmt = _DAILY_ANALYTICS_STMTS.get(dialect, _DAILY_ANALYTICS_STMTS["sqlite"])
+        
+        try:
+            result = self.db.execute(
+                stmt.execution_options(stream_results=True, yield_per=chunk_size),
+                {"days": days}
+            )
+            for partition in result.partitions():
+                yield [
+                    {
+                        "date": row.date,
+                        "sentiment": row.sentiment,
+                        "count": row.count,
+                        "avg_confidence": round(float(row.avg_confidence or 0), 4)
+                    }
+                    for row in partition
+                ]
+        except SQLAlchemyError as e:
+            logger.error(f"Erro nas analytics diárias: {e}")
+            raise DatabaseError(f"Falha nas analytics: {e}") from e
 
 
 def get_sentiment_repository(db: Session) -> SentimentRepository:
@@ -1,32 +1,43 @@
+import asyncio
+import logging
+import secrets
 import time
+from collections import deque
+from datetime import datetime
 from typing import Optional
 
+import orjson
 from fastapi import (
-    APIRouter, BackgroundTasks, Depends, HTTPException, Request, status
+    APIRouter, Depends, HTTPException, Query, Request, status
 )
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from sqlalchemy import text  # ADDED: Import text for SQLAlchemy 2.0
 from sqlalchemy.orm import Session
 
-from app.config import Settings, get_settings
+from app.config import get_settings
 from app.core.cache import CacheService
 from app.core.exceptions import (
     CacheError, DatabaseError, InvalidTextError, MLError, 
     ModelNotAvailableError, RateLimitError
 )
 from app.dependencies import get_cache_dependency, get_db_session
+from app.sentiment.repository import get_sentiment_repository
 from app.sentiment.schemas import (
     AnalysisRequest, AnalysisResponse, BatchRequest, BatchResponse, 
     ErrorResponse, HealthResponse
 )
 from app.sentiment.service import SentimentService
-from app.shared.rate_limiter import rate_limit
+from app.shared.rate_limiter import check_rate_limit, rate_limit
+from app.shared.utils import ORJSONResponse
+
+settings = get_settings()
 
 
 # Router com configuração base
 router = APIRouter(
     prefix="/api/v1/sentiment",
     tags=["sentiment-analysis"],
+    default_response_class=ORJSONResponse,
     responses={
         429: {"model": ErrorResponse, "description": "Rate limit excedido"},
         500: {"model": ErrorResponse, "description": "Erro interno do servidor"},
@@ -35,119 +46,190 @@ router = APIRouter(
 )
 
 
+_sentiment_service: Optional[SentimentService] = None
+
+
 def get_sentiment_service(
     cache: CacheService = Depends(get_cache_dependency)
 ) -> SentimentService:
-    """Dependency para obter serviço de sentimentos."""
-    return SentimentService(cache_service=cache)
+    """Dependency para obter serviço de sentimentos (reaproveitado por cache)."""
+    global _sentiment_service
+    if _sentiment_service is None or _sentiment_service.cache_service is not cache:
+        _sentiment_service = SentimentService(cache_service=cache)
+    return _sentiment_service
 
 
-async def log_analysis_stats(
+# Ring buffer de analytics, descarregado em lote por flush_analysis_stats
+_analytics_queue: deque = deque(maxlen=10000)
+analytics_logger = logging.getLogger("sentiment_analytics")
+
+
+def log_analysis_stats(
     endpoint: str,
     success: bool,
     processing_time: float,
     text_count: int = 1
 ) -> None:
-    """Background task para logging de estatísticas."""
-    import logging
-    
-    logger = logging.getLogger("sentiment_analytics")
+    """Registra estatísticas da requisição no buffer (sem formatação nem I/O)."""
+    _analytics_queue.append(
+        (endpoint, success, processing_time, text_count, time.time())
+    )
+
+
+def flush_analysis_stats() -> int:
+    """Emite as estatísticas acumuladas em uma única linha JSON."""
+    batch = [_analytics_queue.popleft() for _ in range(len(_analytics_queue))]
+    if batch:
+        analytics_logger.info(orjson.dumps(batch).decode())
+    return len(batch)
+
+
+def build_analysis_response(
+    result: dict,
+    text: Optional[str] = None,
+    processing_time_ms: Optional[float] = None,
+    timestamp: Optional[datetime] = None
+) -> AnalysisResponse:
+    """
+    Monta AnalysisResponse a partir de resultado interno sem revalidação.
     
-    try:
-        stats = {
-            "endpoint": endpoint,
-            "success": success,
-            "processing_time_ms": processing_time,
-            "text_count": text_count,
-            "timestamp": time.time()
-        }
-        
-        logger.info(f"Analytics: {stats}")
-        
-    except Exception as e:
-        logger.error(f"Erro no logging de analytics: {e}")
+    O resultado vem do serviço (já normalizado), então usa model_construct;
+    a resposta é serializada direto, sem a validação do response_model.
+    """
+    return AnalysisResponse.model_construct(
+        timestamp=timestamp or datetime.utcnow(),
+        text=text,
+        sentiment=result["sentiment"],
+        confidence=result["confidence"],
+        language=result["language"],
+        all_scores=result.get("all_scores") or [],
+        processing_time_ms=processing_time_ms,
+        cached=result.get("cached", False)
+    )
 
 
-async def handle_sentiment_error(error: Exception, request_id: str) -> HTTPException:
-    """Converte erros de aplicação para HTTPException."""
-    if isinstance(error, InvalidTextError):
-        return HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail={
-                "error": "INVALID_TEXT",
-                "message": str(error),
-                "request_id": request_id
-            }
-        )
+# Limites de /analyze (compartilhados com o fast path de cache)
+ANALYZE_RATE_LIMIT = {"requests_per_minute": 100, "requests_per_hour": 1000}
+
+
+async def serve_cached_analysis(request: Request) -> Optional[Response]:
+    """
+    Fast path de /analyze para textos já cacheados.
     
-    elif isinstance(error, ModelNotAvailableError):
-        return HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail={
-                "error": "MODEL_UNAVAILABLE", 
-                "message": "Modelo de análise temporariamente indisponível",
-                "request_id": request_id
-            }
-        )
+    Executado pelo middleware antes do roteamento: sem resolução de
+    dependências nem validação Pydantic do request. Retorna None (fluxo
+    normal) para corpo fora do formato simples, cache miss, erro ou
+    rate limit excedido.
+    """
+    service = _sentiment_service
+    if service is None:
+        return None
     
-    elif isinstance(error, MLError):
-        return HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail={
-                "error": "ML_ERROR",
-                "message": "Erro no processamento de ML",
-                "request_id": request_id
-            }
-        )
+    start_time = time.time()
+    try:
+        payload = orjson.loads(await request.body())
+    except orjson.JSONDecodeError:
+        return None
     
-    elif isinstance(error, DatabaseError):
-        return HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail={
-                "error": "DATABASE_ERROR",
-                "message": "Erro temporário na persistência",
-                "request_id": request_id
-            }
-        )
+    if not isinstance(payload, dict) or payload.keys() != {"text"}:
+        return None
     
-    elif isinstance(error, RateLimitError):
-        return HTTPException(
-            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            detail={
-                "error": "RATE_LIMIT_EXCEEDED",
-                "message": str(error),
-                "request_id": request_id
-            }
-        )
+    text = payload["text"]
+    if not isinstance(text, str) or not 1 <= len(text) <= 2000:
+        return None
+    text = text.strip()
+    if not text:
+        return None
+    
+    result = await service.get_cached_analysis(
+        service._generate_cache_key(text), start_time
+    )
+    if not result:
+        return None
+    
+    # Rate limit só em hits (em miss o decorator do endpoint faz a contagem)
+    allowed, headers = await check_rate_limit(request, **ANALYZE_RATE_LIMIT)
+    if not allowed:
+        return None
     
+    response = build_analysis_response(
+        result,
+        text=text if settings.debug else None,
+        processing_time_ms=result.get("response_time_ms")
+    )
+    log_analysis_stats(
+        endpoint="analyze",
+        success=True,
+        processing_time=(time.time() - start_time) * 1000
+    )
+    
+    return Response(
+        content=response.model_dump_json(),
+        media_type="application/json",
+        headers=headers
+    )
+
+
+# Mapeamento erro -> (status HTTP, código, mensagem fixa ou None para str(error))
+_ERROR_RESPONSES = {
+    InvalidTextError: (status.HTTP_400_BAD_REQUEST, "INVALID_TEXT", None),
+    ModelNotAvailableError: (
+        status.HTTP_503_SERVICE_UNAVAILABLE,
+        "MODEL_UNAVAILABLE",
+        "Modelo de análise temporariamente indisponível"
+    ),
+    MLError: (
+        status.HTTP_500_INTERNAL_SERVER_ERROR, "ML_ERROR", "Erro no processamento de ML"
+    ),
+    DatabaseError: (
+        status.HTTP_503_SERVICE_UNAVAILABLE,
+        "DATABASE_ERROR",
+        "Erro temporário na persistência"
+    ),
+    RateLimitError: (status.HTTP_429_TOO_MANY_REQUESTS, "RATE_LIMIT_EXCEEDED", None),
+}
+_INTERNAL_ERROR_RESPONSE = (
+    status.HTTP_500_INTERNAL_SERVER_ERROR, "INTERNAL_ERROR", "Erro interno do servidor"
+)
+
+
+def handle_sentiment_error(error: Exception, request_id: str) -> HTTPException:
+    """Converte erros de aplicação para HTTPException."""
+    # Percorre o MRO para que subclasses (ex.: ModelLoadError) usem a entrada da base
+    for error_type in type(error).__mro__:
+        entry = _ERROR_RESPONSES.get(error_type)
+        if entry:
+            break
     else:
-        return HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail={
-                "error": "INTERNAL_ERROR",
-                "message": "Erro interno do servidor",
-                "request_id": request_id
-            }
-        )
+        entry = _INTERNAL_ERROR_RESPONSE
+    
+    status_code, code, message = entry
+    return HTTPException(
+        status_code=status_code,
+        detail={
+            "error": code,
+            "message": message or str(error),
+            "request_id": request_id
+        }
+    )
 
 
 @router.post(
     "/analyze",
-    response_model=AnalysisResponse,
+    response_model=None,  # Resposta já serializada; schema apenas para o OpenAPI
+    responses={200: {"model": AnalysisResponse}},
     status_code=status.HTTP_200_OK,
     summary="Analisar sentimento de texto",
     description="Executa análise de sentimento em um texto individual",
     response_description="Resultado da análise com sentimento, confiança e idioma"
 )
-@rate_limit(requests_per_minute=100, requests_per_hour=1000)
+@rate_limit(**ANALYZE_RATE_LIMIT)
 async def analyze_sentiment(
     analysis_request: AnalysisRequest,
-    background_tasks: BackgroundTasks,
     http_request: Request,
     db: Session = Depends(get_db_session),
-    sentiment_service: SentimentService = Depends(get_sentiment_service),
-    settings: Settings = Depends(get_settings)
-) -> AnalysisResponse:
+    sentiment_service: SentimentService = Depends(get_sentiment_service)
+) -> Response:
     """
     Analisa sentimento de um texto individual.
     
@@ -167,47 +249,39 @@ async def analyze_sentiment(
             save_to_db=True
         )
         
-        # Converter para response schema
-        response = AnalysisResponse(
+        # Converter para response schema (resultado já validado pelo serviço)
+        response = build_analysis_response(
+            result,
             text=analysis_request.text if settings.debug else None,  # Texto apenas em debug
-            sentiment=result["sentiment"],
-            confidence=result["confidence"],
-            language=result["language"],
-            all_scores=[
-                {"label": score["label"], "score": score["score"]}
-                for score in result.get("all_scores", [])
-            ],
-            processing_time_ms=result.get("response_time_ms"),
-            cached=result.get("cached", False)
+            processing_time_ms=result.get("response_time_ms")
         )
         
-        # Background analytics
+        # Analytics
         processing_time = (time.time() - start_time) * 1000
-        background_tasks.add_task(
-            log_analysis_stats,
+        log_analysis_stats(
             endpoint="analyze",
             success=True,
             processing_time=processing_time
         )
         
-        return response
+        return Response(content=response.model_dump_json(), media_type="application/json")
         
     except Exception as error:
-        # Background analytics para erro
+        # Analytics de erro
         processing_time = (time.time() - start_time) * 1000
-        background_tasks.add_task(
-            log_analysis_stats,
+        log_analysis_stats(
             endpoint="analyze",
             success=False,
             processing_time=processing_time
         )
         
-        raise await handle_sentiment_error(error, request_id)
+        raise handle_sentiment_error(error, request_id)
 
 
 @router.post(
     "/analyze-batch",
-    response_model=BatchResponse,
+    response_model=None,  # Resposta já serializada; schema apenas para o OpenAPI
+    responses={200: {"model": BatchResponse}},
     status_code=status.HTTP_200_OK,
     summary="Analisar sentimentos em lote",
     description="Executa análise de sentimento em múltiplos textos",
@@ -216,12 +290,10 @@ async def analyze_sentiment(
 @rate_limit(requests_per_minute=20, requests_per_hour=200)  # Limite menor para batch
 async def analyze_batch_sentiment(
     batch_request: BatchRequest,
-    background_tasks: BackgroundTasks,
     http_request: Request,
     db: Session = Depends(get_db_session),
-    sentiment_service: SentimentService = Depends(get_sentiment_service),
-    settings: Settings = Depends(get_settings)
-) -> BatchResponse:
+    sentiment_service: SentimentService = Depends(get_sentiment_service)
+) -> Response:
     """
     Analisa sentimento de múltiplos textos em lote.
     
@@ -242,54 +314,69 @@ async def analyze_batch_sentiment(
             max_batch_size=settings.ml.batch_size
         )
         
-        # Converter para response schemas
-        analysis_responses = []
-        for i, result in enumerate(results):
-            response = AnalysisResponse(
-                text=batch_request.texts[i] if settings.debug else None,
-                sentiment=result["sentiment"],
-                confidence=result["confidence"],
-                language=result["language"],
-                all_scores=[
-                    {"label": score["label"], "score": score["score"]}
-                    for score in result.get("all_scores", [])
-                ],
-                cached=result.get("cached", False)
-            )
-            analysis_responses.append(response)
+        # Payload montado direto em dicts (mesmo formato de BatchResponse)
+        # e serializado pelo orjson numa única passada
+        timestamp = datetime.utcnow().isoformat()
+        include_text = settings.debug
+        # IDs = prefixo aleatório do lote + índice: uma leitura de urandom
+        # por lote em vez de uma por item (mesmo formato de 32 hex)
+        id_prefix = secrets.token_hex(12)
+        payload_results = [
+            {
+                "id": f"{id_prefix}{i:08x}",
+                "text": batch_request.texts[i] if include_text else None,
+                "sentiment": result["sentiment"],
+                "confidence": result["confidence"],
+                "language": result["language"],
+                "all_scores": result.get("all_scores") or [],
+                "timestamp": timestamp,
+                "processing_time_ms": None,
+                "cached": result.get("cached", False)
+            }
+            for i, result in enumerate(results)
+        ]
         
         processing_time = (time.time() - start_time) * 1000
         
-        batch_response = BatchResponse(
-            results=analysis_responses,
-            total_processed=len(analysis_responses),
-            processing_time_ms=processing_time
-        )
-        
-        # Background analytics
-        background_tasks.add_task(
-            log_analysis_stats,
+        # Analytics
+        log_analysis_stats(
             endpoint="analyze-batch",
             success=True,
             processing_time=processing_time,
             text_count=len(batch_request.texts)
         )
         
-        return batch_response
+        return ORJSONResponse({
+            "results": payload_results,
+            "total_processed": len(payload_results),
+            "processing_time_ms": processing_time
+        })
         
     except Exception as error:
-        # Background analytics para erro
+        # Analytics de erro
         processing_time = (time.time() - start_time) * 1000
-        background_tasks.add_task(
-            log_analysis_stats,
+        log_analysis_stats(
             endpoint="analyze-batch",
             success=False,
             processing_time=processing_time,
             text_count=len(batch_request.texts)
-
         )
         
-        raise await handle_sentiment_error(error, request_id)
+        raise handle_sentiment_error(error, request_id)
+
+
+# Resultado do health check reaproveitado por um curto período
+HEALTH_CACHE_TTL = 2.0
+_health_cache = {"checked_at": 0.0, "response": None}
+
+
+def _probe_database(db: Session) -> bool:
+    """Teste simples de conectividade do banco (executado em thread)."""
+    try:
+        db.execute(text("SELECT 1")).scalar()  # FIXED: Added text() wrapper
+        return True
+    except Exception:
+        return False
 
 
 @router.get(
@@ -309,20 +396,21 @@ async def health_check(
     
     Retorna status dos componentes: modelo ML, cache, banco de dados.
     """
+    now = time.monotonic()
+    if _health_cache["response"] is not None and now - _health_cache["checked_at"] < HEALTH_CACHE_TTL:
+        return _health_cache["response"]
+    
     try:
         # Verificar modelo ML
         model_info = sentiment_service.analyzer.get_model_info()
         model_available = model_info.get("model_loaded", False)
         
-        # Verificar cache
-        cache_available = await sentiment_service.cache_service.ping()
-        
-        # Verificar banco (teste simples)
-        try:
-            db.execute(text("SELECT 1")).scalar()  # FIXED: Added text() wrapper
-            db_available = True
-        except Exception:
-            db_available = False
+        # Verificar cache e banco concorrentemente (probe do banco fora do event loop)
+        cache_available, db_available, cache_stats = await asyncio.gather(
+            sentiment_service.cache_service.ping(),
+            asyncio.to_thread(_probe_database, db),
+            sentiment_service.cache_service.get_stats()
+        )
         
         # Determinar status geral
         if model_available and db_available:
@@ -332,10 +420,7 @@ async def health_check(
         else:
             overall_status = "unhealthy"
         
-        # Obter estatísticas do cache
-        cache_stats = await sentiment_service.cache_service.get_stats()
-        
-        return HealthResponse(
+        response = HealthResponse(
             status=overall_status,
             services={
                 "ml_model": "healthy" if model_available else "unhealthy",
@@ -346,6 +431,9 @@ async def health_check(
             cache_stats=cache_stats
         )
         
+        _health_cache.update(checked_at=now, response=response)
+        return response
+        
     except Exception as e:
         return HealthResponse(
             status="unhealthy",
@@ -364,7 +452,7 @@ async def health_check(
 async def get_service_statistics(
     db: Session = Depends(get_db_session),
     sentiment_service: SentimentService = Depends(get_sentiment_service)
-) -> dict:
+) -> ORJSONResponse:
     """
     Retorna estatísticas completas do serviço.
     
@@ -372,7 +460,7 @@ async def get_service_statistics(
     """
     try:
         stats = await sentiment_service.get_statistics(db)
-        return stats
+        return ORJSONResponse(stats)
         
     except Exception as e:
         raise HTTPException(
@@ -381,4 +469,35 @@ async def get_service_statistics(
                 "error": "STATS_ERROR",
                 "message": f"Erro ao obter estatísticas: {str(e)}"
             }
+        )
+
+
+@router.get(
+    "/recent",
+    summary="Análises recentes",
+    description="Retorna resumos das análises mais recentes",
+    response_class=Response,
+    responses={200: {"content": {"application/json": {}}}},
+    dependencies=[Depends(rate_limit(requests_per_minute=30))]
+)
+async def get_recent_analyses(
+    limit: int = Query(default=10, ge=1, le=100, description="Quantidade de análises"),
+    db: Session = Depends(get_db_session)
+) -> Response:
+    """
+    Retorna resumos das análises mais recentes.
+    
+    O JSON é montado pelo banco e repassado sem re-serialização.
+    """
+    try:
+        content = get_sentiment_repository(db).get_recent_as_json(limit)
+        return Response(content=content, media_type="application/json")
+        
+    except DatabaseError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={
+                "error": "DATABASE_ERROR",
+                "message": f"Erro ao obter análises recentes: {str(e)}"
+            }
         )
\ No newline at end of file
@@ -1,8 +1,9 @@
-import uuid
+import secrets
 from datetime import datetime
 from typing import Annotated, Any, Dict, List, Literal, Optional
 
 from pydantic import BaseModel, Field, field_validator, model_validator
+from typing_extensions import TypedDict
 
 
 class AnalysisRequest(BaseModel):
@@ -22,17 +23,18 @@ class AnalysisRequest(BaseModel):
     @classmethod
     def validate_text(cls, v: str) -> str:
         """Valida e limpa o texto de entrada."""
-        if not v or not v.strip():
+        if not v:
             raise ValueError("Texto não pode estar vazio")
         
-        cleaned = v.strip()
-        if len(cleaned) < 1:
-            raise ValueError("Texto deve ter pelo menos 1 caractere")
+        # strip() só quando há espaço nas bordas (caso raro)
+        if v[0].isspace() or v[-1].isspace():
+            v = v.strip()
+            if not v:
+                raise ValueError("Texto não pode estar vazio")
         
-        return cleaned
+        return v
     
     model_config = {
-        "str_strip_whitespace": True,
         "validate_assignment": True,
         "extra": "forbid"
     }
@@ -54,34 +56,27 @@ class BatchRequest(BaseModel):
     @field_validator("texts")
     @classmethod
     def validate_texts(cls, v: List[str]) -> List[str]:
-        """Valida lista de textos."""
-        if not v:
-            raise ValueError("Lista de textos não pode estar vazia")
-        
-        if len(v) > 50:
-            raise ValueError("Máximo de 50 textos por lote")
-        
+        """Valida e limpa a lista de textos em uma única passada."""
+        # Tamanho da lista já garantido por min_length/max_length
         cleaned_texts = []
         for i, text in enumerate(v):
-            if not text or not text.strip():
+            cleaned = text.strip() if text else ""
+            if not cleaned:
                 raise ValueError(f"Texto {i+1} está vazio")
-            
-            cleaned = text.strip()
             if len(cleaned) > 2000:
                 raise ValueError(f"Texto {i+1} excede 2000 caracteres")
-            
             cleaned_texts.append(cleaned)
         
         return cleaned_texts
     
     model_config = {
-        "str_strip_whitespace": True,
         "validate_assignment": True,
         "extra": "forbid"
     }
 
 
-class SentimentScore(BaseModel):
+# TypedDict: os dicts produzidos pelo serviço entram nas respostas como estão
+class SentimentScore(TypedDict):
     """Score individual de sentimento."""
     
     label: Literal["positive", "negative", "neutral"]
@@ -101,7 +96,7 @@ class AnalysisResponse(BaseModel):
     id: Annotated[
         str,
         Field(description="ID único da análise")
-    ] = Field(default_factory=lambda: str(uuid.uuid4()))
+    ] = Field(default_factory=lambda: secrets.token_hex(16))
     
     text: Annotated[
         Optional[str],
@@ -154,9 +149,6 @@ class AnalysisResponse(BaseModel):
     )
     
     model_config = {
-        "json_encoders": {
-            datetime: lambda v: v.isoformat()
-        },
         "extra": "forbid"
     }
 
@@ -184,12 +176,14 @@ class BatchResponse(BaseModel):
         )
     ] = None
     
-    @model_validator(mode="after")
-    def validate_consistency(self) -> "BatchResponse":
-        """Valida consistência entre resultados e contadores."""
-        if len(self.results) != self.total_processed:
-            raise ValueError("Inconsistência entre resultados e contador")
-        return self
+    # Checagem de erro de programação: omitida em execução otimizada (python -O)
+    if __debug__:
+        @model_validator(mode="after")
+        def validate_consistency(self) -> "BatchResponse":
+            """Valida consistência entre resultados e contadores."""
+            if len(self.results) != self.total_processed:
+                raise ValueError("Inconsistência entre resultados e contador")
+            return self
     
     model_config = {
         "extra": "forbid"
@@ -215,9 +209,6 @@ class HealthResponse(BaseModel):
     version: str = Field(default="1.0.0")
     
     model_config = {
-        "json_encoders": {
-            datetime: lambda v: v.isoformat()
-        },
         "extra": "allow"  # Permite campos adicionais para flexibilidade
     }
 
@@ -267,9 +258,6 @@ class ErrorResponse(BaseModel):
     )
     
     model_config = {
-        "json_encoders": {
-            datetime: lambda v: v.isoformat()
-        },
         "extra": "forbid"
     }
 
@@ -1,25 +1,112 @@
-import hashlib
+import asyncio
 import logging
 import time
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
+from sqlalchemy import and_, func, or_, select
 from sqlalchemy.orm import Session
 
 from app.config import get_settings
 from app.core.cache import CacheService
+from app.core.protocols import BatchCacheProtocol
 from app.core.exceptions import (
     DatabaseError,
     InvalidTextError,
     MLError,
+    ValidationError,
     raise_for_text_validation,
 )
-from app.sentiment.analyzer import get_sentiment_analyzer
-from app.sentiment.models import SentimentAnalysis
+from app.sentiment.analyzer import get_sentiment_analyzer, run_inference
+from app.sentiment.batcher import get_dynamic_batcher
+from app.sentiment.models import (
+    SCORE_LABELS,
+    SentimentAnalysis,
+    SentimentFeedback,
+    compute_text_hash,
+    scores_from_soa,
+    scores_to_soa,
+)
+from app.sentiment.repository import get_sentiment_repository
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# Chaves de cache usam o mesmo hash da coluna text_hash (calculado uma vez)
+CACHE_KEY_PREFIX = "sentiment:analysis:"
+
+# Estatísticas do banco toleram atraso curto; evita varreduras a cada /stats
+STATS_CACHE_KEY = "stats:global"
+STATS_CACHE_TTL = 30
+
+# Scores no cache em ponto fixo (4 casas decimais, mesma precisão de confidence)
+SCORE_SCALE = 10000
+
+# Cursor do histórico: "<created_at ISO>|<id>"
+HISTORY_CURSOR_SEPARATOR = "|"
+
+TEXT_PREVIEW_LENGTH = 100
+
+_HISTORY_COLUMNS = (
+    SentimentAnalysis.id,
+    SentimentAnalysis.sentiment,
+    SentimentAnalysis.confidence,
+    SentimentAnalysis.language,
+    func.substr(SentimentAnalysis.text, 1, TEXT_PREVIEW_LENGTH).label("text_preview"),
+    SentimentAnalysis.text_length,
+    SentimentAnalysis.created_at,
+    SentimentAnalysis.all_scores,
+)
+
+
+def _decode_history_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Converte o cursor do histórico em (created_at, id)."""
+    created_at, separator, record_id = cursor.partition(HISTORY_CURSOR_SEPARATOR)
+    try:
+        if not separator or not record_id:
+            raise ValueError("separador ausente")
+        return datetime.fromisoformat(created_at), record_id
+    except ValueError as e:
+        raise ValidationError(
+            field="cursor", value=cursor, message="Cursor de paginação inválido"
+        ) from e
+
+
+def _compact_cache_payload(cache_payload: Dict[str, Any], all_scores: List[Dict[str, Any]]) -> None:
+    """Converte o payload do cache para a forma compacta (SoA, ponto fixo int)."""
+    cache_payload["confidence_q"] = round(cache_payload.pop("confidence") * SCORE_SCALE)
+    scores_soa = scores_to_soa(all_scores)
+    scores_soa["scores"] = [round(score * SCORE_SCALE) for score in scores_soa["scores"]]
+    cache_payload["scores_soa"] = scores_soa
+
+
+def _restore_cached_payload(cached_result: Dict[str, Any]) -> Dict[str, Any]:
+    """Restaura `confidence` e `all_scores` (lista de {label, score}) de um payload do cache."""
+    confidence_q = cached_result.pop("confidence_q", None)
+    scores_soa = cached_result.pop("scores_soa", None)
+    if scores_soa is not None:
+        if confidence_q is not None:
+            scores_soa["scores"] = [score / SCORE_SCALE for score in scores_soa["scores"]]
+        cached_result["all_scores"] = scores_from_soa(scores_soa)
+    if confidence_q is not None:
+        cached_result["confidence"] = confidence_q / SCORE_SCALE
+    return cached_result
+
+
+class ServiceMetrics:
+    """Contadores do serviço (atributos com __slots__, sem lookups de dict)."""
+    
+    __slots__ = ("cache_hits", "cache_misses", "analyses_performed", "errors")
+    
+    def __init__(self):
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.analyses_performed = 0
+        self.errors = 0
+    
+    def to_dict(self) -> Dict[str, int]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
 
 class SentimentService:
     """Serviço de análise de sentimentos com integração ML+Cache+Database."""
@@ -27,18 +114,12 @@ class SentimentService:
     def __init__(self, cache_service: CacheService):
         self.cache_service = cache_service
         self.analyzer = get_sentiment_analyzer()
-        self._stats = {
-            "cache_hits": 0,
-            "cache_misses": 0,
-            "analyses_performed": 0,
-            "errors": 0,
-        }
+        self._stats = ServiceMetrics()
         logger.info("SentimentService inicializado")
     
     def _generate_cache_key(self, text: str) -> str:
-        """Gera chave de cache determinística para o texto."""
-        text_hash = hashlib.md5(text.encode('utf-8')).hexdigest()
-        return f"sentiment:analysis:{text_hash}"
+        """Gera chave de cache determinística para o texto (BLAKE2b-128)."""
+        return CACHE_KEY_PREFIX + compute_text_hash(text)
     
     def _should_cache_result(self, result: Dict[str, Any]) -> bool:
         """Determina se resultado deve ser cacheado."""
@@ -48,6 +129,92 @@ class SentimentService:
             and len(result.get("sentiment", "")) > 0
         )
     
+    def _cacheable_flags(self, ml_results: List[Dict[str, Any]]) -> List[bool]:
+        """Aplica o critério de `_should_cache_result` ao lote numa única passada."""
+        threshold = settings.ml.confidence_threshold
+        return [
+            result.get("confidence", 0.0) >= threshold
+            and not result.get("error")
+            and bool(result.get("sentiment"))
+            for result in ml_results
+        ]
+    
+    async def get_cached_analysis(
+        self,
+        cache_key: str,
+        start_time: float
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Busca análise no cache.
+        
+        Args:
+            cache_key: Chave gerada por _generate_cache_key
+            start_time: Início da requisição (para response_time_ms)
+        
+        Returns:
+            Resultado marcado como cached ou None em miss/erro
+        """
+        try:
+            cached_result = await self.cache_service.get(cache_key)
+        except Exception as e:
+            logger.warning(f"Erro ao buscar no cache: {e}")
+            return None
+        
+        if not cached_result:
+            return None
+        
+        self._stats.cache_hits += 1
+        logger.debug("Cache hit para análise de sentimentos")
+        
+        _restore_cached_payload(cached_result)
+        
+        # Adicionar métricas de performance
+        cached_result["cached"] = True
+        cached_result["response_time_ms"] = round((time.time() - start_time) * 1000, 2)
+        
+        return cached_result
+    
+    async def _cache_get_many(self, keys: List[str]) -> List[Optional[Any]]:
+        """Lê várias chaves: MGET se suportado, senão gets concorrentes."""
+        if isinstance(self.cache_service, BatchCacheProtocol):
+            return await self.cache_service.mget(keys)
+        
+        results = await asyncio.gather(
+            *(self.cache_service.get(key) for key in keys),
+            return_exceptions=True
+        )
+        return [None if isinstance(r, Exception) else r for r in results]
+    
+    async def _cache_set_many(self, items: Dict[str, Any]) -> None:
+        """Grava várias chaves: pipeline se suportado, senão sets concorrentes."""
+        if isinstance(self.cache_service, BatchCacheProtocol):
+            await self.cache_service.set_many(items)
+            return
+        
+        results = await asyncio.gather(
+            *(self.cache_service.set(key, value) for key, value in items.items()),
+            return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                logger.warning(f"Erro ao cachear resultado: {result}")
+    
+    async def _run_inference(self, text: str) -> Dict[str, Any]:
+        """
+        Executa inferência, agrupando requisições concorrentes no batcher.
+        
+        Sem batcher ativo, analisa diretamente. Itens que falham no lote são
+        reprocessados individualmente para propagar a exceção original.
+        """
+        batcher = get_dynamic_batcher()
+        if batcher is None:
+            return await run_inference(self.analyzer.analyze, text)
+        
+        result = await batcher.submit(self.analyzer, text)
+        if result.get("error"):
+            return await run_inference(self.analyzer.analyze, text)
+        return result
+    
     async def analyze_text(
         self, 
         text: str, 
@@ -78,63 +245,58 @@ class SentimentService:
             )
             
             text_normalized = text.strip()
-            cache_key = self._generate_cache_key(text_normalized)
+            text_hash = compute_text_hash(text_normalized)
+            cache_key = CACHE_KEY_PREFIX + text_hash
             
             # 1. Verificar cache
-            cached_result = None
             if use_cache:
-                try:
-                    cached_result = await self.cache_service.get(cache_key)
-                    if cached_result:
-                        self._stats["cache_hits"] += 1
-                        logger.debug(f"Cache hit para análise de sentimentos")
-                        
-                        # Adicionar métricas de performance
-                        cached_result["cached"] = True
-                        cached_result["response_time_ms"] = round((time.time() - start_time) * 1000, 2)
-                        
-                        return cached_result
-                except Exception as e:
-                    logger.warning(f"Erro ao buscar no cache: {e}")
+                cached_result = await self.get_cached_analysis(cache_key, start_time)
+                if cached_result:
+                    return cached_result
             
-            self._stats["cache_misses"] += 1
+            self._stats.cache_misses += 1
             
             # 2. Executar análise de ML
             logger.debug("Executando análise de ML")
-            ml_result = self.analyzer.analyze(text_normalized)
+            ml_result = await self._run_inference(text_normalized)
             
-            # 3. Preparar resultado para persistência
-            analysis_result = {
-                "text": text_normalized,
+            # 3. Preparar resultado (payload do cache não inclui o texto, por privacidade)
+            all_scores = ml_result.get("all_scores", [])
+            now = time.time()  # uma leitura de relógio para duração e timestamp
+            cache_payload = {
                 "sentiment": ml_result["sentiment"],
                 "confidence": ml_result["confidence"],
                 "language": ml_result["language"],
-                "all_scores": ml_result.get("all_scores", []),
                 "cached": False,
-                "response_time_ms": round((time.time() - start_time) * 1000, 2),
-                "timestamp": datetime.utcnow().isoformat()
+                "response_time_ms": round((now - start_time) * 1000, 2),
+                "timestamp": datetime.utcfromtimestamp(now).isoformat()
             }
+            analysis_result = {"text": text_normalized, **cache_payload, "all_scores": all_scores}
+            _compact_cache_payload(cache_payload, all_scores)
             
             # 4. Salvar no banco de dados
             if save_to_db:
                 try:
-                    db_record = SentimentAnalysis(
-                        text=text_normalized,
-                        sentiment=ml_result["sentiment"],
-                        confidence=ml_result["confidence"],
-                        language=ml_result["language"],
-                        all_scores=ml_result.get("all_scores", [])
+                    # INSERT Core (sem instância ORM), executado em thread
+                    record_ids = await asyncio.to_thread(
+                        get_sentiment_repository(db).bulk_create,
+                        [{
+                            "text": text_normalized,
+                            "text_hash": text_hash,
+                            "sentiment": ml_result["sentiment"],
+                            "confidence": ml_result["confidence"],
+                            "language": ml_result["language"],
+                            "all_scores": ml_result.get("all_scores", [])
+                        }]
                     )
+                    record_id = record_ids[0]
                     
-                    db.add(db_record)
-                    db.commit()
-                    
-                    analysis_result["record_id"] = str(db_record.id)
-                    logger.debug(f"Análise salva no banco: {db_record.id}")
+                    analysis_result["record_id"] = cache_payload["record_id"] = record_id
+                    logger.debug(f"Análise salva no banco: {record_id}")
                     
                 except Exception as e:
                     logger.error(f"Erro ao salvar no banco: {e}")
-                    db.rollback()
+                    await asyncio.to_thread(db.rollback)
                     raise DatabaseError(
                         message=f"Falha ao persistir análise: {str(e)}",
                         details={"text_length": len(text_normalized)}
@@ -143,29 +305,25 @@ class SentimentService:
             # 5. Atualizar cache
             if use_cache and self._should_cache_result(ml_result):
                 try:
-                    # Criar versão para cache (sem dados sensíveis)
-                    cache_data = analysis_result.copy()
-                    cache_data.pop("text", None)  # Não cachear texto original por privacidade
-                    
                     await self.cache_service.set(
                         cache_key, 
-                        cache_data,
+                        cache_payload,
                         ttl=settings.cache.default_ttl
                     )
                     logger.debug("Resultado cacheado")
                 except Exception as e:
                     logger.warning(f"Erro ao cachear resultado: {e}")
             
-            self._stats["analyses_performed"] += 1
+            self._stats.analyses_performed += 1
             logger.info(f"Análise concluída: {ml_result['sentiment']} ({ml_result['confidence']:.3f})")
             
             return analysis_result
             
         except (InvalidTextError, MLError, DatabaseError):
-            self._stats["errors"] += 1
+            self._stats.errors += 1
             raise
         except Exception as e:
-            self._stats["errors"] += 1
+            self._stats.errors += 1
             logger.error(f"Erro inesperado no serviço de sentimentos: {e}")
             raise MLError(
                 message=f"Falha no serviço de análise: {str(e)}",
@@ -196,14 +354,17 @@ class SentimentService:
         if not texts:
             return []
         
+        ml_config = settings.ml
         batch_size = min(
             len(texts), 
-            max_batch_size or settings.ml.batch_size
+            max_batch_size or ml_config.batch_size
         )
         
         logger.info(f"Processando lote de {len(texts)} textos (batch_size: {batch_size})")
         
         results = []
+        min_length = ml_config.min_text_length
+        max_length = ml_config.max_text_length
         
         # Processar em lotes menores se necessário
         for i in range(0, len(texts), batch_size):
@@ -212,66 +373,107 @@ class SentimentService:
             
             # Verificar cache para todo o lote primeiro
             cache_hits = {}
-            cache_misses = []
+            cache_misses = []  # (idx, texto normalizado, hash ou None)
             
             if use_cache:
+                lookups = []
                 for idx, text in enumerate(batch):
-                    try:
-                        raise_for_text_validation(text, settings.ml.min_text_length, settings.ml.max_text_length)
-                        cache_key = self._generate_cache_key(text.strip())
-                        cached_result = await self.cache_service.get(cache_key)
-                        
-                        if cached_result:
-                            cache_hits[idx] = cached_result
-                        else:
-                            cache_misses.append((idx, text.strip()))
-                    except Exception as e:
-                        logger.warning(f"Erro na validação/cache do texto {i+idx}: {e}")
-                        cache_misses.append((idx, text))
+                    # Verificação inline; a validação completa só roda para montar o erro
+                    text_normalized = text.strip() if isinstance(text, str) else ""
+                    if not text_normalized or not min_length <= len(text_normalized) <= max_length:
+                        try:
+                            raise_for_text_validation(text, min_length, max_length)
+                        except Exception as e:
+                            logger.warning(f"Erro na validação do texto {i+idx}: {e}")
+                        cache_misses.append((idx, text, None))
+                        continue
+                    lookups.append((idx, text_normalized, compute_text_hash(text_normalized)))
+                
+                # Uma única ida ao cache para todo o lote (MGET)
+                try:
+                    cached_results = await self._cache_get_many(
+                        [CACHE_KEY_PREFIX + text_hash for _, _, text_hash in lookups]
+                    )
+                except Exception as e:
+                    logger.warning(f"Erro ao buscar lote no cache: {e}")
+                    cached_results = [None] * len(lookups)
+                
+                for lookup, cached_result in zip(lookups, cached_results):
+                    if cached_result:
+                        cache_hits[lookup[0]] = _restore_cached_payload(cached_result)
+                    else:
+                        cache_misses.append(lookup)
+                
+                cache_misses.sort(key=lambda miss: miss[0])
             else:
-                cache_misses = [(idx, text.strip()) for idx, text in enumerate(batch)]
+                cache_misses = [(idx, text.strip(), None) for idx, text in enumerate(batch)]
             
             # Processar textos não encontrados no cache
             if cache_misses:
-                miss_texts = [text for _, text in cache_misses]
+                # Textos repetidos no lote são inferidos, salvos e cacheados uma única vez
+                unique_positions: Dict[str, int] = {}
+                miss_positions = [
+                    unique_positions.setdefault(text, len(unique_positions))
+                    for _, text, _ in cache_misses
+                ]
+                miss_texts = list(unique_positions)
+                to_cache = {}
+                to_save = []  # (dicts que recebem record_id, mapping) para bulk_create
+                processed = {}  # posição única -> dicts que recebem record_id
+                batch_timestamp = datetime.utcnow().isoformat()  # um por lote
                 
                 try:
-                    ml_results = self.analyzer.analyze_batch(miss_texts)
+                    ml_results = await run_inference(self.analyzer.analyze_batch, miss_texts)
+                    cacheable = self._cacheable_flags(ml_results) if use_cache else [False] * len(ml_results)
                     
                     # Salvar resultados no banco e cache
-                    for (original_idx, text), ml_result in zip(cache_misses, ml_results):
+                    for (original_idx, text, text_hash), position in zip(cache_misses, miss_positions):
                         try:
-                            # Preparar resultado
-                            analysis_result = {
-                                "text": text,
+                            ml_result = ml_results[position]
+                            
+                            # Preparar resultado (payload do cache sem texto nem posição no lote)
+                            all_scores = ml_result.get("all_scores", [])
+                            cache_payload = {
                                 "sentiment": ml_result["sentiment"],
                                 "confidence": ml_result["confidence"],
                                 "language": ml_result["language"],
-                                "all_scores": ml_result.get("all_scores", []),
                                 "cached": False,
-                                "batch_index": original_idx,
-                                "timestamp": datetime.utcnow().isoformat()
+                                "timestamp": batch_timestamp
                             }
+                            analysis_result = {
+                                "text": text,
+                                **cache_payload,
+                                "all_scores": all_scores,
+                                "batch_index": original_idx
+                            }
+                            
+                            # Duplicata: reaproveita registro e entrada de cache da primeira ocorrência
+                            targets = processed.get(position)
+                            if targets is not None:
+                                targets.append(analysis_result)
+                                cache_hits[original_idx] = analysis_result
+                                continue
+                            
+                            _compact_cache_payload(cache_payload, all_scores)
+                            targets = processed[position] = [analysis_result, cache_payload]
                             
                             # Salvar no banco
+                            # Hash calculado uma única vez na consulta ao cache
+                            text_hash = text_hash or compute_text_hash(text)
+                            
                             if save_to_db and not ml_result.get("error"):
-                                db_record = SentimentAnalysis(
-                                    text=text,
-                                    sentiment=ml_result["sentiment"],
-                                    confidence=ml_result["confidence"],
-                                    language=ml_result["language"],
-                                    all_scores=ml_result.get("all_scores", [])
-                                )
-                                db.add(db_record)
-                                analysis_result["record_id"] = str(db_record.id)
+                                to_save.append((targets, {
+                                    "text": text,
+                                    "text_hash": text_hash,
+                                    "sentiment": ml_result["sentiment"],
+                                    "confidence": ml_result["confidence"],
+                                    "language": ml_result["language"],
+                                    "all_scores": ml_result.get("all_scores", [])
+                                }))
                             
-                            # Cachear se adequado
-                            if use_cache and self._should_cache_result(ml_result):
-                                cache_key = self._generate_cache_key(text)
-                                cache_data = analysis_result.copy()
-                                cache_data.pop("text", None)
-                                
-                                await self.cache_service.set(cache_key, cache_data)
+                            # Cachear se adequado (gravado em lote após o loop)
+                            if cacheable[position]:
+                                to_cache[CACHE_KEY_PREFIX + text_hash] = cache_payload
                             
                             cache_hits[original_idx] = analysis_result
                             
@@ -285,18 +487,30 @@ class SentimentService:
                                 "batch_index": original_idx
                             }
                     
-                    # Commit das operações de banco em lote
-                    if save_to_db:
+                    # Inserção em lote (executemany, IDs gerados no cliente)
+                    if to_save:
+                        try:
+                            record_ids = await asyncio.to_thread(
+                                get_sentiment_repository(db).bulk_create,
+                                [mapping for _, mapping in to_save]
+                            )
+                            for (targets, _), record_id in zip(to_save, record_ids):
+                                for target in targets:
+                                    target["record_id"] = record_id
+                        except DatabaseError as e:
+                            logger.error(f"Erro ao salvar lote: {e}")
+                    
+                    # Escrita no cache em um único round-trip (pipeline)
+                    if to_cache:
                         try:
-                            db.commit()
+                            await self._cache_set_many(to_cache)
                         except Exception as e:
-                            logger.error(f"Erro ao committar lote: {e}")
-                            db.rollback()
+                            logger.warning(f"Erro ao cachear lote: {e}")
                 
                 except Exception as e:
                     logger.error(f"Erro ao processar lote de ML: {e}")
                     # Preencher com resultados de erro
-                    for original_idx, text in cache_misses:
+                    for original_idx, _, _ in cache_misses:
                         cache_hits[original_idx] = {
                             "sentiment": "neutral",
                             "confidence": 0.0,
@@ -306,6 +520,7 @@ class SentimentService:
                         }
             
             # Montar resultados ordenados
+            chunk_hits = 0
             for idx in range(len(batch)):
                 result = cache_hits.get(idx, {
                     "sentiment": "neutral",
@@ -316,13 +531,15 @@ class SentimentService:
                 })
                 
                 if result.get("cached"):
-                    self._stats["cache_hits"] += 1
-                else:
-                    self._stats["cache_misses"] += 1
-                    self._stats["analyses_performed"] += 1
+                    chunk_hits += 1
                 
                 batch_results.append(result)
             
+            # Contadores atualizados uma vez por lote
+            self._stats.cache_hits += chunk_hits
+            self._stats.cache_misses += len(batch) - chunk_hits
+            self._stats.analyses_performed += len(batch) - chunk_hits
+            
             results.extend(batch_results)
         
         logger.info(f"Lote processado: {len(results)} resultados")
@@ -334,39 +551,74 @@ class SentimentService:
         limit: int = 100,
         offset: int = 0,
         sentiment_filter: Optional[str] = None,
-        language_filter: Optional[str] = None
+        language_filter: Optional[str] = None,
+        cursor: Optional[str] = None,
+        include_total: bool = False
     ) -> Dict[str, Any]:
         """
-        Recupera histórico de análises com filtros.
+        Recupera histórico de análises com filtros (keyset pagination).
+        
+        Com `cursor` a consulta faz seek em (created_at, id) em vez de OFFSET;
+        sem cursor, `offset` ainda é aceito para a primeira navegação.
         
         Args:
             db: Sessão do banco
             limit: Limite de resultados
-            offset: Offset para paginação
+            offset: Offset para paginação (ignorado quando há cursor)
             sentiment_filter: Filtro por sentimento
             language_filter: Filtro por idioma
+            cursor: `next_cursor` retornado pela página anterior
+            include_total: Se deve contar o total (COUNT adicional)
             
         Returns:
             Dict com resultados e metadados
         """
+        cursor_position = _decode_history_cursor(cursor) if cursor else None
+        
         try:
-            query = db.query(SentimentAnalysis)
+            # Projeção apenas das colunas usadas; o texto chega truncado do banco
+            stmt = select(*_HISTORY_COLUMNS)
             
             # Aplicar filtros
+            conditions = []
             if sentiment_filter:
-                query = query.filter(SentimentAnalysis.sentiment == sentiment_filter)
+                conditions.append(SentimentAnalysis.sentiment == sentiment_filter)
             
             if language_filter:
-                query = query.filter(SentimentAnalysis.language == language_filter)
+                conditions.append(SentimentAnalysis.language == language_filter)
             
-            # Ordenar por timestamp decrescente
-            query = query.order_by(SentimentAnalysis.created_at.desc())
+            if conditions:
+                stmt = stmt.where(*conditions)
             
-            # Contar total
-            total_count = query.count()
+            count_stmt = (
+                select(func.count(SentimentAnalysis.id)).where(*conditions)
+                if include_total else None
+            )
+            
+            # Ordenar por timestamp decrescente (id como desempate estável)
+            stmt = stmt.order_by(
+                SentimentAnalysis.created_at.desc(), SentimentAnalysis.id.desc()
+            )
             
             # Aplicar paginação
-            records = query.offset(offset).limit(limit).all()
+            if cursor_position:
+                cursor_created_at, cursor_id = cursor_position
+                stmt = stmt.where(or_(
+                    SentimentAnalysis.created_at < cursor_created_at,
+                    and_(
+                        SentimentAnalysis.created_at == cursor_created_at,
+                        SentimentAnalysis.id < cursor_id
+                    )
+                ))
+            elif offset:
+                stmt = stmt.offset(offset)
+            
+            # limit + 1 para detectar próxima página sem COUNT (consultas em thread)
+            total_count, records = await asyncio.to_thread(
+                self._fetch_history_page, db, stmt.limit(limit + 1), count_stmt
+            )
+            has_more = len(records) > limit
+            records = records[:limit]
             
             # Converter para dict
             results = [
@@ -375,19 +627,29 @@ class SentimentService:
                     "sentiment": record.sentiment,
                     "confidence": record.confidence,
                     "language": record.language,
-                    "text_preview": record.text[:100] + "..." if len(record.text) > 100 else record.text,
+                    "text_preview": (
+                        record.text_preview + "..."
+                        if (record.text_length or 0) > TEXT_PREVIEW_LENGTH
+                        else record.text_preview
+                    ),
                     "created_at": record.created_at.isoformat(),
                     "all_scores": record.all_scores
                 }
                 for record in records
             ]
             
+            next_cursor = None
+            if has_more:
+                last = records[-1]
+                next_cursor = f"{last.created_at.isoformat()}{HISTORY_CURSOR_SEPARATOR}{last.id}"
+            
             return {
                 "results": results,
                 "total_count": total_count,
                 "limit": limit,
                 "offset": offset,
-                "has_more": offset + limit < total_count
+                "has_more": has_more,
+                "next_cursor": next_cursor
             }
             
         except Exception as e:
@@ -397,6 +659,47 @@ class SentimentService:
                 details={"limit": limit, "offset": offset}
             ) from e
     
+    @staticmethod
+    def _fetch_history_page(db: Session, stmt: Any, count_stmt: Optional[Any]) -> Tuple[Optional[int], List[Any]]:
+        """Executa contagem opcional e página do histórico (síncrono, em thread)."""
+        total_count = None
+        if count_stmt is not None:
+            total_count = db.execute(count_stmt).scalar() or 0
+        return total_count, db.execute(stmt).all()
+    
+    def _get_database_statistics(self, db: Session) -> Dict[str, Any]:
+        """Estatísticas do banco (consulta síncrona, executada em thread)."""
+        # Total e distribuições derivados de um único GROUP BY sentimento, idioma
+        counts = get_sentiment_repository(db).count_by_sentiment_and_language()
+        
+        return {
+            "total_analyses": counts["total"],
+            "sentiment_distribution": [
+                {"sentiment": s, "count": c} for s, c in counts["sentiments"].items()
+            ],
+            "language_distribution": [
+                {"language": l, "count": c} for l, c in counts["languages"].items()
+            ]
+        }
+    
+    async def _get_cached_database_statistics(self, db: Session) -> Dict[str, Any]:
+        """Estatísticas do banco com cache curto (toleram alguns segundos de atraso)."""
+        try:
+            cached = await self.cache_service.get(STATS_CACHE_KEY)
+            if cached:
+                return cached
+        except Exception as e:
+            logger.warning(f"Erro ao buscar estatísticas no cache: {e}")
+        
+        database_stats = await asyncio.to_thread(self._get_database_statistics, db)
+        
+        try:
+            await self.cache_service.set(STATS_CACHE_KEY, database_stats, ttl=STATS_CACHE_TTL)
+        except Exception as e:
+            logger.warning(f"Erro ao cachear estatísticas: {e}")
+        
+        return database_stats
+    
     async def get_statistics(self, db: Session) -> Dict[str, Any]:
         """
         Recupera estatísticas do serviço e banco de dados.
@@ -406,23 +709,13 @@ class SentimentService:
         """
         try:
             # Stats do serviço em memória
-            service_stats = self._stats.copy()
-            
-            # Stats do cache
-            cache_stats = await self.cache_service.get_stats()
-            
-            # Stats do banco de dados
-            total_analyses = db.query(SentimentAnalysis).count()
+            service_stats = self._stats.to_dict()
             
-            sentiment_distribution = db.query(
-                SentimentAnalysis.sentiment,
-                db.func.count(SentimentAnalysis.id).label('count')
-            ).group_by(SentimentAnalysis.sentiment).all()
-            
-            language_distribution = db.query(
-                SentimentAnalysis.language,
-                db.func.count(SentimentAnalysis.id).label('count')
-            ).group_by(SentimentAnalysis.language).all()
+            # Stats do cache e do banco em paralelo (banco fora do event loop)
+            cache_stats, database_stats = await asyncio.gather(
+                self.cache_service.get_stats(),
+                self._get_cached_database_statistics(db)
+            )
             
             # Stats do modelo
             model_info = self.analyzer.get_model_info()
@@ -430,15 +723,7 @@ class SentimentService:
             return {
                 "service": service_stats,
                 "cache": cache_stats,
-                "database": {
-                    "total_analyses": total_analyses,
-                    "sentiment_distribution": [
-                        {"sentiment": s, "count": c} for s, c in sentiment_distribution
-                    ],
-                    "language_distribution": [
-                        {"language": l, "count": c} for l, c in language_distribution
-                    ]
-                },
+                "database": database_stats,
                 "model": model_info,
                 "uptime_info": {
                     "cache_hit_rate": cache_stats.get("hit_rate", 0.0),
@@ -463,6 +748,47 @@ class SentimentService:
                 message=f"Falha ao gerar estatísticas: {str(e)}"
             ) from e
     
+    async def submit_feedback(
+        self,
+        db: Session,
+        analysis_id: str,
+        user_sentiment: str,
+        feedback_notes: Optional[str] = None
+    ) -> SentimentFeedback:
+        """
+        Registra feedback do usuário sobre uma análise.
+        
+        Sentimento, confiança e idioma do modelo são copiados da análise no
+        momento da inserção (ver SentimentFeedback.create_for_analysis).
+        
+        Args:
+            db: Sessão do banco
+            analysis_id: ID da análise avaliada
+            user_sentiment: Sentimento indicado pelo usuário
+            feedback_notes: Notas adicionais opcionais
+            
+        Returns:
+            Feedback persistido
+            
+        Raises:
+            ValidationError: Se o sentimento informado for inválido
+            RecordNotFoundError: Se a análise não existir
+        """
+        if user_sentiment not in SCORE_LABELS:
+            raise ValidationError(
+                field="user_sentiment",
+                value=user_sentiment,
+                message="Sentimento inválido"
+            )
+        
+        repository = get_sentiment_repository(db)
+        analysis = await asyncio.to_thread(repository.get_by_id_or_raise, analysis_id)
+        
+        feedback = SentimentFeedback.create_for_analysis(
+            analysis, user_sentiment, feedback_notes
+        )
+        return await asyncio.to_thread(repository.create_feedback, feedback)
+    
     async def clear_cache(self) -> bool:
         """Limpa cache de análises."""
         try:
@@ -13,6 +13,12 @@ class SentimentScore(TypedDict):
     score: float
 
 
+class AnalysisScoresSoA(TypedDict):
+    """Scores em colunas paralelas (payload compacto do cache)."""
+    labels: List[Literal["positive", "negative", "neutral"]]
+    scores: List[float]
+
+
 class AnalysisResult(TypedDict):
     """Resultado de análise de sentimento."""
     sentiment: Literal["positive", "negative", "neutral"]
@@ -0,0 +1,31 @@
+"""
+Contexto por request baseado em contextvars.
+
+O RequestLoggingMiddleware define o ID do request no início de cada chamada;
+handlers, serviços e registros de log o obtêm sem receber o Request.
+"""
+import logging
+from contextvars import ContextVar
+
+request_id_var: ContextVar[str] = ContextVar("request_id", default="unknown")
+
+
+def get_request_id() -> str:
+    """Retorna o ID do request corrente ("unknown" fora de um request)."""
+    return request_id_var.get()
+
+
+class RequestIdFilter(logging.Filter):
+    """Garante `record.request_id` em todo registro de log (sem sobrescrever)."""
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "request_id"):
+            record.request_id = request_id_var.get()
+        return True
+
+
+def install_request_id_filter() -> None:
+    """Instala o RequestIdFilter nos handlers do logger raiz (idempotente)."""
+    for handler in logging.getLogger().handlers:
+        if not any(isinstance(f, RequestIdFilter) for f in handler.filters):
+            handler.addFilter(RequestIdFilter())
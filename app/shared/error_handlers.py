@@ -4,7 +4,7 @@ Handlers de erro unificados para toda a aplicação.
 Consolida lógica duplicada de tratamento de erros dos routers.
 """
 import logging
-from typing import Dict, Tuple, Type
+from typing import Dict, Optional, Tuple, Type
 
 from fastapi import HTTPException, Request, status
 from fastapi.responses import JSONResponse
@@ -62,6 +62,41 @@ ERROR_MAPPING: Dict[Type[Exception], Tuple[int, str, str]] = {
     ),
 }
 
+# Templates de detail por tipo, montados na importação: o caminho de erro só
+# copia o template e acrescenta request_id (e a mensagem, se houver)
+_DETAIL_TEMPLATES: Dict[Type[Exception], Dict[str, str]] = {
+    error_type: {"error": error_code, "message": default_message}
+    for error_type, (_, error_code, default_message) in ERROR_MAPPING.items()
+}
+_INTERNAL_ERROR_STATUS = status.HTTP_500_INTERNAL_SERVER_ERROR
+_INTERNAL_ERROR_DETAIL: Dict[str, str] = {
+    "error": "INTERNAL_ERROR",
+    "message": "Erro interno do servidor"
+}
+_RATE_LIMIT_HEADERS: Dict[str, str] = {
+    "Retry-After": "60",
+    "X-RateLimit-Exceeded": "true"
+}
+
+
+def _build_error_detail(
+    error: Exception,
+    request_id: str
+) -> Optional[Tuple[int, Dict[str, str]]]:
+    """Resolve status code e detail de uma exceção (None se não mapeada)."""
+    error_type = type(error)
+    mapping = ERROR_MAPPING.get(error_type)
+    
+    if mapping is None:
+        return None
+    
+    detail = {**_DETAIL_TEMPLATES[error_type], "request_id": request_id}
+    message = str(error)
+    if message:
+        detail["message"] = message
+    
+    return mapping[0], detail
+
 
 async def handle_api_error(error: Exception, request_id: str = "unknown") -> HTTPException:
     """
@@ -76,30 +111,18 @@ async def handle_api_error(error: Exception, request_id: str = "unknown") -> HTT
     Returns:
         HTTPException com detalhes formatados
     """
-    # Buscar mapeamento específico
-    error_type = type(error)
-    mapping = ERROR_MAPPING.get(error_type)
+    resolved = _build_error_detail(error, request_id)
     
-    if mapping:
-        status_code, error_code, default_message = mapping
-        message = str(error) if str(error) else default_message
-    else:
-        # Erro genérico não mapeado
-        status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
-        error_code = "INTERNAL_ERROR"
-        message = "Erro interno do servidor"
-        
+    if resolved is None:
         # Log para erros não esperados
-        logger.error(f"Erro não mapeado: {error_type.__name__}: {error}")
+        logger.error(f"Erro não mapeado: {type(error).__name__}: {error}")
+        resolved = (
+            _INTERNAL_ERROR_STATUS,
+            {**_INTERNAL_ERROR_DETAIL, "request_id": request_id}
+        )
     
-    return HTTPException(
-        status_code=status_code,
-        detail={
-            "error": error_code,
-            "message": message,
-            "request_id": request_id
-        }
-    )
+    status_code, detail = resolved
+    return HTTPException(status_code=status_code, detail=detail)
 
 
 def create_error_response(
@@ -118,26 +141,19 @@ def create_error_response(
     Returns:
         JSONResponse formatado
     """
-    error_type = type(error)
-    mapping = ERROR_MAPPING.get(error_type)
+    resolved = _build_error_detail(error, request_id)
     
-    if mapping:
-        status_code, error_code, default_message = mapping
-        message = str(error) if str(error) else default_message
-    else:
-        status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
-        error_code = "INTERNAL_ERROR"
-        message = "Erro interno do servidor"
+    if resolved is None:
+        resolved = (
+            _INTERNAL_ERROR_STATUS,
+            {**_INTERNAL_ERROR_DETAIL, "request_id": request_id}
+        )
     
-    content = {
-        "error": error_code,
-        "message": message,
-        "request_id": request_id
-    }
+    status_code, content = resolved
     
     if include_debug:
         content["debug"] = {
-            "error_type": error_type.__name__,
+            "error_type": type(error).__name__,
             "error_details": str(error)
         }
     
@@ -157,13 +173,11 @@ def get_error_headers(error: Exception) -> Dict[str, str]:
     Returns:
         Dict de headers
     """
-    headers = {}
-    
     if isinstance(error, RateLimitError):
-        headers["Retry-After"] = "60"
-        headers["X-RateLimit-Exceeded"] = "true"
+        # Cópia: o chamador pode acrescentar headers
+        return dict(_RATE_LIMIT_HEADERS)
     
-    return headers
+    return {}
 
 
 logger.info("Módulo de error handlers unificados carregado")
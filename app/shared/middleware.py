@@ -1,202 +1,330 @@
 import gzip
+import itertools
 import json
 import logging
+import re
+import secrets
 import time
-import uuid
-from typing import Callable
+from typing import Awaitable, Callable, Dict, Optional
 
 from fastapi import Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import URL, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.config import get_settings
+from app.shared.context import install_request_id_filter, request_id_var
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# Conjuntos congelados para teste de pertinência O(1) por request
+UNTIMED_PATHS = frozenset({"/health", "/docs", "/openapi.json"})
+SENSITIVE_HEADERS = frozenset({"authorization", "cookie", "x-api-key"})
+_SENSITIVE_HEADER_BYTES = frozenset(name.encode("latin-1") for name in SENSITIVE_HEADERS)
 
-class TimingMiddleware(BaseHTTPMiddleware):
-    """Middleware para adicionar timing headers e métricas de performance."""
-    
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        # Ignorar rotas de health check para reduzir noise
-        if request.url.path in ["/health", "/docs", "/openapi.json"]:
-            return await call_next(request)
-        
-        start_time = time.perf_counter()
-        
-        # Executar request
-        response = await call_next(request)
-        
-        # Calcular tempo de processamento
-        process_time = time.perf_counter() - start_time
-        process_time_ms = round(process_time * 1000, 2)
-        
-        # Adicionar headers de timing
-        response.headers["X-Process-Time"] = str(process_time)
-        response.headers["X-Process-Time-MS"] = str(process_time_ms)
-        
-        # Log de performance para requests lentos
-        if process_time > 1.0:  # > 1 segundo
-            logger.warning(
-                f"Slow request detected",
-                extra={
-                    "path": request.url.path,
-                    "method": request.method,
-                    "process_time": process_time_ms,
-                    "status_code": response.status_code
-                }
-            )
-        
-        return response
+# Headers de segurança básicos (produção), já codificados para o ASGI
+SECURITY_HEADERS = tuple(
+    (name.encode("latin-1"), value.encode("latin-1"))
+    for name, value in (
+        ("x-content-type-options", "nosniff"),
+        ("x-frame-options", "DENY"),
+        ("x-xss-protection", "1; mode=block"),
+        ("referrer-policy", "strict-origin-when-cross-origin"),
+        ("content-security-policy", "default-src 'self'"),
+    )
+)
 
+# IDs de request: prefixo aleatório do processo + contador, sem syscall nem
+# objeto UUID por request (únicos dentro do processo/worker)
+_REQUEST_ID_PREFIX = secrets.token_hex(3)
+_request_id_counter = itertools.count()
 
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
-    """Middleware para logging estruturado de requests."""
+# X-Request-ID recebido (ex.: do proxy) só é reaproveitado se for seguro para log
+_INCOMING_REQUEST_ID_RE = re.compile(rb"[A-Za-z0-9._\-]{1,64}")
+
+
+def new_request_id() -> str:
+    """Gera ID curto de request (6 hex do processo + contador em hex)."""
+    return f"{_REQUEST_ID_PREFIX}{next(_request_id_counter):05x}"
+
+
+def _resolve_request_id(scope: Scope) -> str:
+    """Reaproveita o X-Request-ID de entrada, se válido, ou gera um novo."""
+    for key, value in scope["headers"]:
+        if key == b"x-request-id":
+            if _INCOMING_REQUEST_ID_RE.fullmatch(value):
+                return value.decode("ascii")
+            break
+    return new_request_id()
+
+
+class RequestLoggingMiddleware:
+    """Middleware ASGI puro para logging estruturado de requests.
     
-    def __init__(self, app, log_requests: bool = True, log_responses: bool = False):
-        super().__init__(app)
+    Os dados do request (URL, query params, headers filtrados) só são montados
+    quando a mensagem de log correspondente vai de fato ser emitida.
+    """
+    
+    def __init__(self, app: ASGIApp, log_requests: bool = True, log_responses: bool = False):
+        self.app = app
         self.log_requests = log_requests
         self.log_responses = log_responses
     
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        # Gerar ID único para o request
-        request_id = str(uuid.uuid4())[:8]
-        request.state.request_id = request_id
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
         
-        # Preparar dados do request
-        request_data = {
-            "request_id": request_id,
-            "method": request.method,
-            "url": str(request.url),
-            "path": request.url.path,
-            "query_params": dict(request.query_params),
-            "headers": {
-                key: value for key, value in request.headers.items()
-                if key.lower() not in ["authorization", "cookie", "x-api-key"]  # Filtrar headers sensíveis
-            },
-            "client_ip": self._get_client_ip(request),
-            "user_agent": request.headers.get("User-Agent", ""),
-            "timestamp": time.time()
-        }
+        # ID do request (exposto em request.state.request_id e no contextvar)
+        request_id = _resolve_request_id(scope)
+        scope.setdefault("state", {})["request_id"] = request_id
+        
+        token = request_id_var.set(request_id)
+        try:
+            await self._process(scope, receive, send, request_id)
+        finally:
+            request_id_var.reset(token)
+    
+    async def _process(self, scope: Scope, receive: Receive, send: Send, request_id: str) -> None:
+        method = scope["method"]
+        path = scope["path"]
+        timestamp = time.time()
         
         # Log do request
-        if self.log_requests:
+        if self.log_requests and logger.isEnabledFor(logging.INFO):
             logger.info(
-                f"Request started: {request.method} {request.url.path}",
-                extra=request_data
+                f"Request started: {method} {path}",
+                extra=self._build_request_data(scope, request_id, timestamp)
             )
         
         start_time = time.perf_counter()
+        status_code = 500
+        response_size = "unknown"
+        
+        async def send_with_request_id(message: Message) -> None:
+            nonlocal status_code, response_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                
+                # Adicionar request ID ao response
+                headers = MutableHeaders(scope=message)
+                headers.append("X-Request-ID", request_id)
+                response_size = headers.get("content-length", "unknown")
+            
+            await send(message)
         
         try:
             # Executar request
-            response = await call_next(request)
-            
-            # Adicionar request ID ao response
-            response.headers["X-Request-ID"] = request_id
-            
-            # Preparar dados do response
-            process_time = time.perf_counter() - start_time
-            
-            response_data = {
-                **request_data,
-                "status_code": response.status_code,
-                "process_time": round(process_time * 1000, 2),
-                "response_size": response.headers.get("content-length", "unknown")
-            }
-            
-            # Log do response
-            log_level = logging.WARNING if response.status_code >= 400 else logging.INFO
-            logger.log(
-                log_level,
-                f"Request completed: {response.status_code} {request.method} {request.url.path}",
-                extra=response_data
-            )
-            
-            return response
+            await self.app(scope, receive, send_with_request_id)
             
         except Exception as e:
             # Log de erro
             process_time = time.perf_counter() - start_time
             
             error_data = {
-                **request_data,
+                **self._build_request_data(scope, request_id, timestamp),
                 "error": str(e),
                 "error_type": type(e).__name__,
                 "process_time": round(process_time * 1000, 2)
             }
             
             logger.error(
-                f"Request failed: {request.method} {request.url.path}",
+                f"Request failed: {method} {path}",
                 extra=error_data,
                 exc_info=True
             )
             
             raise
+        
+        # Log do response
+        log_level = logging.WARNING if status_code >= 400 else logging.INFO
+        if logger.isEnabledFor(log_level):
+            process_time = time.perf_counter() - start_time
+            
+            response_data = {
+                **self._build_request_data(scope, request_id, timestamp),
+                "status_code": status_code,
+                "process_time": round(process_time * 1000, 2),
+                "response_size": response_size
+            }
+            
+            logger.log(
+                log_level,
+                f"Request completed: {status_code} {method} {path}",
+                extra=response_data
+            )
+    
+    def _build_request_data(self, scope: Scope, request_id: str, timestamp: float) -> dict:
+        """Monta os dados do request para log (chamado só na emissão).
+        
+        Lê direto do scope ASGI: headers já chegam como bytes em minúsculas e
+        a query string é registrada crua, sem montar Request nem QueryParams.
+        """
+        headers = {
+            key.decode("latin-1"): value.decode("latin-1")
+            for key, value in scope["headers"]
+            if key not in _SENSITIVE_HEADER_BYTES
+        }
+        return {
+            "request_id": request_id,
+            "method": scope["method"],
+            "url": str(URL(scope=scope)),
+            "path": scope["path"],
+            "query_params": scope.get("query_string", b"").decode("latin-1"),
+            "headers": headers,
+            "client_ip": self._get_client_ip(headers, scope),
+            "user_agent": headers.get("user-agent", ""),
+            "timestamp": timestamp
+        }
     
-    def _get_client_ip(self, request: Request) -> str:
+    def _get_client_ip(self, headers: Dict[str, str], scope: Scope) -> str:
         """Extrai IP real do cliente considerando proxies."""
         # Prioridade: X-Real-IP > X-Forwarded-For > client.host
-        real_ip = request.headers.get("X-Real-IP")
+        real_ip = headers.get("x-real-ip")
         if real_ip:
             return real_ip
         
-        forwarded_for = request.headers.get("X-Forwarded-For")
+        forwarded_for = headers.get("x-forwarded-for")
         if forwarded_for:
             return forwarded_for.split(",")[0].strip()
         
-        return request.client.host if request.client else "unknown"
+        client = scope.get("client")
+        return client[0] if client else "unknown"
 
 
-class HealthCheckBypassMiddleware(BaseHTTPMiddleware):
-    """Middleware para bypass de health checks e rotas internas."""
+class FastPathMiddleware:
+    """
+    Middleware ASGI puro que tenta responder uma rota antes do roteamento do
+    FastAPI.
     
-    BYPASS_PATHS = {
-        "/health",
-        "/api/v1/sentiment/health",
-        "/docs",
-        "/redoc",
-        "/openapi.json",
-        "/favicon.ico"
-    }
+    O corpo é lido uma vez e reentregue ao app (via `receive` substituto)
+    quando o handler não responde. Exceções do handler não são engolidas:
+    seguem para o CoreMiddleware como qualquer erro do app.
+    """
+    
+    def __init__(
+        self,
+        app: ASGIApp,
+        method: str,
+        path: str,
+        handler: Callable[[Request], Awaitable[Optional[Response]]]
+    ):
+        self.app = app
+        self.method = method
+        self.path = path
+        self.handler = handler
     
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        # Bypass para health checks - sem processamento adicional
-        if request.url.path in self.BYPASS_PATHS:
-            return await call_next(request)
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] != self.method
+            or scope["path"] != self.path
+        ):
+            await self.app(scope, receive, send)
+            return
+        
+        body = await self._read_body(receive)
+        if body is None:
+            # Cliente desconectou antes de enviar o corpo
+            return
         
-        # Para outras rotas, continuar normalmente
-        return await call_next(request)
+        response = await self.handler(Request(scope, self._replay(body, receive)))
+        if response is not None:
+            await response(scope, receive, send)
+            return
+        
+        await self.app(scope, self._replay(body, receive), send)
+    
+    @staticmethod
+    async def _read_body(receive: Receive) -> Optional[bytes]:
+        """Lê o corpo completo do request (None se o cliente desconectou)."""
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return None
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                return b"".join(chunks)
+    
+    @staticmethod
+    def _replay(body: bytes, receive: Receive) -> Receive:
+        """`receive` que entrega o corpo já lido e depois delega ao original."""
+        delivered = False
+        
+        async def replay_receive() -> Message:
+            nonlocal delivered
+            if not delivered:
+                delivered = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+        
+        return replay_receive
 
 
-class ErrorHandlingMiddleware(BaseHTTPMiddleware):
-    """Middleware para tratamento global de erros."""
+class CoreMiddleware:
+    """
+    Middleware ASGI puro que concentra timing, headers de segurança e
+    tratamento global de erros.
+    
+    Substitui as camadas Timing, HealthCheckBypass, SecurityHeaders e
+    ErrorHandling por uma só, com um único wrapper de `send` que escreve
+    todos os headers em http.response.start.
+    """
     
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+    def __init__(self, app: ASGIApp, security_headers: bool = False):
+        self.app = app
+        self.security_headers = security_headers
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        # Health checks e docs não recebem timing headers (menos noise)
+        timed = scope["path"] not in UNTIMED_PATHS
+        start_time = time.perf_counter()
+        response_started = False
+        
+        async def send_wrapper(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+                if timed or self.security_headers:
+                    self._add_response_headers(scope, message, start_time, timed)
+            
+            await send(message)
+        
         try:
-            return await call_next(request)
+            await self.app(scope, receive, send_wrapper)
             
         except Exception as e:
+            request_id = scope.get("state", {}).get("request_id", "unknown")
+            
             # Log do erro
             logger.error(
-                f"Unhandled exception in {request.method} {request.url.path}",
+                f"Unhandled exception in {scope['method']} {scope['path']}",
                 extra={
                     "error": str(e),
                     "error_type": type(e).__name__,
-                    "request_id": getattr(request.state, "request_id", "unknown"),
-                    "path": request.url.path,
-                    "method": request.method
+                    "request_id": request_id,
+                    "path": scope["path"],
+                    "method": scope["method"]
                 },
                 exc_info=True
             )
             
+            # Response já iniciado: não há como trocar o status
+            if response_started:
+                raise
+            
             # Resposta padronizada para erros não tratados
             error_response = {
                 "error": "INTERNAL_SERVER_ERROR",
                 "message": "Erro interno do servidor",
-                "request_id": getattr(request.state, "request_id", "unknown")
+                "request_id": request_id
             }
             
             if settings.debug:
@@ -205,34 +333,51 @@ class ErrorHandlingMiddleware(BaseHTTPMiddleware):
                     "error_message": str(e)
                 }
             
-            return JSONResponse(
+            response = JSONResponse(
                 status_code=500,
                 content=error_response,
-                headers={"X-Request-ID": getattr(request.state, "request_id", "unknown")}
+                headers={"X-Request-ID": request_id}
             )
-
-
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    """Middleware para adicionar headers de segurança."""
+            await response(scope, receive, send_wrapper)
     
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        response = await call_next(request)
-        
-        # Headers de segurança básicos
-        security_headers = {
-            "X-Content-Type-Options": "nosniff",
-            "X-Frame-Options": "DENY",
-            "X-XSS-Protection": "1; mode=block",
-            "Referrer-Policy": "strict-origin-when-cross-origin",
-            "Content-Security-Policy": "default-src 'self'",
-        }
+    def _add_response_headers(
+        self,
+        scope: Scope,
+        message: Message,
+        start_time: float,
+        timed: bool
+    ) -> None:
+        """Escreve timing e headers de segurança em uma única passada."""
+        headers = MutableHeaders(scope=message)
         
-        # Adicionar apenas se não existirem
-        for header, value in security_headers.items():
-            if header not in response.headers:
-                response.headers[header] = value
+        if timed:
+            # Calcular tempo de processamento
+            process_time = time.perf_counter() - start_time
+            process_time_ms = round(process_time * 1000, 2)
+            
+            headers.append("X-Process-Time", str(process_time))
+            headers.append("X-Process-Time-MS", str(process_time_ms))
+            
+            # Log de performance para requests lentos
+            if process_time > 1.0:  # > 1 segundo
+                logger.warning(
+                    f"Slow request detected",
+                    extra={
+                        "path": scope["path"],
+                        "method": scope["method"],
+                        "process_time": process_time_ms,
+                        "status_code": message["status"]
+                    }
+                )
         
-        return response
+        if self.security_headers:
+            # Adicionar apenas se não existirem (um set dos nomes presentes)
+            raw = headers.raw
+            present = {key for key, _ in raw}
+            raw.extend(
+                (key, value) for key, value in SECURITY_HEADERS
+                if key not in present
+            )
 
 
 def get_cors_middleware(app):
@@ -260,18 +405,25 @@ def setup_middleware(app):
     
     Ordem (externo para interno):
     1. CORS (mais externo)
-    2. Security Headers
-    3. Error Handling
-    4. Health Check Bypass
-    5. Request Logging
-    6. Timing
-    7. Compression (mais interno)
+    2. Core (timing, security headers e error handling em uma camada)
+    3. Request Logging
+    4. Compression
+    5. Fast path de cache do /analyze (mais interno)
     """
-
-    # 1. Timing
-    app.add_middleware(TimingMiddleware)
     
-    # 1.5. Compression (comprime responses > 500 bytes)
+    # Logs passam a carregar record.request_id (contextvar do request)
+    install_request_id_filter()
+    
+    # 0. Fast path de cache hit (import local: evita dependência no carregamento)
+    from app.sentiment.router import serve_cached_analysis
+    app.add_middleware(
+        FastPathMiddleware,
+        method="POST",
+        path="/api/v1/sentiment/analyze",
+        handler=serve_cached_analysis
+    )
+
+    # 1. Compression (comprime responses > 500 bytes)
     from starlette.middleware.gzip import GZipMiddleware
     app.add_middleware(GZipMiddleware, minimum_size=500)
     
@@ -282,17 +434,10 @@ def setup_middleware(app):
         log_responses=settings.debug
     )
     
-    # 3. Health Check Bypass
-    app.add_middleware(HealthCheckBypassMiddleware)
-    
-    # 4. Error Handling
-    app.add_middleware(ErrorHandlingMiddleware)
-    
-    # 5. Security Headers
-    if settings.is_production:
-        app.add_middleware(SecurityHeadersMiddleware)
+    # 3. Core: timing + error handling + security headers (só em produção)
+    app.add_middleware(CoreMiddleware, security_headers=settings.is_production)
     
-    # 6. CORS (mais externo - aplicado primeiro)
+    # 4. CORS (mais externo - aplicado primeiro)
     app.add_middleware(
         CORSMiddleware,
         allow_origins=settings.effective_cors_origins,  # Usa origins baseado no ambiente
@@ -1,10 +1,15 @@
 import asyncio
 import logging
+import math
 import time
+from bisect import bisect_right
+from collections import deque
 from functools import wraps
-from typing import Dict, List, Optional, Tuple
+from typing import Deque, Dict, List, Optional, Tuple
 
+import redis.asyncio as redis
 from fastapi import HTTPException, Request, status
+from redis.exceptions import RedisError
 
 from app.config import get_settings
 from app.core.exceptions import RateLimitError
@@ -12,14 +17,20 @@ from app.core.exceptions import RateLimitError
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# Número de shards do limiter em memória (potência de 2: índice via máscara)
+RATE_LIMIT_SHARDS = 64
+
 
 class InMemoryRateLimiter:
     """Rate limiter thread-safe baseado em memória com sliding window."""
     
     def __init__(self):
-        # Estrutura: {client_id: {endpoint: [(timestamp, count)]}}
-        self._requests: Dict[str, Dict[str, List[Tuple[float, int]]]] = {}
-        self._lock = asyncio.Lock()
+        # Estado particionado por hash(client_id), um lock por shard: clientes
+        # distintos não disputam o mesmo lock.
+        # Cada shard: ({client_id: {endpoint: deque de timestamps crescentes}}, lock)
+        self._shards: List[Tuple[Dict[str, Dict[str, Deque[float]]], asyncio.Lock]] = [
+            ({}, asyncio.Lock()) for _ in range(RATE_LIMIT_SHARDS)
+        ]
         self._cleanup_task: Optional[asyncio.Task] = None
         self._start_cleanup_task()
         
@@ -60,36 +71,44 @@ class InMemoryRateLimiter:
         current_time = time.time()
         cutoff_time = current_time - 3600  # Remove entradas > 1 hora
         
-        async with self._lock:
-            clients_to_remove = []
-            
-            for client_id, endpoints in self._requests.items():
-                endpoints_to_remove = []
+        removed_clients = 0
+        
+        # Um shard por vez: nunca bloqueia o limiter inteiro
+        for requests, lock in self._shards:
+            async with lock:
+                clients_to_remove = []
                 
-                for endpoint, timestamps in endpoints.items():
-                    # Filtrar timestamps antigos
-                    timestamps[:] = [
-                        (ts, count) for ts, count in timestamps 
-                        if ts > cutoff_time
-                    ]
+                for client_id, endpoints in requests.items():
+                    endpoints_to_remove = []
                     
-                    if not timestamps:
-                        endpoints_to_remove.append(endpoint)
+                    for endpoint, timestamps in endpoints.items():
+                        # Descartar timestamps antigos (ordenados: só a esquerda)
+                        while timestamps and timestamps[0] <= cutoff_time:
+                            timestamps.popleft()
+                        
+                        if not timestamps:
+                            endpoints_to_remove.append(endpoint)
+                    
+                    # Remover endpoints vazios
+                    for endpoint in endpoints_to_remove:
+                        del endpoints[endpoint]
+                    
+                    # Marcar cliente para remoção se vazio
+                    if not endpoints:
+                        clients_to_remove.append(client_id)
                 
-                # Remover endpoints vazios
-                for endpoint in endpoints_to_remove:
-                    del endpoints[endpoint]
+                # Remover clientes vazios
+                for client_id in clients_to_remove:
+                    del requests[client_id]
                 
-                # Marcar cliente para remoção se vazio
-                if not endpoints:
-                    clients_to_remove.append(client_id)
-            
-            # Remover clientes vazios
-            for client_id in clients_to_remove:
-                del self._requests[client_id]
-            
-            if clients_to_remove or any(endpoints_to_remove for endpoints_to_remove in []):
-                logger.debug(f"Cleanup: removidos {len(clients_to_remove)} clientes")
+                removed_clients += len(clients_to_remove)
+        
+        if removed_clients:
+            logger.debug(f"Cleanup: removidos {removed_clients} clientes")
+    
+    def _get_shard(self, client_id: str) -> Tuple[Dict[str, Dict[str, Deque[float]]], asyncio.Lock]:
+        """Retorna (estado, lock) do shard responsável pelo cliente."""
+        return self._shards[hash(client_id) & (RATE_LIMIT_SHARDS - 1)]
     
     def _get_client_id(self, request: Request) -> str:
         """Extrai identificador único do client."""
@@ -128,32 +147,29 @@ class InMemoryRateLimiter:
         client_id = self._get_client_id(request)
         endpoint_key = self._get_endpoint_key(request)
         
-        async with self._lock:
+        requests, lock = self._get_shard(client_id)
+        
+        async with lock:
             # Inicializar estruturas se necessário
-            if client_id not in self._requests:
-                self._requests[client_id] = {}
-            
-            if endpoint_key not in self._requests[client_id]:
-                self._requests[client_id][endpoint_key] = []
+            endpoints = requests.get(client_id)
+            if endpoints is None:
+                endpoints = requests[client_id] = {}
             
-            timestamps = self._requests[client_id][endpoint_key]
+            timestamps = endpoints.get(endpoint_key)
+            if timestamps is None:
+                timestamps = endpoints[endpoint_key] = deque()
             
-            # Remover timestamps antigos (sliding window)
+            # Remover timestamps antigos (sliding window): a deque é mantida em
+            # ordem crescente, então basta descartar pela esquerda
             minute_cutoff = current_time - 60
             hour_cutoff = current_time - 3600
             
-            timestamps[:] = [
-                (ts, count) for ts, count in timestamps 
-                if ts > hour_cutoff
-            ]
-            
-            # Contar requests no último minuto e hora
-            minute_requests = sum(
-                count for ts, count in timestamps 
-                if ts > minute_cutoff
-            )
+            while timestamps and timestamps[0] <= hour_cutoff:
+                timestamps.popleft()
             
-            hour_requests = sum(count for ts, count in timestamps)
+            # Contar requests no último minuto (busca binária) e hora
+            hour_requests = len(timestamps)
+            minute_requests = hour_requests - bisect_right(timestamps, minute_cutoff)
             
             # Verificar limites
             minute_exceeded = minute_requests >= requests_per_minute
@@ -181,43 +197,204 @@ class InMemoryRateLimiter:
                 return False, headers
             
             # Adicionar timestamp atual
-            timestamps.append((current_time, 1))
+            timestamps.append(current_time)
             
             return True, headers
     
     async def get_stats(self) -> Dict[str, int]:
         """Retorna estatísticas do rate limiter."""
-        async with self._lock:
-            total_clients = len(self._requests)
-            total_endpoints = sum(
-                len(endpoints) for endpoints in self._requests.values()
+        total_clients = 0
+        total_endpoints = 0
+        total_requests = 0
+        
+        # Leitura sem await: cada shard é percorrido de forma atômica no event loop
+        for requests, _ in self._shards:
+            total_clients += len(requests)
+            for endpoints in requests.values():
+                total_endpoints += len(endpoints)
+                total_requests += sum(len(timestamps) for timestamps in endpoints.values())
+        
+        return {
+            "total_clients": total_clients,
+            "total_endpoints": total_endpoints,
+            "total_requests_tracked": total_requests,
+            "memory_entries": total_requests
+        }
+    
+    async def clear_all(self) -> None:
+        """Limpa todos os registros de rate limiting."""
+        for requests, lock in self._shards:
+            async with lock:
+                requests.clear()
+        logger.info("Rate limiter limpo")
+
+
+# Token bucket atômico para os limites por minuto (KEYS[1]) e por hora (KEYS[2]).
+# ARGV: now, taxa/s e capacidade de cada bucket. Só consome se ambos tiverem token.
+TOKEN_BUCKET_SCRIPT = """
+local now = tonumber(ARGV[1])
+local tokens = {}
+local allowed = 1
+local exceeded = 0
+for i = 1, 2 do
+    local rate = tonumber(ARGV[2 * i])
+    local cap = tonumber(ARGV[2 * i + 1])
+    local state = redis.call('HMGET', KEYS[i], 'tok', 'ts')
+    local tok = tonumber(state[1]) or cap
+    local ts = tonumber(state[2]) or now
+    tok = math.min(cap, tok + math.max(0, now - ts) * rate)
+    if tok < 1 and allowed == 1 then
+        allowed = 0
+        exceeded = i
+    end
+    tokens[i] = tok
+end
+for i = 1, 2 do
+    if allowed == 1 then
+        tokens[i] = tokens[i] - 1
+    end
+    redis.call('HSET', KEYS[i], 'tok', tokens[i], 'ts', now)
+    redis.call('EXPIRE', KEYS[i], math.ceil(tonumber(ARGV[2 * i + 1]) / tonumber(ARGV[2 * i])))
+end
+return {allowed, exceeded, math.floor(tokens[1]), math.floor(tokens[2])}
+"""
+
+
+class RedisRateLimiter:
+    """
+    Rate limiter distribuído (token bucket em Redis via script Lua).
+    
+    Um único EVALSHA por requisição, consistente entre workers. Em falha do
+    Redis, delega ao limiter em memória.
+    """
+    
+    KEY_PREFIX = "ratelimit:"
+    
+    def __init__(self, redis_client: redis.Redis, fallback: InMemoryRateLimiter):
+        self.redis_client = redis_client
+        self.fallback = fallback
+        self._script = redis_client.register_script(TOKEN_BUCKET_SCRIPT)
+        
+        # Contadores do processo: estatísticas sem varrer as chaves no Redis
+        self._checks = 0
+        self._denied = 0
+        self._fallbacks = 0
+        logger.info("RedisRateLimiter inicializado")
+    
+    async def load_script(self) -> None:
+        """Pré-carrega o script no Redis (evita NOSCRIPT na primeira chamada)."""
+        await self.redis_client.script_load(TOKEN_BUCKET_SCRIPT)
+    
+    def _get_client_id(self, request: Request) -> str:
+        return self.fallback._get_client_id(request)
+    
+    def _get_endpoint_key(self, request: Request) -> str:
+        return self.fallback._get_endpoint_key(request)
+    
+    async def is_allowed(
+        self,
+        request: Request,
+        requests_per_minute: int = 100,
+        requests_per_hour: int = 1000
+    ) -> Tuple[bool, Dict[str, str]]:
+        """
+        Verifica se request está dentro dos limites.
+        
+        Returns:
+            (allowed, headers) - Se permitido e headers informativos
+        """
+        current_time = time.time()
+        key = f"{self.KEY_PREFIX}{self._get_client_id(request)}:{self._get_endpoint_key(request)}"
+        
+        try:
+            allowed, exceeded, minute_tokens, hour_tokens = await self._script(
+                keys=[f"{key}:m", f"{key}:h"],
+                args=[
+                    current_time,
+                    requests_per_minute / 60, requests_per_minute,
+                    requests_per_hour / 3600, requests_per_hour
+                ]
             )
-            total_requests = sum(
-                sum(count for _, count in timestamps)
-                for endpoints in self._requests.values()
-                for timestamps in endpoints.values()
+            self._checks += 1
+        except RedisError as e:
+            self._fallbacks += 1
+            logger.warning(f"Rate limiter Redis indisponível, usando memória: {e}")
+            return await self.fallback.is_allowed(
+                request, requests_per_minute, requests_per_hour
             )
+        
+        headers = {
+            "X-RateLimit-Limit-Minute": str(requests_per_minute),
+            "X-RateLimit-Limit-Hour": str(requests_per_hour),
+            "X-RateLimit-Remaining-Minute": str(max(0, minute_tokens)),
+            "X-RateLimit-Remaining-Hour": str(max(0, hour_tokens)),
+            "X-RateLimit-Reset-Minute": str(int(current_time + 60)),
+            "X-RateLimit-Reset-Hour": str(int(current_time + 3600))
+        }
+        
+        if not allowed:
+            self._denied += 1
             
-            return {
-                "total_clients": total_clients,
-                "total_endpoints": total_endpoints,
-                "total_requests_tracked": total_requests,
-                "memory_entries": sum(
-                    len(timestamps)
-                    for endpoints in self._requests.values()
-                    for timestamps in endpoints.values()
-                )
-            }
+            # Tempo aproximado para repor um token no bucket esgotado
+            if exceeded == 1:
+                headers["X-RateLimit-Exceeded"] = "minute"
+                headers["Retry-After"] = str(math.ceil(60 / requests_per_minute))
+            else:
+                headers["X-RateLimit-Exceeded"] = "hour"
+                headers["Retry-After"] = str(math.ceil(3600 / requests_per_hour))
+            
+            return False, headers
+        
+        return True, headers
+    
+    async def get_stats(self) -> Dict[str, int]:
+        """
+        Retorna estatísticas do rate limiter.
+        
+        Contadores deste processo, sem SCAN no Redis (chamado por /health,
+        /metrics e no startup).
+        """
+        return {
+            "redis_checks": self._checks,
+            "redis_denied": self._denied,
+            "redis_fallbacks": self._fallbacks,
+            **await self.fallback.get_stats()
+        }
     
     async def clear_all(self) -> None:
         """Limpa todos os registros de rate limiting."""
-        async with self._lock:
-            self._requests.clear()
-            logger.info("Rate limiter limpo")
+        try:
+            keys = [
+                key async for key in
+                self.redis_client.scan_iter(match=f"{self.KEY_PREFIX}*", count=500)
+            ]
+            if keys:
+                await self.redis_client.delete(*keys)
+        except RedisError as e:
+            logger.warning(f"Erro ao limpar rate limiter Redis: {e}")
+        
+        await self.fallback.clear_all()
+
+
+# Instância global do rate limiter (trocada por RedisRateLimiter no startup)
+_memory_rate_limiter = InMemoryRateLimiter()
+_rate_limiter = _memory_rate_limiter
 
 
-# Instância global do rate limiter
-_rate_limiter = InMemoryRateLimiter()
+async def enable_redis_rate_limiter(redis_client: redis.Redis) -> bool:
+    """Ativa o rate limiting distribuído usando o cliente Redis informado."""
+    global _rate_limiter
+    
+    try:
+        limiter = RedisRateLimiter(redis_client, fallback=_memory_rate_limiter)
+        await limiter.load_script()
+    except RedisError as e:
+        logger.warning(f"Rate limiter Redis não ativado, mantendo memória: {e}")
+        return False
+    
+    _rate_limiter = limiter
+    logger.info("Rate limiting distribuído via Redis ativado")
+    return True
 
 
 def rate_limit(
@@ -299,6 +476,22 @@ def rate_limit(
     return decorator
 
 
+async def check_rate_limit(
+    request: Request,
+    requests_per_minute: int,
+    requests_per_hour: int
+) -> Tuple[bool, Dict[str, str]]:
+    """Consulta o rate limiter ativo (sem levantar exceção)."""
+    if not settings.rate_limit.enabled:
+        return True, {}
+    
+    return await _rate_limiter.is_allowed(
+        request=request,
+        requests_per_minute=requests_per_minute,
+        requests_per_hour=requests_per_hour
+    )
+
+
 async def get_rate_limiter_stats() -> Dict[str, int]:
     """Retorna estatísticas do rate limiter."""
     return await _rate_limiter.get_stats()
@@ -353,6 +546,7 @@ async def check_rate_limiter_health() -> Dict[str, any]:
         return {
             "status": "healthy",
             "enabled": settings.rate_limit.enabled,
+            "backend": "redis" if isinstance(_rate_limiter, RedisRateLimiter) else "memory",
             "stats": stats,
             "config": {
                 "default_requests_per_minute": settings.rate_limit.requests_per_minute,
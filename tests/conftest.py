@@ -3,7 +3,7 @@ import os
 import tempfile
 from datetime import datetime, timedelta
 from typing import Dict, Any, List
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from fastapi.testclient import TestClient
@@ -18,6 +18,7 @@ from app.dependencies import get_cache_dependency, get_db_session
 from app.main import app
 from app.sentiment.analyzer import SentimentAnalyzer
 from app.sentiment.models import SentimentAnalysis
+from app.sentiment.service import SentimentService
 
 
 # CONFIGURAÇÕES DE TESTE
@@ -216,6 +217,32 @@ def mock_analyzer(mock_ml_responses):
     return mock
 
 
+# SERVIÇO DE SENTIMENTOS
+
+@pytest.fixture
+def batch_cache():
+    """Cache mock com operações em lote (todo lookup é miss)."""
+    cache = MagicMock()
+    cache.mget = AsyncMock(side_effect=lambda keys: [None] * len(keys))
+    cache.set_many = AsyncMock(return_value=True)
+    return cache
+
+
+@pytest.fixture
+def sentiment_service(mock_analyzer, batch_cache):
+    """SentimentService com modelo mock e cache mock em lote."""
+    with patch('app.sentiment.service.get_sentiment_analyzer', return_value=mock_analyzer):
+        return SentimentService(cache_service=batch_cache)
+
+
+@pytest.fixture
+def run_analyze_batch(sentiment_service, test_db):
+    """Executa analyze_batch do serviço de forma síncrona no banco de teste."""
+    def run(texts: List[str], **kwargs) -> List[Dict[str, Any]]:
+        return asyncio.run(sentiment_service.analyze_batch(texts, test_db, **kwargs))
+    return run
+
+
 # CLIENTE DE TESTE
 
 @pytest.fixture
@@ -0,0 +1,47 @@
+import asyncio
+import json
+from datetime import datetime
+from unittest.mock import AsyncMock
+
+from app.core.cache import OFFLOAD_THRESHOLD_BYTES, CacheService
+
+
+# TESTES DO CACHE SERVICE
+
+def test_cache_service_mget_and_set_many_fallback():
+    """Testa leitura e escrita em lote no cache (modo fallback)."""
+    cache = CacheService(fallback_mode=True)
+    
+    async def run():
+        await cache.set_many({"a": {"sentiment": "positive"}, "b": {"sentiment": "negative"}})
+        return await cache.mget(["a", "missing", "b"])
+    
+    assert asyncio.run(run()) == [
+        {"sentiment": "positive"}, None, {"sentiment": "negative"}
+    ]
+
+
+def test_cache_service_decodes_small_and_large_payloads():
+    """Testa leitura de payloads pequenos e grandes (acima do limite de offload)."""
+    cache = CacheService(fallback_mode=True)
+    cache.fallback_mode = False
+    cache.redis_client = AsyncMock()
+    small = {"sentiment": "positive"}
+    large = {"items": ["x" * OFFLOAD_THRESHOLD_BYTES]}
+    
+    cache.redis_client.get.return_value = json.dumps(small)
+    assert asyncio.run(cache.get("small")) == small
+    
+    cache.redis_client.get.return_value = json.dumps(large)
+    assert asyncio.run(cache.get("big")) == large
+
+
+def test_cache_service_orjson_serialization():
+    """Testa serialização do cache com orjson (datetime e chaves int)."""
+    cache = CacheService(fallback_mode=True)
+    created = datetime(2024, 1, 2, 3, 4, 5)
+    raw = cache._serialize_value({"created_at": created, 1: "um"})
+    
+    assert isinstance(raw, bytes)
+    assert cache._deserialize_value(raw) == {"created_at": created.isoformat(), "1": "um"}
+    assert cache._deserialize_value(raw.decode()) == cache._deserialize_value(raw)
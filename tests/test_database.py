@@ -0,0 +1,194 @@
+import json
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, inspect, select, text
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import _json_serializer
+from app.sentiment.migrations import upgrade_sentiment_schema
+from app.sentiment.models import SentimentAnalysis, SentimentFeedback, compute_text_hash
+from app.sentiment.repository import SentimentRepository
+
+
+# Schema de sentiment_analyses criado pelas versões anteriores (sentimento em string)
+LEGACY_SCHEMA = """
+CREATE TABLE sentiment_analyses (
+    id VARCHAR(36) NOT NULL PRIMARY KEY,
+    text TEXT NOT NULL,
+    sentiment VARCHAR(20) NOT NULL,
+    confidence FLOAT NOT NULL,
+    language VARCHAR(5) NOT NULL,
+    all_scores JSON,
+    created_at DATETIME DEFAULT (CURRENT_TIMESTAMP) NOT NULL,
+    updated_at DATETIME
+)
+"""
+
+# sentiment_feedback das versões anteriores: sem FK nem colunas copiadas da análise
+LEGACY_FEEDBACK_SCHEMA = (
+    """
+    CREATE TABLE sentiment_feedback (
+        id VARCHAR(36) NOT NULL PRIMARY KEY,
+        analysis_id VARCHAR(36) NOT NULL,
+        user_sentiment VARCHAR(20) NOT NULL,
+        model_sentiment VARCHAR(20) NOT NULL,
+        is_correct BOOLEAN NOT NULL,
+        feedback_notes TEXT,
+        created_at DATETIME DEFAULT (CURRENT_TIMESTAMP) NOT NULL
+    )
+    """,
+    "CREATE INDEX idx_analysis_id ON sentiment_feedback (analysis_id)",
+    "CREATE INDEX idx_is_correct ON sentiment_feedback (is_correct)",
+)
+
+
+@pytest.fixture
+def legacy_engine():
+    """Banco SQLite com a tabela de análises no schema legado."""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    
+    with engine.begin() as connection:
+        connection.execute(text(LEGACY_SCHEMA))
+        connection.execute(text(
+            "INSERT INTO sentiment_analyses (id, text, sentiment, confidence, language, all_scores) VALUES "
+            "('a1', 'Adorei o produto', 'positive', 0.9, 'pt', "
+            "'[{\"label\": \"positive\", \"score\": 0.9}, {\"label\": \"negative\", \"score\": 0.1}]'), "
+            "('a2', 'Terrible service', 'negative', 0.8, 'en', NULL), "
+            "('a3', 'Ok', 'neutral', 0.6, 'en', NULL)"
+        ))
+        
+        for statement in LEGACY_FEEDBACK_SCHEMA:
+            connection.execute(text(statement))
+        connection.execute(text(
+            "INSERT INTO sentiment_feedback (id, analysis_id, user_sentiment, model_sentiment, is_correct) VALUES "
+            "('f1', 'a2', 'neutral', 'negative', 0), "
+            "('f2', 'removed', 'positive', 'positive', 1)"
+        ))
+    
+    yield engine
+    engine.dispose()
+
+
+# TESTES DO ENGINE
+
+def test_database_json_serializer_uses_orjson():
+    """Testa serializador orjson das colunas JSON."""
+    payload = [{"label": "positive", "score": np.float32(0.5)}]
+    
+    assert isinstance(_json_serializer(payload), str)
+    assert json.loads(_json_serializer(payload)) == [{"label": "positive", "score": 0.5}]
+
+
+# TESTES DE MIGRAÇÃO DO SCHEMA
+
+def test_legacy_sentiment_labels_are_readable():
+    """Rótulos legados em string são aceitos na leitura."""
+    sentiment_type = SentimentAnalysis.__table__.c.sentiment.type
+    
+    assert sentiment_type.process_result_value("positive", None) == "positive"
+    assert sentiment_type.process_result_value("0", None) == "negative"
+    assert sentiment_type.process_result_value(1, None) == "neutral"
+    
+    with pytest.raises(ValueError):
+        sentiment_type.process_result_value("unknown", None)
+
+
+def test_upgrade_converts_legacy_sentiments(legacy_engine):
+    """Migração converte rótulos legados em códigos e é idempotente."""
+    upgrade_sentiment_schema(legacy_engine)
+    upgrade_sentiment_schema(legacy_engine)
+    
+    with legacy_engine.connect() as connection:
+        raw = dict(connection.execute(
+            text("SELECT id, CAST(sentiment AS INTEGER) FROM sentiment_analyses")
+        ).all())
+        loaded = dict(connection.execute(
+            select(SentimentAnalysis.id, SentimentAnalysis.sentiment)
+        ).all())
+    
+    assert raw == {"a1": 2, "a2": 0, "a3": 1}
+    assert loaded == {"a1": "positive", "a2": "negative", "a3": "neutral"}
+
+
+def test_upgrade_adds_new_columns_to_legacy_table(legacy_engine):
+    """Tabela legada ganha text_hash, all_scores_arr, text_length e índices."""
+    upgrade_sentiment_schema(legacy_engine)
+    upgrade_sentiment_schema(legacy_engine)
+    
+    inspector = inspect(legacy_engine)
+    columns = {column["name"] for column in inspector.get_columns("sentiment_analyses")}
+    indexes = {index["name"] for index in inspector.get_indexes("sentiment_analyses")}
+    
+    assert {"text_hash", "all_scores_arr", "text_length"} <= columns
+    assert "idx_text_hash" in indexes
+    
+    with legacy_engine.connect() as connection:
+        row = connection.execute(
+            select(
+                SentimentAnalysis.text_hash,
+                SentimentAnalysis.text_length,
+                SentimentAnalysis.all_scores_arr,
+            ).where(SentimentAnalysis.id == "a1")
+        ).one()
+    
+    assert row.text_hash == compute_text_hash("Adorei o produto")
+    assert row.text_length == len("Adorei o produto")
+    assert row.all_scores_arr == [0.1, 0.0, 0.9]
+
+
+def test_bulk_create_after_upgrade(legacy_engine):
+    """bulk_create funciona sobre uma tabela legada atualizada."""
+    upgrade_sentiment_schema(legacy_engine)
+    
+    with Session(legacy_engine) as session:
+        repository = SentimentRepository(session)
+        ids = repository.bulk_create([
+            {"text": "Muito bom", "sentiment": "positive", "confidence": 0.9, "language": "pt"},
+        ])
+        
+        created = repository.find_by_text_hash(compute_text_hash("Muito bom"))
+        
+        assert created.id == ids[0]
+        assert created.sentiment == "positive"
+        assert created.get_text_length() == len("Muito bom")
+
+
+def test_upgrade_backfills_feedback_columns(legacy_engine):
+    """Feedback legado recebe confiança e idioma copiados da análise."""
+    upgrade_sentiment_schema(legacy_engine)
+    upgrade_sentiment_schema(legacy_engine)
+    
+    with Session(legacy_engine) as session:
+        feedbacks = session.scalars(select(SentimentFeedback)).all()
+        
+        # Feedback de análise inexistente não tem de onde copiar os valores
+        assert [feedback.id for feedback in feedbacks] == ["f1"]
+        assert feedbacks[0].model_confidence == 0.8
+        assert feedbacks[0].model_language == "en"
+
+
+def test_upgrade_adds_feedback_foreign_key_and_cover_index(legacy_engine):
+    """Feedback legado ganha FK com cascade e troca os índices antigos."""
+    upgrade_sentiment_schema(legacy_engine)
+    upgrade_sentiment_schema(legacy_engine)
+    
+    inspector = inspect(legacy_engine)
+    foreign_keys = inspector.get_foreign_keys("sentiment_feedback")
+    indexes = {index["name"] for index in inspector.get_indexes("sentiment_feedback")}
+    
+    assert [foreign_key["referred_table"] for foreign_key in foreign_keys] == ["sentiment_analyses"]
+    assert foreign_keys[0]["options"]["ondelete"] == "CASCADE"
+    assert indexes == {"idx_feedback_cover", "idx_feedback_created"}
+    
+    with legacy_engine.begin() as connection:
+        connection.execute(text("PRAGMA foreign_keys=ON"))
+        connection.execute(text("DELETE FROM sentiment_analyses WHERE id = 'a2'"))
+        remaining = connection.execute(text("SELECT count(*) FROM sentiment_feedback")).scalar()
+    
+    assert remaining == 0
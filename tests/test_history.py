@@ -486,4 +486,26 @@ class TestHistoryWorkflow:
         
         # Verificar headers de rate limiting
         last_response = responses[-1]
-        assert "X-RateLimit-Limit" in last_response.headers
\ No newline at end of file
+        assert "X-RateLimit-Limit" in last_response.headers
+
+class TestHistoryAggregations:
+    """Testes das agregações do HistoryService."""
+    
+    def test_distributions_single_query(self, test_db, sample_analyses):
+        """Testa distribuições de sentimento e idioma derivadas de uma agregação."""
+        from unittest.mock import MagicMock
+        from app.history.service import HistoryService
+        
+        service = HistoryService(cache_service=MagicMock())
+        start_date = datetime.utcnow() - timedelta(days=30)
+        
+        sentiment_dist, language_dist = service._get_distributions(
+            test_db, start_date, language_limit=1
+        )
+        
+        assert (sentiment_dist.positive, sentiment_dist.negative, sentiment_dist.neutral) == (2, 2, 1)
+        assert sentiment_dist.total == 5
+        assert len(language_dist) == 1
+        assert language_dist[0].language == "pt"
+        assert language_dist[0].count == 3
+        assert language_dist[0].percentage == 60.0
@@ -0,0 +1,160 @@
+import logging
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
+from fastapi.testclient import TestClient
+
+from app.shared.context import RequestIdFilter, get_request_id
+from app.shared.middleware import (
+    CoreMiddleware, FastPathMiddleware, RequestLoggingMiddleware,
+    _resolve_request_id, new_request_id
+)
+
+
+# TESTES DO CORE MIDDLEWARE
+
+def test_timing_middleware_pure_asgi():
+    """Testa headers de timing injetados pelo middleware ASGI puro."""
+    app = FastAPI()
+    app.add_api_route("/ping", lambda: {"ok": True})
+    app.add_api_route("/health", lambda: {"status": "ok"})
+    app.add_middleware(CoreMiddleware)
+    client = TestClient(app)
+    
+    response = client.get("/ping")
+    assert response.json() == {"ok": True}
+    assert float(response.headers["X-Process-Time-MS"]) >= 0
+    assert "X-Process-Time" not in client.get("/health").headers
+
+
+def test_core_middleware_errors_and_security_headers():
+    """Testa erro padronizado e headers de segurança do CoreMiddleware."""
+    app = FastAPI()
+    
+    def boom():
+        raise RuntimeError("falha")
+    
+    app.add_api_route("/boom", boom)
+    app.add_middleware(RequestLoggingMiddleware, log_requests=False)
+    app.add_middleware(CoreMiddleware, security_headers=True)
+    
+    response = TestClient(app, raise_server_exceptions=False).get("/boom")
+    
+    assert response.status_code == 500
+    assert response.json()["error"] == "INTERNAL_SERVER_ERROR"
+    assert response.json()["request_id"] == response.headers["X-Request-ID"]
+    assert response.headers["X-Frame-Options"] == "DENY"
+    assert "X-Process-Time-MS" in response.headers
+
+
+# TESTES DE REQUEST ID E LOGGING
+
+def test_request_logging_middleware_pure_asgi():
+    """Testa request ID propagado para request.state e header X-Request-ID."""
+    app = FastAPI()
+    
+    @app.get("/ping")
+    def ping(request: Request):
+        return {"request_id": request.state.request_id}
+    
+    app.add_middleware(RequestLoggingMiddleware, log_requests=False)
+    response = TestClient(app).get("/ping")
+    
+    assert response.json()["request_id"] == response.headers["X-Request-ID"]
+
+
+def test_request_ids_counter_and_incoming_header():
+    """Testa IDs de request por contador e reaproveitamento do X-Request-ID."""
+    first, second = new_request_id(), new_request_id()
+    assert first != second and first[:6] == second[:6]
+    
+    scope = {"headers": [(b"x-request-id", b"edge-123.abc")]}
+    assert _resolve_request_id(scope) == "edge-123.abc"
+    
+    unsafe = {"headers": [(b"x-request-id", b"bad id\nforged")]}
+    assert _resolve_request_id(unsafe) != "bad id\nforged"
+
+
+def test_request_id_contextvar_and_log_filter():
+    """Testa ID do request disponível via contextvar e no filtro de log."""
+    app = FastAPI()
+    
+    @app.get("/ping")
+    async def ping():
+        record = logging.LogRecord("t", logging.INFO, __file__, 1, "msg", None, None)
+        RequestIdFilter().filter(record)
+        return {"request_id": get_request_id(), "log_request_id": record.request_id}
+    
+    app.add_middleware(RequestLoggingMiddleware, log_requests=False)
+    response = TestClient(app).get("/ping", headers={"X-Request-ID": "edge-42"})
+    
+    assert response.json() == {"request_id": "edge-42", "log_request_id": "edge-42"}
+    assert get_request_id() == "unknown"
+
+
+def test_request_id_filter_keeps_existing_value():
+    """Filtro só fornece o padrão: valor já presente no registro é mantido."""
+    record = logging.LogRecord("t", logging.INFO, __file__, 1, "msg", None, None)
+    record.request_id = "from-extra"
+    RequestIdFilter().filter(record)
+    assert record.request_id == "from-extra"
+    
+    bare = logging.LogRecord("t", logging.INFO, __file__, 1, "msg", None, None)
+    RequestIdFilter().filter(bare)
+    assert logging.Formatter("[%(request_id)s] %(message)s").format(bare) == "[unknown] msg"
+
+
+def test_request_log_data_built_from_scope():
+    """Testa dados de log lidos do scope com headers sensíveis filtrados."""
+    middleware = RequestLoggingMiddleware(app=None)
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "scheme": "http",
+        "server": ("testserver", 80),
+        "path": "/api/v1/history",
+        "query_string": b"page=2&limit=10",
+        "client": ("10.0.0.9", 5000),
+        "headers": [
+            (b"authorization", b"Bearer secreto"),
+            (b"x-forwarded-for", b"203.0.113.7, 10.0.0.1"),
+            (b"user-agent", b"pytest"),
+        ],
+    }
+    
+    data = middleware._build_request_data(scope, "abc", 1.0)
+    
+    assert "authorization" not in data["headers"]
+    assert data["query_params"] == "page=2&limit=10"
+    assert data["client_ip"] == "203.0.113.7"
+    assert data["user_agent"] == "pytest"
+    assert data["url"] == "http://testserver/api/v1/history?page=2&limit=10"
+
+
+# TESTES DO FAST PATH
+
+def test_fast_path_middleware_replays_body_and_propagates_errors():
+    """Testa replay do corpo em miss e propagação de erros do fast path."""
+    async def handler(request: Request):
+        body = await request.body()
+        if body == b"hit":
+            return PlainTextResponse("fast")
+        if body == b"boom":
+            raise RuntimeError("falha no fast path")
+        return None
+    
+    app = FastAPI()
+    
+    @app.post("/echo")
+    async def echo(request: Request):
+        return PlainTextResponse((await request.body()).decode())
+    
+    app.add_middleware(FastPathMiddleware, method="POST", path="/echo", handler=handler)
+    client = TestClient(app)
+    
+    assert client.post("/echo", content=b"hit").text == "fast"
+    assert client.post("/echo", content=b"miss").text == "miss"
+    
+    with pytest.raises(RuntimeError):
+        client.post("/echo", content=b"boom")
@@ -0,0 +1,86 @@
+import asyncio
+from collections import deque
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.shared.rate_limiter import InMemoryRateLimiter, RedisRateLimiter
+
+
+def make_request(
+    host: str = "127.0.0.1",
+    method: str = "POST",
+    path: str = "/api/v1/sentiment/analyze"
+) -> MagicMock:
+    """Request mínimo com os atributos lidos pelos rate limiters."""
+    request = MagicMock()
+    request.headers = {}
+    request.client.host = host
+    request.method = method
+    request.url.path = path
+    return request
+
+
+# TESTES DO RATE LIMITER EM MEMÓRIA
+
+def test_memory_rate_limiter_sliding_window_deque():
+    """Testa janela deslizante do limiter em memória (deque + bisect)."""
+    limiter = InMemoryRateLimiter()
+    request = make_request(host="10.0.0.1", method="GET", path="/api/v1/history")
+    
+    async def scenario():
+        results = []
+        for now in (1000.0, 1010.0, 1020.0, 1061.0, 4700.0):
+            with patch("app.shared.rate_limiter.time.time", return_value=now):
+                results.append(await limiter.is_allowed(request, 2, 3))
+        return results
+    
+    results = asyncio.run(scenario())
+    
+    assert [allowed for allowed, _ in results] == [True, True, False, True, True]
+    assert results[2][1]["X-RateLimit-Exceeded"] == "minute"
+    client_id = limiter._get_client_id(request)
+    requests, _ = limiter._get_shard(client_id)
+    assert requests[client_id]["GET:/api/v1/history"] == deque([4700.0])
+
+
+def test_memory_rate_limiter_shards_aggregate_stats():
+    """Testa estatísticas agregadas entre shards do limiter em memória."""
+    limiter = InMemoryRateLimiter()
+    
+    async def scenario():
+        for i in range(20):
+            await limiter.is_allowed(make_request(host=f"10.0.0.{i}"), 10, 100)
+        return await limiter.get_stats()
+    
+    stats = asyncio.run(scenario())
+    
+    assert stats["total_clients"] == 20
+    assert stats["total_requests_tracked"] == 20
+    assert sum(1 for requests, _ in limiter._shards if requests) > 1
+
+
+# TESTES DO RATE LIMITER REDIS
+
+def test_redis_rate_limiter_falls_back_to_memory():
+    """Testa uso do limiter em memória quando o Redis falha."""
+    redis_client = MagicMock()
+    redis_client.register_script.return_value = AsyncMock(
+        side_effect=RedisConnectionError("down")
+    )
+    limiter = RedisRateLimiter(redis_client, fallback=InMemoryRateLimiter())
+    request = make_request()
+    
+    allowed, headers = asyncio.run(limiter.is_allowed(request, 1, 10))
+    assert allowed is True
+    assert headers["X-RateLimit-Limit-Minute"] == "1"
+    
+    allowed, headers = asyncio.run(limiter.is_allowed(request, 1, 10))
+    assert allowed is False
+    assert headers["X-RateLimit-Exceeded"] == "minute"
+    
+    # Estatísticas vêm de contadores, sem varrer chaves no Redis
+    stats = asyncio.run(limiter.get_stats())
+    assert stats["redis_fallbacks"] == 2
+    assert stats["redis_checks"] == 0
+    redis_client.scan_iter.assert_not_called()
@@ -1,9 +1,22 @@
+import asyncio
+import json
 import pytest
 import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
 from fastapi import status
 from fastapi.testclient import TestClient
 
-from app.sentiment.models import SentimentAnalysis
+from app.core.exceptions import RecordNotFoundError, ValidationError
+from app.history.repository import HistoryRepository
+from app.sentiment import router as sentiment_router
+from app.sentiment.models import (
+    SentimentAnalysis, SentimentFeedback, compute_text_hash, generate_uuid7,
+    scores_to_soa
+)
+from app.sentiment.repository import SentimentRepository
+from app.sentiment.router import get_sentiment_service
+from app.sentiment.service import STATS_CACHE_KEY
 
 
 # TESTES DE ANÁLISE INDIVIDUAL
@@ -187,6 +200,11 @@ def test_analyze_batch_valid_texts(test_client, analysis_texts):
     assert results[0]["sentiment"] == "positive"
     assert results[1]["sentiment"] == "negative"
     assert results[2]["sentiment"] == "neutral"
+    
+    # IDs de lote: únicos e no mesmo formato hexadecimal de 32 caracteres
+    ids = [r["id"] for r in results]
+    assert len(set(ids)) == 3
+    assert all(len(i) == 32 and int(i, 16) >= 0 for i in ids)
 
 
 def test_analyze_batch_saves_to_database(test_client, test_db, analysis_texts):
@@ -547,4 +565,791 @@ def test_batch_response_format(test_client, analysis_texts):
     
     # Valores consistentes
     assert len(data["results"]) == data["total_processed"]
-    assert data["total_processed"] == len(texts)
\ No newline at end of file
+    assert data["total_processed"] == len(texts)
+
+
+# TESTES DE REPOSITÓRIO
+
+def test_find_by_text_hash(test_db):
+    """Testa busca de análise existente pelo hash do texto."""
+    text = "Texto para deduplicação"
+    analysis = SentimentAnalysis(
+        text=text,
+        sentiment="neutral",
+        confidence=0.7,
+        language="pt",
+        all_scores=[{"label": "neutral", "score": 0.7}]
+    )
+    test_db.add(analysis)
+    test_db.commit()
+    
+    repository = SentimentRepository(test_db)
+    
+    found = repository.find_by_text_hash(compute_text_hash(text))
+    assert found is not None
+    assert found.id == analysis.id
+    assert found.text_hash == compute_text_hash(text)
+    
+    assert repository.find_by_text_hash(compute_text_hash("outro texto")) is None
+
+
+def test_get_paginated(test_db, sample_analyses):
+    """Testa paginação por página com total exato."""
+    repository = SentimentRepository(test_db)
+    
+    first_page, total = repository.get_paginated(page=1, limit=2)
+    second_page, _ = repository.get_paginated(page=2, limit=2)
+    
+    assert total == len(sample_analyses)
+    assert len(first_page) == 2
+    assert not {a.id for a in first_page} & {a.id for a in second_page}
+
+
+def test_get_paginated_keyset_cursor(test_db, sample_analyses):
+    """Testa navegação por cursor sem sobreposição entre páginas."""
+    repository = SentimentRepository(test_db)
+    
+    first_page, total, cursor = repository.get_paginated_keyset(limit=2, include_total=True)
+    assert len(first_page) == 2
+    assert total == len(sample_analyses)
+    assert cursor is not None
+    
+    seen = [analysis.id for analysis in first_page]
+    while cursor is not None:
+        page, page_total, cursor = repository.get_paginated_keyset(limit=2, cursor=cursor)
+        assert page_total is None
+        seen.extend(analysis.id for analysis in page)
+    
+    assert len(seen) == len(set(seen)) == len(sample_analyses)
+    expected = sorted(sample_analyses, key=lambda a: a.created_at, reverse=True)
+    assert seen == [analysis.id for analysis in expected]
+
+
+def test_bulk_create(test_db):
+    """Testa inserção em lote de análises."""
+    repository = SentimentRepository(test_db)
+    items = [
+        {"text": "Ótimo", "sentiment": "positive", "confidence": 0.9, "language": "pt"},
+        {"text": "Ruim", "sentiment": "negative", "confidence": 0.8, "language": "pt"},
+    ]
+    
+    ids = repository.bulk_create(items)
+    
+    assert len(ids) == 2
+    for item, analysis_id in zip(items, ids):
+        saved = repository.get_by_id(analysis_id)
+        assert saved is not None
+        assert saved.text == item["text"]
+        assert saved.text_hash == compute_text_hash(item["text"])
+        assert saved.all_scores == ()
+
+
+def test_get_by_id_cached_and_invalidated_on_delete(test_db, sample_analyses):
+    """Testa cache LRU de get_by_id e invalidação na remoção."""
+    repository = SentimentRepository(test_db)
+    analysis_id = sample_analyses[0].id
+    
+    snapshot = repository.get_by_id(analysis_id)
+    
+    assert snapshot.text == sample_analyses[0].text
+    assert snapshot.to_summary() == sample_analyses[0].to_summary()
+    assert repository.get_by_id(analysis_id) is snapshot
+    
+    assert repository.delete(analysis_id) is True
+    assert repository.get_by_id(analysis_id) is None
+    
+    with pytest.raises(RecordNotFoundError):
+        repository.delete(analysis_id)
+    
+    # Remoção pelo repositório de histórico também invalida o cache
+    other_id = sample_analyses[1].id
+    assert repository.get_by_id(other_id) is not None
+    HistoryRepository(test_db).delete(other_id)
+    assert repository.get_by_id(other_id) is None
+
+
+def test_get_paginated_summaries(test_db, sample_analyses):
+    """Testa projeção de resumos sem carregar entidades ORM."""
+    repository = SentimentRepository(test_db)
+    
+    summaries = repository.get_paginated_summaries(limit=2)
+    
+    assert len(summaries) == 2
+    expected = repository.get_by_id(summaries[0]["id"]).to_summary()
+    assert summaries[0] == expected
+
+
+def test_get_recent_as_json(test_db, sample_analyses):
+    """Testa serialização JSON feita pelo banco."""
+    repository = SentimentRepository(test_db)
+    
+    items = json.loads(repository.get_recent_as_json(limit=2))
+    
+    assert len(items) == 2
+    assert set(items[0].keys()) == {
+        "id", "sentiment", "confidence", "language", "created_at", "text_length"
+    }
+    assert items[0]["text_length"] > 0
+    
+    # Mesmo formato e ordem (mais recente primeiro) de to_summary
+    expected = [analysis.to_summary() for analysis in repository.get_recent(limit=2)]
+    assert items == expected
+
+
+def test_score_helpers():
+    """Testa helpers derivados dos scores ordenados."""
+    analysis = SentimentAnalysis.create_from_analysis(
+        text="Misto",
+        sentiment="positive",
+        confidence=0.5,
+        language="pt",
+        all_scores=[
+            {"label": "negative", "score": 0.35},
+            {"label": "positive", "score": 0.5},
+            {"label": "neutral", "score": 0.15},
+        ]
+    )
+    
+    assert analysis.dominant_score["label"] == "positive"
+    assert [s["label"] for s in analysis.get_secondary_sentiments()] == ["negative", "neutral"]
+    assert analysis.is_mixed_sentiment(threshold=0.3) is True
+    assert analysis.is_mixed_sentiment(threshold=0.4) is False
+
+
+def test_compute_quality_batch(test_db):
+    """Testa cálculo vetorizado de qualidade em lote."""
+    repository = SentimentRepository(test_db)
+    ids = repository.bulk_create([
+        {
+            "text": "Misto", "sentiment": "positive", "confidence": 0.5, "language": "pt",
+            "all_scores": [
+                {"label": "positive", "score": 0.5},
+                {"label": "negative", "score": 0.4},
+                {"label": "neutral", "score": 0.1},
+            ]
+        },
+        {
+            "text": "Ruim", "sentiment": "negative", "confidence": 0.9, "language": "pt",
+            "all_scores": [
+                {"label": "neutral", "score": 0.05},
+                {"label": "negative", "score": 0.9},
+                {"label": "positive", "score": 0.05},
+            ]
+        },
+    ])
+    
+    quality = repository.compute_quality_batch(ids)
+    
+    assert quality[ids[0]] == {"dominant": "positive", "is_mixed": True}
+    assert quality[ids[1]] == {"dominant": "negative", "is_mixed": False}
+
+
+def test_scores_vector_populated(test_db):
+    """Testa preenchimento do vetor de scores na ordem canônica."""
+    analysis = SentimentAnalysis.create_from_analysis(
+        text="Bom",
+        sentiment="positive",
+        confidence=0.7,
+        language="pt",
+        all_scores=[
+            {"label": "positive", "score": 0.7},
+            {"label": "negative", "score": 0.2},
+            {"label": "neutral", "score": 0.1},
+        ]
+    )
+    
+    saved = SentimentRepository(test_db).create(analysis)
+    
+    assert saved.all_scores_arr == pytest.approx([0.2, 0.1, 0.7])
+
+
+def test_repository_get_statistics(test_db, sample_analyses):
+    """Testa estatísticas com janela de dias calculada no banco."""
+    repository = SentimentRepository(test_db)
+    
+    stats = repository.get_statistics(days=30)
+    
+    assert stats["total"] == len(sample_analyses)
+    assert stats["period_days"] == 30
+    assert 0 < stats["avg_confidence"] <= 1
+
+
+def test_get_dashboard_bundle(test_db, sample_analyses):
+    """Testa contagens e estatísticas obtidas numa única consulta."""
+    repository = SentimentRepository(test_db)
+    
+    bundle = repository.get_dashboard_bundle(days=30)
+    
+    assert bundle["counts"] == repository.count_by_sentiment()
+    assert bundle["statistics"] == repository.get_statistics(days=30)
+    assert repository.get_dashboard_bundle(days=None)["counts"] == bundle["counts"]
+
+
+def test_daily_counts_view_only_on_postgresql(test_db, sample_analyses):
+    """Testa refresh da materialized view como no-op fora do PostgreSQL."""
+    repository = SentimentRepository(test_db)
+    
+    repository.refresh_daily_counts()
+    
+    assert sum(repository.count_by_sentiment().values()) == len(sample_analyses)
+
+
+def test_repository_count_by_sentiment_and_language(test_db, sample_analyses):
+    """Testa total e distribuições derivados de uma única agregação."""
+    counts = SentimentRepository(test_db).count_by_sentiment_and_language()
+    
+    assert counts["total"] == len(sample_analyses)
+    assert sum(counts["sentiments"].values()) == len(sample_analyses)
+    assert sum(counts["languages"].values()) == len(sample_analyses)
+
+
+def test_sentiment_stored_as_code(test_db, sample_analyses):
+    """Testa armazenamento do sentimento como código inteiro."""
+    from sqlalchemy import text
+    
+    raw = test_db.execute(
+        text("SELECT sentiment FROM sentiment_analyses WHERE id = :id"),
+        {"id": sample_analyses[0].id}
+    ).scalar()
+    
+    assert isinstance(raw, int)
+    assert SentimentRepository(test_db).get_by_id(sample_analyses[0].id).sentiment == sample_analyses[0].sentiment
+
+
+def test_create_populates_server_defaults(test_db):
+    """Testa que create retorna created_at sem refresh explícito."""
+    analysis = SentimentAnalysis.create_from_analysis(
+        text="Teste", sentiment="neutral", confidence=0.5, language="pt"
+    )
+    
+    saved = SentimentRepository(test_db).create(analysis)
+    
+    assert saved.id is not None
+    assert saved.created_at is not None
+
+
+def test_iter_daily_analytics(test_db, sample_analyses):
+    """Testa analytics diárias consumidas em partições."""
+    repository = SentimentRepository(test_db)
+    
+    partitions = list(repository.iter_daily_analytics(days=30, chunk_size=1))
+    
+    assert all(len(partition) == 1 for partition in partitions)
+    rows = [row for partition in partitions for row in partition]
+    assert sum(row["count"] for row in rows) == len(sample_analyses)
+
+
+def test_text_length_generated_column(test_db):
+    """Testa coluna gerada text_length."""
+    repository = SentimentRepository(test_db)
+    saved = repository.create(SentimentAnalysis.create_from_analysis(
+        text="Olá mundo", sentiment="neutral", confidence=0.5, language="pt"
+    ))
+    
+    assert saved.text_length == len("Olá mundo")
+    assert saved.to_summary()["text_length"] == len("Olá mundo")
+
+
+def test_feedback_copies_analysis_fields(test_db, sample_analyses):
+    """Testa desnormalização dos dados da análise no feedback."""
+    analysis = sample_analyses[0]
+    feedback = SentimentFeedback.create_for_analysis(analysis, user_sentiment="neutral")
+    test_db.add(feedback)
+    test_db.commit()
+    
+    assert feedback.model_sentiment == analysis.sentiment
+    assert feedback.model_confidence == analysis.confidence
+    assert feedback.model_language == analysis.language
+    assert feedback.is_correct == (analysis.sentiment == "neutral")
+
+
+def test_service_submit_feedback(sentiment_service, test_db, sample_analyses):
+    """Testa feedback registrado pelo serviço com dados copiados da análise."""
+    analysis = sample_analyses[0]
+    
+    feedback = asyncio.run(
+        sentiment_service.submit_feedback(test_db, analysis.id, "neutral", "nota")
+    )
+    
+    saved = test_db.get(SentimentFeedback, feedback.id)
+    assert saved.model_sentiment == analysis.sentiment
+    assert saved.model_confidence == analysis.confidence
+    assert saved.model_language == analysis.language
+    assert saved.is_correct is False
+    
+    with pytest.raises(ValidationError):
+        asyncio.run(sentiment_service.submit_feedback(test_db, analysis.id, "feliz"))
+
+
+def test_generate_uuid7_time_ordered():
+    """Testa que IDs UUIDv7 são ordenados no tempo."""
+    import uuid
+    
+    first = generate_uuid7()
+    time.sleep(0.002)
+    second = generate_uuid7()
+    
+    assert uuid.UUID(first).version == 7
+    assert first < second
+
+
+def test_dynamic_batcher_groups_concurrent_requests(mock_analyzer):
+    """Testa agrupamento de requisições concorrentes em uma chamada de lote."""
+    from app.sentiment.batcher import DynamicBatcher
+    
+    async def run():
+        batcher = DynamicBatcher(max_batch_size=8, max_latency_ms=50)
+        batcher.start()
+        try:
+            return await asyncio.gather(*(
+                batcher.submit(mock_analyzer, text)
+                for text in ["I love it", "I hate it", "ok"]
+            ))
+        finally:
+            await batcher.stop()
+    
+    results = asyncio.run(run())
+    
+    assert [r["sentiment"] for r in results] == ["positive", "negative", "neutral"]
+    assert mock_analyzer.analyze_batch.call_count == 1
+
+
+def test_orjson_response_serializes_datetime():
+    """Testa serialização nativa de datetime pela ORJSONResponse."""
+    from datetime import datetime
+    from app.shared.utils import ORJSONResponse
+    
+    response = ORJSONResponse({"timestamp": datetime(2024, 1, 2, 3, 4, 5)})
+    
+    assert response.media_type == "application/json"
+    assert json.loads(response.body) == {"timestamp": "2024-01-02T03:04:05+00:00"}
+
+
+def test_log_analysis_stats_flushes_in_batch(caplog):
+    """Testa acúmulo das estatísticas no buffer e emissão em uma única linha."""
+    import logging
+    from app.sentiment.router import flush_analysis_stats, log_analysis_stats
+    
+    flush_analysis_stats()
+    log_analysis_stats(endpoint="analyze", success=True, processing_time=1.5)
+    log_analysis_stats(endpoint="analyze-batch", success=False, processing_time=3.0, text_count=2)
+    
+    with caplog.at_level(logging.INFO, logger="sentiment_analytics"):
+        assert flush_analysis_stats() == 2
+    
+    records = [r for r in caplog.records if r.name == "sentiment_analytics"]
+    assert len(records) == 1
+    batch = json.loads(records[0].getMessage())
+    assert [entry[0] for entry in batch] == ["analyze", "analyze-batch"]
+    assert flush_analysis_stats() == 0
+
+
+def test_sentiment_service_dependency_is_reused(test_cache, mock_analyzer):
+    """Testa reaproveitamento do SentimentService enquanto o cache for o mesmo."""
+    with patch('app.sentiment.service.get_sentiment_analyzer', return_value=mock_analyzer):
+        service = get_sentiment_service(cache=test_cache)
+        
+        assert get_sentiment_service(cache=test_cache) is service
+        assert get_sentiment_service(cache=MagicMock()) is not service
+
+
+def test_analysis_request_strips_only_padded_text():
+    """Testa remoção de espaços das bordas apenas quando presentes."""
+    from app.sentiment.schemas import AnalysisRequest
+    
+    assert AnalysisRequest(text="  Ótimo produto!\n").text == "Ótimo produto!"
+    assert AnalysisRequest(text="Ótimo  produto!").text == "Ótimo  produto!"
+
+
+def test_handle_sentiment_error_dispatch():
+    """Testa mapeamento de erros (incluindo subclasses) para HTTPException."""
+    from app.core.exceptions import InvalidTextError, ModelLoadError
+    from app.sentiment.router import handle_sentiment_error
+    
+    invalid = handle_sentiment_error(InvalidTextError("texto inválido"), "req-1")
+    assert invalid.status_code == status.HTTP_400_BAD_REQUEST
+    assert invalid.detail["error"] == "INVALID_TEXT"
+    assert invalid.detail["request_id"] == "req-1"
+    
+    ml_error = handle_sentiment_error(ModelLoadError("falha"), "req-2")
+    assert ml_error.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+    assert ml_error.detail["error"] == "ML_ERROR"
+    
+    unknown = handle_sentiment_error(ValueError("x"), "req-3")
+    assert unknown.detail["error"] == "INTERNAL_ERROR"
+
+
+def test_service_get_statistics(sentiment_service, batch_cache, test_db, sample_analyses, mock_analyzer):
+    """Testa estatísticas do serviço com consultas ao banco fora do event loop."""
+    batch_cache.get_stats = AsyncMock(return_value={"hit_rate": 0.5})
+    mock_analyzer.get_model_info.return_value = {"model_name": "mock"}
+    
+    stats = asyncio.run(sentiment_service.get_statistics(test_db))
+    
+    assert stats["database"]["total_analyses"] == len(sample_analyses)
+    assert sum(
+        item["count"] for item in stats["database"]["language_distribution"]
+    ) == len(sample_analyses)
+    assert stats["uptime_info"]["cache_hit_rate"] == 0.5
+
+
+def test_service_get_statistics_uses_cached_database_stats(sentiment_service, batch_cache, test_db):
+    """Testa reaproveitamento das estatísticas do banco em cache."""
+    cached_stats = {"total_analyses": 42, "sentiment_distribution": [], "language_distribution": []}
+    batch_cache.get = AsyncMock(return_value=cached_stats)
+    batch_cache.get_stats = AsyncMock(return_value={"hit_rate": 0.0})
+    
+    with patch.object(sentiment_service, "_get_database_statistics") as query:
+        stats = asyncio.run(sentiment_service.get_statistics(test_db))
+    
+    assert stats["database"] == cached_stats
+    batch_cache.get.assert_awaited_once_with(STATS_CACHE_KEY)
+    query.assert_not_called()
+
+
+def test_service_history_keyset_pagination(sentiment_service, test_db, sample_analyses):
+    """Testa paginação do histórico por cursor (created_at, id)."""
+    async def collect():
+        ids, cursor = [], None
+        while True:
+            page = await sentiment_service.get_analysis_history(test_db, limit=2, cursor=cursor)
+            ids.extend(item["id"] for item in page["results"])
+            if not page["has_more"]:
+                return ids
+            cursor = page["next_cursor"]
+    
+    ids = asyncio.run(collect())
+    
+    assert len(ids) == len(set(ids)) == len(sample_analyses)
+
+
+def test_service_history_truncates_text_in_query(sentiment_service, test_db):
+    """Testa prévia do texto truncada na própria consulta."""
+    long_text = "a" * 150
+    SentimentRepository(test_db).create(SentimentAnalysis(
+        text=long_text, sentiment="neutral", confidence=0.5, language="en"
+    ))
+    
+    page = asyncio.run(sentiment_service.get_analysis_history(test_db, limit=1, include_total=True))
+    
+    assert page["results"][0]["text_preview"] == long_text[:100] + "..."
+    assert page["total_count"] == 1
+
+
+def test_analysis_response_ids_are_unique_hex():
+    """Testa geração de IDs hexadecimais únicos nas respostas."""
+    from app.sentiment.schemas import AnalysisResponse
+    
+    ids = {
+        AnalysisResponse.model_construct(sentiment="positive", confidence=0.9, language="en").id
+        for _ in range(50)
+    }
+    
+    assert len(ids) == 50
+    assert all(len(i) == 32 and int(i, 16) >= 0 for i in ids)
+
+
+def test_batch_response_consistency_check():
+    """Testa rejeição de contador inconsistente com os resultados (modo debug)."""
+    from pydantic import ValidationError
+    from app.sentiment.schemas import BatchResponse
+    
+    with pytest.raises(ValidationError):
+        BatchResponse(results=[], total_processed=1)
+
+
+def test_normalized_scores_use_canonical_labels():
+    """Testa normalização de labels do modelo para os rótulos canônicos."""
+    from app.sentiment.analyzer import SentimentAnalyzer
+    
+    # Instância sem __init__ (não carrega modelo nem passa pelo singleton)
+    analyzer = object.__new__(SentimentAnalyzer)
+    result = analyzer._normalize_sentiment_result([
+        {"label": "LABEL_2", "score": 0.9},
+        {"label": "negative", "score": 0.1}
+    ])
+    
+    assert result["sentiment"] == "positive"
+    assert [score["label"] for score in result["all_scores"]] == ["positive", "negative"]
+
+
+def test_normalized_scores_survive_cache_quantization():
+    """Testa que cache hit devolve exatamente os scores de um miss."""
+    from app.sentiment.analyzer import SentimentAnalyzer
+    from app.sentiment.service import _compact_cache_payload, _restore_cached_payload
+    
+    analyzer = object.__new__(SentimentAnalyzer)
+    result = analyzer._normalize_sentiment_result([
+        {"label": "POSITIVE", "score": 0.912345678},
+        {"label": "NEGATIVE", "score": 0.054321987},
+        {"label": "NEUTRAL", "score": 0.033332335}
+    ])
+    
+    payload = {"sentiment": result["sentiment"], "confidence": result["confidence"]}
+    _compact_cache_payload(payload, result["all_scores"])
+    restored = _restore_cached_payload(payload)
+    
+    assert restored["confidence"] == result["confidence"]
+    assert restored["all_scores"] == result["all_scores"]
+
+
+def test_analyze_cache_hit_fast_path(test_client, sentiment_service, batch_cache, mock_analyzer):
+    """Testa resposta de cache hit antes do roteamento, sem chamar o modelo."""
+    batch_cache.get = AsyncMock(return_value={
+        "sentiment": "positive",
+        "confidence": 0.95,
+        "language": "en",
+        "all_scores": [{"label": "positive", "score": 0.95}]
+    })
+    
+    sentiment_router._sentiment_service = sentiment_service
+    try:
+        response = test_client.post(
+            "/api/v1/sentiment/analyze",
+            json={"text": "  I love this product!  "}
+        )
+    finally:
+        sentiment_router._sentiment_service = None
+    
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["sentiment"] == "positive"
+    assert data["cached"] is True
+    mock_analyzer.analyze.assert_not_called()
+    batch_cache.get.assert_awaited_once()
+
+
+def test_cache_key_matches_text_hash(sentiment_service, batch_cache, test_db):
+    """Testa chave de cache derivada do mesmo hash persistido em text_hash."""
+    batch_cache.get = AsyncMock(return_value=None)
+    batch_cache.set = AsyncMock(return_value=True)
+    
+    result = asyncio.run(sentiment_service.analyze_text("I love this product!", test_db))
+    
+    saved = test_db.get(SentimentAnalysis, result["record_id"])
+    assert saved.text_hash == compute_text_hash("I love this product!")
+    batch_cache.get.assert_awaited_once_with(f"sentiment:analysis:{saved.text_hash}")
+
+
+def test_batch_cache_lookup_without_mget(sentiment_service):
+    """Testa leitura concorrente via get() em cache sem operações em lote."""
+    class SimpleCache:
+        def __init__(self):
+            self.store = {"a": {"sentiment": "positive"}}
+        
+        async def get(self, key):
+            if key == "boom":
+                raise ConnectionError("down")
+            return self.store.get(key)
+        
+        async def set(self, key, value, ttl=None):
+            self.store[key] = value
+            return True
+    
+    cache = SimpleCache()
+    sentiment_service.cache_service = cache
+    
+    async def run():
+        values = await sentiment_service._cache_get_many(["a", "missing", "boom"])
+        await sentiment_service._cache_set_many({"b": {"sentiment": "negative"}})
+        return values
+    
+    assert asyncio.run(run()) == [{"sentiment": "positive"}, None, None]
+    assert cache.store["b"] == {"sentiment": "negative"}
+
+
+def test_service_analyze_batch_bulk_saves_records(test_db, batch_cache, run_analyze_batch):
+    """Testa persistência em lote com record_id retornado para cada resultado."""
+    texts = ["I love it", "I hate it", "It is ok"]
+    
+    results = run_analyze_batch(texts)
+    
+    saved = [test_db.get(SentimentAnalysis, r["record_id"]) for r in results]
+    assert [record.text for record in saved] == texts
+    batch_cache.set_many.assert_awaited_once()
+
+
+def test_service_analyze_batch_cache_keys_match_text_hash(test_db, batch_cache, run_analyze_batch):
+    """Testa chaves de cache do lote derivadas do text_hash persistido."""
+    texts = ["I love it", "I hate it", "It is ok"]
+    
+    results = run_analyze_batch(texts)
+    
+    saved_hashes = [test_db.get(SentimentAnalysis, r["record_id"]).text_hash for r in results]
+    assert saved_hashes == [compute_text_hash(text) for text in texts]
+    assert batch_cache.mget.await_args.args[0] == [
+        f"sentiment:analysis:{text_hash}" for text_hash in saved_hashes
+    ]
+
+
+def test_service_analyze_batch_cache_payload(batch_cache, run_analyze_batch):
+    """Testa que o payload cacheado não contém texto nem posição no lote."""
+    from app.sentiment.service import _restore_cached_payload
+    
+    results = run_analyze_batch(["I love it"])
+    
+    payload = next(iter(batch_cache.set_many.await_args.args[0].values()))
+    assert "text" not in payload and "batch_index" not in payload
+    assert "all_scores" not in payload and "confidence" not in payload
+    assert all(isinstance(score, int) for score in payload["scores_soa"]["scores"])
+    
+    restored = _restore_cached_payload(dict(payload))
+    assert restored["confidence"] == results[0]["confidence"]
+    assert restored["all_scores"] == results[0]["all_scores"]
+    assert payload["record_id"] == results[0]["record_id"]
+    assert results[0]["text"] == "I love it"
+
+
+def test_service_metrics_batch_counters(sentiment_service, run_analyze_batch):
+    """Testa contadores do serviço atualizados por lote."""
+    run_analyze_batch(["I love it", "I hate it"], use_cache=False)
+    
+    assert sentiment_service._stats.to_dict() == {
+        "cache_hits": 0,
+        "cache_misses": 2,
+        "analyses_performed": 2,
+        "errors": 0
+    }
+
+
+def test_service_cacheable_flags_match_single_rule(sentiment_service):
+    """Testa critério de cache do lote equivalente ao critério individual."""
+    ml_results = [
+        {"sentiment": "positive", "confidence": 0.9},
+        {"sentiment": "negative", "confidence": 0.1},
+        {"sentiment": "neutral", "confidence": 0.0, "error": "falha"},
+        {"sentiment": "", "confidence": 0.8},
+    ]
+    
+    assert sentiment_service._cacheable_flags(ml_results) == [
+        sentiment_service._should_cache_result(result) for result in ml_results
+    ] == [True, False, False, False]
+
+
+def test_cached_analysis_expands_soa_scores(sentiment_service, batch_cache):
+    """Testa reconstrução de all_scores a partir do payload SoA do cache."""
+    all_scores = [{"label": "positive", "score": 0.9}, {"label": "negative", "score": 0.1}]
+    batch_cache.get = AsyncMock(return_value={"sentiment": "positive", "scores_soa": scores_to_soa(all_scores)})
+    
+    result = asyncio.run(sentiment_service.get_cached_analysis("key", time.time()))
+    
+    assert result["all_scores"] == all_scores
+    assert "scores_soa" not in result
+
+
+def test_service_analyze_batch_skips_cache_for_invalid_texts(batch_cache, run_analyze_batch):
+    """Testa que textos inválidos do lote não consultam o cache."""
+    results = run_analyze_batch(["I love it", "   ", "I hate it"], save_to_db=False)
+    
+    assert [r["batch_index"] for r in results] == [0, 1, 2]
+    assert batch_cache.mget.await_args.args[0] == [
+        f"sentiment:analysis:{compute_text_hash(text)}" for text in ("I love it", "I hate it")
+    ]
+
+
+def test_run_inference_uses_dedicated_thread():
+    """Testa execução da inferência no pool dedicado."""
+    import threading
+    from app.sentiment.analyzer import run_inference
+    
+    thread_name = asyncio.run(run_inference(lambda: threading.current_thread().name))
+    
+    assert thread_name.startswith("ml-inference")
+
+
+def test_analyzer_compile_model_falls_back_to_eager():
+    """Testa compilação do modelo e fallback para eager em caso de falha."""
+    from app.sentiment.analyzer import SentimentAnalyzer
+    
+    analyzer = object.__new__(SentimentAnalyzer)
+    analyzer._pipeline = MagicMock()
+    eager_model = analyzer._pipeline.model
+    
+    with patch("app.sentiment.analyzer.torch.compile", side_effect=RuntimeError("sem backend")):
+        analyzer._compile_model()
+    assert analyzer._pipeline.model is eager_model
+    
+    with patch("app.sentiment.analyzer.torch.compile", return_value="compilado") as compile_fn:
+        analyzer._compile_model()
+    compile_fn.assert_called_once_with(eager_model, mode="reduce-overhead", fullgraph=False)
+    assert analyzer._pipeline.model == "compilado"
+
+
+def test_service_analyze_text_persists_via_core_insert(sentiment_service, test_db):
+    """Testa persistência do analyze_text pelo INSERT Core do repository."""
+    result = asyncio.run(sentiment_service.analyze_text("I love it", test_db, use_cache=False))
+    
+    record = test_db.get(SentimentAnalysis, result["record_id"])
+    assert record.text_hash == compute_text_hash("I love it")
+    assert record.all_scores_arr is not None
+
+
+def test_service_analyze_batch_deduplicates_texts(test_db, mock_analyzer, run_analyze_batch):
+    """Testa inferência e persistência únicas para textos repetidos no lote."""
+    results = run_analyze_batch(["I love it", "I hate it", "I love it"])
+    
+    mock_analyzer.analyze_batch.assert_called_once_with(["I love it", "I hate it"])
+    assert [r["batch_index"] for r in results] == [0, 1, 2]
+    assert results[0]["record_id"] == results[2]["record_id"] != results[1]["record_id"]
+    assert test_db.query(SentimentAnalysis).count() == 2
+
+
+def test_analyzer_language_detection_is_memoized():
+    """Testa memoização da detecção de idioma por texto."""
+    from app.sentiment import analyzer as analyzer_module
+    
+    analyzer = object.__new__(analyzer_module.SentimentAnalyzer)
+    analyzer_module._detect_language_cached.cache_clear()
+    
+    with patch.object(analyzer_module, "detect", return_value="pt") as detect:
+        assert analyzer._detect_language("Produto excelente") == "pt"
+        assert analyzer._detect_language("  Produto excelente  ") == "pt"
+    
+    detect.assert_called_once_with("Produto excelente")
+
+
+def test_analyzer_import_does_not_load_transformers():
+    """Testa que transformers só é importado ao carregar o modelo."""
+    import subprocess
+    import sys
+    
+    code = "import sys, app.sentiment.analyzer; print('transformers' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    
+    assert result.stdout.strip().endswith("False")
+
+
+def test_error_detail_templates_are_not_shared():
+    """Testa que o detail de erro parte do template sem mutá-lo."""
+    from app.shared.error_handlers import _DETAIL_TEMPLATES, handle_api_error
+    
+    error = RecordNotFoundError(resource="Análise", record_id="abc")
+    exc = asyncio.run(handle_api_error(error, request_id="req-1"))
+    
+    assert exc.status_code == 404
+    assert exc.detail["error"] == "RECORD_NOT_FOUND"
+    assert exc.detail["request_id"] == "req-1"
+    assert "request_id" not in _DETAIL_TEMPLATES[RecordNotFoundError]
+
+
+def test_loaded_labels_and_languages_round_trip(test_db, sample_analyses):
+    """Testa sentimento e idioma carregados do banco como rótulos em string."""
+    test_db.expire_all()
+    rows = test_db.query(SentimentAnalysis).all()
+    
+    assert sorted(r.sentiment for r in rows) == sorted(a.sentiment for a in sample_analyses)
+    assert sorted(r.language for r in rows) == ["en", "en", "pt", "pt", "pt"]
+
+
+def test_analyzer_normalize_text_fast_path():
+    """Testa caminho rápido da normalização e validações de borda."""
+    from app.core.exceptions import InvalidTextError
+    from app.sentiment import analyzer as analyzer_module
+    
+    analyzer = object.__new__(analyzer_module.SentimentAnalyzer)
+    clean = "Produto excelente"
+    
+    assert analyzer._normalize_text(clean) is clean
+    assert analyzer._normalize_text("  Produto excelente ") == clean
+    with pytest.raises(InvalidTextError):
+        analyzer._normalize_text("   ")